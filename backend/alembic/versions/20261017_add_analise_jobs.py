@@ -0,0 +1,45 @@
+"""add analise_jobs table
+
+Revision ID: 20261017_add_analise_jobs
+Revises: 20261017_add_versao_regras
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261017_add_analise_jobs'
+down_revision = '20261017_add_versao_regras'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'analise_jobs',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('estado', sa.String(), nullable=False),
+        sa.Column('etapa', sa.String(), nullable=True),
+        sa.Column('eventos', sa.JSON(), nullable=True),
+        sa.Column('nome_arquivo', sa.String(), nullable=False),
+        sa.Column('force_ai', sa.Boolean(), nullable=False),
+        sa.Column('conteudo', sa.LargeBinary(), nullable=True),
+        sa.Column('resultado', sa.JSON(), nullable=True),
+        sa.Column('erro', sa.String(), nullable=True),
+        sa.Column('status_erro', sa.Integer(), nullable=True),
+        sa.Column('tentativas', sa.Integer(), nullable=False),
+        sa.Column('criado_em', sa.DateTime(), nullable=True),
+        sa.Column('iniciado_em', sa.DateTime(), nullable=True),
+        sa.Column('concluido_em', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_analise_jobs_estado'), 'analise_jobs', ['estado'], unique=False)
+    op.create_index(op.f('ix_analise_jobs_criado_em'), 'analise_jobs', ['criado_em'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_analise_jobs_criado_em'), table_name='analise_jobs')
+    op.drop_index(op.f('ix_analise_jobs_estado'), table_name='analise_jobs')
+    op.drop_table('analise_jobs')
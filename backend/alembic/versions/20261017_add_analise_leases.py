@@ -0,0 +1,30 @@
+"""add analise_leases table
+
+Revision ID: 20261017_add_analise_leases
+Revises: 20261017_add_analise_jobs
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261017_add_analise_leases'
+down_revision = '20261017_add_analise_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'analise_leases',
+        sa.Column('hash_arquivo', sa.String(), nullable=False),
+        sa.Column('dono', sa.String(), nullable=False),
+        sa.Column('expira_em', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('hash_arquivo'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('analise_leases')
@@ -0,0 +1,33 @@
+"""add ocr_paginas_cache table
+
+Revision ID: 20261017_add_ocr_paginas
+Revises: 20261017_add_texto_extraido
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261017_add_ocr_paginas'
+down_revision = '20261017_add_texto_extraido'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ocr_paginas_cache',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('hash_imagem', sa.String(), nullable=False, index=True),
+        sa.Column('idioma', sa.String(), nullable=False),
+        sa.Column('texto', sa.String()),
+        sa.Column('data_ocr', sa.DateTime(), nullable=True),
+    )
+    op.create_unique_constraint('uq_ocr_hash_idioma', 'ocr_paginas_cache', ['hash_imagem', 'idioma'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_ocr_hash_idioma', 'ocr_paginas_cache', type_='unique')
+    op.drop_table('ocr_paginas_cache')
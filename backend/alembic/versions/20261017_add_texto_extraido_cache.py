@@ -0,0 +1,36 @@
+"""add textos_extraidos_cache table
+
+Revision ID: 20261017_add_texto_extraido
+Revises: 20251020_add_analise_cache
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261017_add_texto_extraido'
+down_revision = '20251020_add_analise_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'textos_extraidos_cache',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('hash_arquivo', sa.String(), nullable=False, index=True),
+        sa.Column('versao_extrator', sa.String(), nullable=False),
+        sa.Column('texto_comprimido', sa.LargeBinary(), nullable=False),
+        sa.Column('tamanho_texto', sa.Integer()),
+        sa.Column('data_extracao', sa.DateTime(), nullable=True),
+    )
+    op.create_unique_constraint(
+        'uq_texto_hash_versao', 'textos_extraidos_cache', ['hash_arquivo', 'versao_extrator']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_texto_hash_versao', 'textos_extraidos_cache', type_='unique')
+    op.drop_table('textos_extraidos_cache')
@@ -0,0 +1,27 @@
+"""add versao_regras to analises_cache
+
+Revision ID: 20261017_add_versao_regras
+Revises: 20261017_add_ocr_paginas
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261017_add_versao_regras'
+down_revision = '20261017_add_ocr_paginas'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Linhas existentes ficam com NULL e são reprocessadas em segundo plano
+    op.add_column('analises_cache', sa.Column('versao_regras', sa.String(), nullable=True))
+    op.create_index(op.f('ix_analises_cache_versao_regras'), 'analises_cache', ['versao_regras'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_analises_cache_versao_regras'), table_name='analises_cache')
+    op.drop_column('analises_cache', 'versao_regras')
@@ -0,0 +1,112 @@
+# benchmarks/bench_docx.py
+
+"""
+Compara a leitura de DOCX via python-docx (modelo de objetos completo) com o
+leitor por streaming de core/docx_reader.py, em tempo e pico de memória.
+
+Uso (a partir de backend/):
+    python benchmarks/bench_docx.py --paragrafos 50000 --tabelas 500
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import resource  # apenas Unix: mede o pico de RSS (inclui memória C do lxml)
+except ImportError:
+    resource = None
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import docx  # noqa: E402
+
+from core.docx_reader import iterar_blocos_docx  # noqa: E402
+
+CLAUSULA = (
+    "CLÁUSULA {n} - O LOCATÁRIO pagará mensalmente o aluguel de R$ {valor},00, "
+    "reajustado anualmente pelo IGP-M, sob pena de multa de 10% e juros de 1% ao mês."
+)
+
+
+def gerar_docx(caminho: str, paragrafos: int, tabelas: int) -> None:
+    """Gera um contrato sintético grande, com parágrafos e tabelas intercalados."""
+    documento = docx.Document()
+    documento.sections[0].header.paragraphs[0].text = "IMOBILIÁRIA EXEMPLO - CONTRATO DE LOCAÇÃO"
+    intervalo_tabela = max(1, paragrafos // max(1, tabelas))
+    for i in range(paragrafos):
+        documento.add_paragraph(CLAUSULA.format(n=i + 1, valor=1000 + i))
+        if tabelas and i % intervalo_tabela == 0:
+            tabela = documento.add_table(rows=3, cols=2)
+            tabela.cell(0, 0).text = "Vigência"
+            tabela.cell(0, 1).text = f"{12 + i % 48} meses"
+            tabela.cell(1, 0).text = "Aluguel"
+            tabela.cell(1, 1).text = f"R$ {5000 + i},00"
+            tabela.cell(2, 0).text = "Caução"
+            tabela.cell(2, 1).text = "3 aluguéis"
+    documento.save(caminho)
+
+
+def ler_python_docx(caminho: str) -> int:
+    documento = docx.Document(caminho)
+    return len("\n".join(paragrafo.text for paragrafo in documento.paragraphs))
+
+
+def ler_streaming(caminho: str) -> int:
+    return len("\n".join(iterar_blocos_docx(caminho)))
+
+
+def _pico_memoria_filho(nome_funcao: str, caminho: str) -> float:
+    """Executa a leitura num processo limpo e devolve o aumento do pico de RSS (MB)."""
+    funcao = LEITORES[nome_funcao]
+    antes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    funcao(caminho)
+    depois = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return (depois - antes) / 1024  # ru_maxrss vem em KB no Linux
+
+
+def medir(nome_funcao: str, caminho: str, repeticoes: int):
+    """Retorna (melhor tempo em s, pico de memória em MB ou None, nº de caracteres)."""
+    funcao = LEITORES[nome_funcao]
+    melhor = float("inf")
+    caracteres = 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        caracteres = funcao(caminho)
+        melhor = min(melhor, time.perf_counter() - inicio)
+
+    pico = None
+    if resource is not None:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            pico = pool.submit(_pico_memoria_filho, nome_funcao, caminho).result()
+    return melhor, pico, caracteres
+
+
+LEITORES = {"python-docx": ler_python_docx, "streaming": ler_streaming}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragrafos", type=int, default=20000)
+    parser.add_argument("--tabelas", type=int, default=200)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "contrato_grande.docx")
+        gerar_docx(caminho, args.paragrafos, args.tabelas)
+        tamanho_mb = os.path.getsize(caminho) / (1024 * 1024)
+        print(f"Arquivo: {args.paragrafos} parágrafos, {args.tabelas} tabelas, {tamanho_mb:.1f} MB")
+
+        for nome in LEITORES:
+            tempo, pico, caracteres = medir(nome, caminho, args.repeticoes)
+            memoria = f"+{pico:7.1f} MB RSS" if pico is not None else "memória n/d"
+            print(f"{nome:<12} {tempo * 1000:9.1f} ms   {memoria}   {caracteres} caracteres")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_matriz.py
+
+"""
+Avalia uma carteira sintética em lote (core/rule_matrix.py), confere que os
+scores da matriz batem com avaliar_regras contrato a contrato e mede quanto
+custa recalcular a carteira inteira com outros pesos.
+
+Uso (a partir de backend/):
+    python benchmarks/bench_matriz.py --contratos 1000 --paginas 5
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from bench_regras import gerar_texto  # noqa: E402
+from core.rule_engine import avaliar_regras, obter_regras  # noqa: E402
+from core.rule_matrix import avaliar_lote  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contratos", type=int, default=1000)
+    parser.add_argument("--paginas", type=int, default=5)
+    parser.add_argument("--cenarios", type=int, default=100, help="cenários de pesos recalculados")
+    args = parser.parse_args()
+
+    conjunto = obter_regras()
+    textos = {f"contrato-{i}": gerar_texto(args.paginas, semente=i) for i in range(args.contratos)}
+
+    inicio = time.perf_counter()
+    matriz = avaliar_lote(textos, conjunto)
+    tempo_lote = time.perf_counter() - inicio
+    print(f"Lote: {args.contratos} contratos x {len(matriz.regras)} regras em {tempo_lote:.1f} s "
+          f"({tempo_lote / args.contratos * 1000:.1f} ms/contrato)")
+
+    # Os scores da matriz precisam ser os mesmos de avaliar_regras
+    amostra = list(textos.items())[:50]
+    scores = matriz.scores()
+    for linha, (_, texto) in enumerate(amostra):
+        if scores[linha] != avaliar_regras(texto, conjunto)["score"]:
+            print(f"ERRO: score diferente no contrato {linha}")
+            sys.exit(1)
+
+    aleatorio = random.Random(7)
+    cenarios = [{regra_id: aleatorio.randint(0, 60) for regra_id in matriz.regras} for _ in range(args.cenarios)]
+    inicio = time.perf_counter()
+    for pesos in cenarios:
+        novos_scores, niveis = matriz.reclassificar(pesos)
+    tempo_cenarios = time.perf_counter() - inicio
+    print(f"Recalcular com novos pesos: {tempo_cenarios / args.cenarios * 1000:.2f} ms por cenário "
+          f"(refazer as regex: ~{tempo_lote:.1f} s)")
+    print(f"Distribuição do último cenário: "
+          f"{dict(zip(*np.unique(niveis, return_counts=True)))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/bench_regras.py
+
+"""
+Compara a avaliação das regras de risco varrendo o texto inteiro a cada
+padrão com o pré-filtro por âncoras (core/prefilter.py), num contrato
+sintético grande, e confere que os resultados são idênticos. Mede também o
+modo com escopo por cláusula (janelas limitadas dentro de cada cláusula).
+
+Uso (a partir de backend/):
+    python benchmarks/bench_regras.py --paginas 100
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from core import prefilter  # noqa: E402
+from core.normalizer import normalizar_texto  # noqa: E402
+from core.rule_engine import avaliar_regras, obter_regras  # noqa: E402
+
+# Texto comum de contrato: a maioria das linhas não contém nenhuma âncora
+PARAGRAFOS = [
+    "As partes acima qualificadas têm entre si justo e contratado o presente instrumento particular,",
+    "que se regerá pelas cláusulas e condições a seguir descritas e pela legislação aplicável.",
+    "O imóvel objeto deste contrato destina-se exclusivamente ao uso comercial descrito no preâmbulo.",
+    "Os pagamentos serão efetuados até o quinto dia útil de cada mês, mediante boleto bancário.",
+    "Qualquer tolerância das partes não importará novação ou renúncia aos direitos aqui previstos.",
+    "As notificações entre as partes deverão ser feitas por escrito, com comprovante de recebimento.",
+    "O presente contrato obriga as partes, seus herdeiros e sucessores a qualquer título.",
+]
+CLAUSULAS = [
+    "CLÁUSULA {n} - O prazo de locação é de 3 anos, contados da assinatura.",
+    "CLÁUSULA {n} - Fica estipulada multa rescisória de 12 meses de aluguel em caso de rescisão antecipada.",
+    "CLÁUSULA {n} - Em caso de atraso incidirá multa de mora de 20% e juros de 2% ao mês.",
+    "CLÁUSULA {n} - As benfeitorias realizadas ficarão sem indenização ao locatário.",
+    "CLÁUSULA {n} - Horário de funcionamento das 8 às 20 horas.",
+    "CLÁUSULA {n} - É proibida a sublocação total ou parcial do imóvel.",
+    "CLÁUSULA {n} - O locatário será responsável pelo pagamento do IPTU.",
+    "CLÁUSULA {n} - A carga elétrica disponível é de 30 kVA.",
+    "CLÁUSULA {n} - O locatário prestará caução de 6 aluguéis e apresentará fiador idôneo.",
+    "CLÁUSULA {n} - Fica eleito o foro da comarca de Campinas.",
+]
+
+# Frases com o resultado esperado de uma regra (falsos positivos/negativos já corrigidos)
+REGRESSOES = [
+    ("O funcionamento observará a cláusula 8, e as partes acordam o prazo de 12 meses.", "restricao_horario", False),
+    ("Horário de funcionamento das 8 às 20 horas.", "restricao_horario", True),
+    ("Fica eleito o foro da comarca de Manaus", "foro_distante", True),
+    # Qualquer comarca fora de São Paulo/Rio de Janeiro conta (+8 no score), inclusive no interior
+    ("Fica eleito o foro da comarca de Campinas.", "foro_distante", True),
+    ("Fica eleito o foro da comarca do Rio de Janeiro/RJ.", "foro_distante", False),
+    ("Fica eleito o foro da comarca de São Paulo, Estado de São Paulo.", "foro_distante", False),
+]
+
+
+def gerar_texto(paginas: int, linhas_por_pagina: int = 45, semente: int = 42) -> str:
+    """Contrato sintético: parágrafos genéricos com cláusulas de risco espalhadas."""
+    aleatorio = random.Random(semente)
+    linhas = []
+    numero = 1
+    for _ in range(paginas):
+        for _ in range(linhas_por_pagina):
+            if aleatorio.random() < 0.05:
+                linhas.append(aleatorio.choice(CLAUSULAS).format(n=numero))
+                numero += 1
+            else:
+                linhas.append(aleatorio.choice(PARAGRAFOS))
+    return "\n".join(linhas)
+
+
+def medir(funcao, repeticoes: int):
+    """(melhor tempo em s, último resultado)."""
+    melhor = float("inf")
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paginas", type=int, default=100)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    texto = gerar_texto(args.paginas)
+    conjunto = obter_regras()
+    print(f"Texto: {args.paginas} páginas, {len(texto)} caracteres; {len(conjunto.regras)} regras, "
+          f"{len(conjunto.buscador.ancoras)} âncoras")
+    print(f"Aho-Corasick (pyahocorasick): {'sim' if prefilter.AHOCORASICK_DISPONIVEL else 'não (regex combinada)'}")
+
+    tempo_normalizacao, normalizado = medir(lambda: normalizar_texto(texto), args.repeticoes)
+    tempo_completo, completo = medir(
+        lambda: avaliar_regras(normalizado, conjunto, usar_prefiltro=False, escopo_clausula=False), args.repeticoes)
+    tempo_filtrado, filtrado = medir(
+        lambda: avaliar_regras(normalizado, conjunto, usar_prefiltro=True, escopo_clausula=False), args.repeticoes)
+    tempo_clausula, por_clausula = medir(
+        lambda: avaliar_regras(normalizado, conjunto, usar_prefiltro=True, escopo_clausula=True), args.repeticoes)
+
+    print(f"normalização          {tempo_normalizacao * 1000:9.1f} ms")
+    print(f"regras (texto todo)   {tempo_completo * 1000:9.1f} ms")
+    print(f"regras (pré-filtro)   {tempo_filtrado * 1000:9.1f} ms   ({tempo_completo / tempo_filtrado:.1f}x)")
+    print(f"regras (por cláusula) {tempo_clausula * 1000:9.1f} ms   ({tempo_completo / tempo_clausula:.1f}x), "
+          f"score {por_clausula['score']}, {por_clausula['total_clausulas_problematicas']} pontos de atenção")
+
+    # O resultado precisa ser exatamente o mesmo
+    if completo["pontos_atencao"] != filtrado["pontos_atencao"] or completo["score"] != filtrado["score"]:
+        print("ERRO: resultados diferentes com e sem pré-filtro")
+        sys.exit(1)
+    print(f"Resultados idênticos: score {filtrado['score']}, {filtrado['total_clausulas_problematicas']} pontos de atenção")
+
+    for frase, regra, esperado in REGRESSOES:
+        normalizada = normalizar_texto(frase)
+        for usar_prefiltro in (False, True):
+            resultado = avaliar_regras(normalizada, conjunto, usar_prefiltro=usar_prefiltro, escopo_clausula=False)
+            if any(ponto["regra"] == regra for ponto in resultado["pontos_atencao"]) != esperado:
+                print(f"ERRO: regra {regra} {'não ' if esperado else ''}disparou em: {frase}")
+                sys.exit(1)
+    print(f"Regressões: {len(REGRESSOES)} frases conferidas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/bench_texto.py
+
+"""
+Latência de POST /analisar/texto (só regras, sem IA nem cache) com a API
+completa em processo (pools iniciados como no servidor), num contrato
+sintético; e o lote POST /analisar/texto/lote contra o mesmo número de
+chamadas individuais.
+
+Uso (a partir de backend/):
+    python benchmarks/bench_texto.py --paginas 10 --requisicoes 300 --lote 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+# Banco descartável e sem tarefas de fundo: só a rota medida ocupa os pools
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+os.environ.setdefault("JOBS_HABILITADO", "false")
+os.environ.setdefault("REGRAS_REPROCESSAR", "false")
+
+from bench_regras import gerar_texto  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+
+def percentil(valores, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paginas", type=int, default=10, help="páginas do contrato sintético")
+    parser.add_argument("--requisicoes", type=int, default=300)
+    parser.add_argument("--lote", type=int, default=200, help="textos no teste do lote")
+    args = parser.parse_args()
+
+    texto = gerar_texto(args.paginas)
+    with TestClient(main.app) as cliente:
+        for _ in range(10):  # aquecimento (processos do pool, caches de regex)
+            cliente.post("/analisar/texto", json={"texto": texto})
+
+        tempos = []
+        for _ in range(args.requisicoes):
+            inicio = time.perf_counter()
+            resposta = cliente.post("/analisar/texto", content=texto.encode("utf-8"), headers={"content-type": "text/plain"})
+            tempos.append((time.perf_counter() - inicio) * 1000)
+            assert resposta.status_code == 200, resposta.text
+        print(f"/analisar/texto, contrato de {args.paginas} páginas ({len(texto) / 1024:.0f} KB), {args.requisicoes} requisições:")
+        print(f"  p50 {statistics.median(tempos):6.1f} ms   p95 {percentil(tempos, 95):6.1f} ms   "
+              f"p99 {percentil(tempos, 99):6.1f} ms   máx {max(tempos):6.1f} ms")
+
+        textos = [gerar_texto(args.paginas, semente=i) for i in range(args.lote)]
+        inicio = time.perf_counter()
+        for t in textos:
+            cliente.post("/analisar/texto", json={"texto": t})
+        individual = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        resposta = cliente.post("/analisar/texto/lote", json={"textos": textos})
+        lote = time.perf_counter() - inicio
+        assert resposta.status_code == 200 and len(resposta.json()["resultados"]) == args.lote, resposta.text
+        print(f"{args.lote} textos: individual {individual:6.2f} s   lote {lote:6.2f} s   ({individual / lote:.1f}x)")
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,179 @@
+# benchmarks/bench_upload.py
+
+"""
+Mede o pico de memória (RSS máximo do processo) da recepção de uploads
+grandes e simultâneos em dois modos, sem rodar a análise:
+
+- antigo: UploadFile do FastAPI + `await file.read()` + sha256 do conteúdo;
+- streaming: core/upload.receber_upload (hash incremental, buffer limitado
+  e transbordo para disco).
+
+O corpo multipart é gerado em blocos direto no `receive` do ASGI, então o
+cliente não guarda o arquivo em memória; cada modo roda num subprocesso
+para que um não herde o pico do outro. Mede também quantos bytes do corpo
+cada modo lê antes de recusar um arquivo acima de MAX_UPLOAD_MB.
+
+Uso (a partir de backend/):
+    python benchmarks/bench_upload.py --uploads 8 --mb 40
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from core.pipeline import ErroAnalise, limite_upload_mb  # noqa: E402
+from core.upload import receber_upload  # noqa: E402
+
+BLOCO = 64 * 1024
+DELIMITADOR = b"limite-bench"
+
+app = FastAPI()
+
+
+@app.exception_handler(ErroAnalise)
+async def _erro(request: Request, exc: ErroAnalise):
+    return JSONResponse(status_code=exc.status, content={"detail": exc.detalhe})
+
+
+@app.post("/antigo")
+async def antigo(file: UploadFile = File(...)):
+    conteudo = await file.read()
+    if len(conteudo) > int(limite_upload_mb() * 1024 * 1024):
+        raise HTTPException(status_code=413, detail="Arquivo excede o limite.")
+    return {"hash": hashlib.sha256(conteudo).hexdigest(), "tamanho": len(conteudo)}
+
+
+@app.post("/streaming")
+async def streaming(request: Request):
+    arquivo = await receber_upload(request)
+    try:
+        return {"hash": arquivo.hash, "tamanho": arquivo.tamanho}
+    finally:
+        arquivo.descartar()
+
+
+async def enviar(caminho: str, tamanho: int, anunciar_tamanho: bool = True):
+    """Envia um upload sintético de `tamanho` bytes; devolve (status, bytes do corpo lidos pela app)."""
+    inicio = (
+        b"--" + DELIMITADOR + b"\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="contrato.pdf"\r\n'
+        b"Content-Type: application/pdf\r\n\r\n"
+    )
+    fim = b"\r\n--" + DELIMITADOR + b"--\r\n"
+    total = len(inicio) + tamanho + len(fim)
+
+    def blocos():
+        yield inicio
+        enviados = 0
+        while enviados < tamanho:
+            parte = min(BLOCO, tamanho - enviados)
+            yield os.urandom(16) * (parte // 16) + b"x" * (parte % 16)
+            enviados += parte
+        yield fim
+
+    gerador = blocos()
+    lidos = 0
+    status = None
+
+    async def receive():
+        nonlocal lidos
+        bloco = next(gerador, None)
+        if bloco is None:
+            return {"type": "http.request", "body": b"", "more_body": False}
+        lidos += len(bloco)
+        await asyncio.sleep(0)  # outros uploads avançam entre os blocos
+        return {"type": "http.request", "body": bloco, "more_body": True}
+
+    async def send(mensagem):
+        nonlocal status
+        if mensagem["type"] == "http.response.start":
+            status = mensagem["status"]
+
+    escopo = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": caminho, "raw_path": caminho.encode(), "query_string": b"",
+        "root_path": "", "server": ("bench", 80), "client": ("bench", 1),
+        "headers": [(b"content-type", b"multipart/form-data; boundary=" + DELIMITADOR)],
+    }
+    if anunciar_tamanho:
+        escopo["headers"].append((b"content-length", str(total).encode()))
+    await app(escopo, receive, send)
+    return status, lidos
+
+
+def _rss_maximo() -> int:
+    """RSS máximo do processo até agora, em bytes (ru_maxrss vem em KB no Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def medir(caminho: str, uploads: int, tamanho: int) -> dict:
+    """Roda os uploads simultâneos neste processo e devolve o acréscimo de RSS máximo."""
+    base = _rss_maximo()
+
+    async def todos():
+        return await asyncio.gather(*(enviar(caminho, tamanho) for _ in range(uploads)))
+
+    inicio = time.perf_counter()
+    resultados = asyncio.run(todos())
+    return {
+        "pico": _rss_maximo() - base,
+        "tempo": time.perf_counter() - inicio,
+        "status": sorted({status for status, _ in resultados}),
+    }
+
+
+def medir_em_subprocesso(caminho: str, uploads: int, mb: float) -> dict:
+    saida = subprocess.run(
+        [sys.executable, __file__, "--medir", caminho, "--uploads", str(uploads), "--mb", str(mb)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=8, help="uploads simultâneos")
+    parser.add_argument("--mb", type=float, default=40, help="tamanho de cada arquivo (MB)")
+    parser.add_argument("--limite-mb", type=float, default=15, help="MAX_UPLOAD_MB no teste de recusa")
+    parser.add_argument("--medir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    tamanho = int(args.mb * 1024 * 1024)
+
+    # Recepção: limite acima do arquivo para todos serem aceitos
+    os.environ["MAX_UPLOAD_MB"] = str(args.mb * 2)
+    if args.medir:
+        print(json.dumps(medir(args.medir, args.uploads, tamanho)))
+        return
+
+    print(f"{args.uploads} uploads simultâneos de {args.mb:.0f} MB "
+          f"(buffer em memória: {os.getenv('UPLOAD_MEMORIA_KB', '1024')} KB)")
+    for caminho in ("/antigo", "/streaming"):
+        medida = medir_em_subprocesso(caminho, args.uploads, args.mb)
+        print(f"  {caminho[1:]:<10} pico de RSS +{medida['pico'] / 2**20:7.1f} MB "
+              f"({medida['pico'] / args.uploads / 2**20:6.1f} MB/upload)  {medida['tempo']:5.1f} s  status {medida['status']}")
+
+    # Recusa: quanto do corpo é lido antes do 413, com e sem Content-Length (chunked)
+    os.environ["MAX_UPLOAD_MB"] = str(args.limite_mb)
+    print(f"Arquivo de {args.mb:.0f} MB com MAX_UPLOAD_MB={args.limite_mb:.0f}:")
+    for caminho in ("/antigo", "/streaming"):
+        for anunciar in (True, False):
+            inicio = time.perf_counter()
+            status, lidos = asyncio.run(enviar(caminho, tamanho, anunciar))
+            print(f"  {caminho[1:]:<10} {'content-length' if anunciar else 'chunked':<15} status {status}"
+                  f"  corpo lido {lidos / 2**20:6.1f} MB  {(time.perf_counter() - inicio) * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/fuzz_regras.py
+
+"""
+Corpus de entradas adversariais para o motor de regras: textos feitos para
+provocar backtracking (palavras-âncora repetidas sem o termo que fecha o
+padrão, linhas enormes, muitos cabeçalhos de cláusula) e uma regra
+catastrófica de propósito. Confere que o pior tempo por documento fica
+dentro do orçamento (REGRAS_ORCAMENTO_DOCUMENTO_MS) e que as regras que
+estouram aparecem em `regras_interrompidas`.
+
+Uso (a partir de backend/):
+    python benchmarks/fuzz_regras.py --casos 200
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from core import regex_budget  # noqa: E402
+from core.normalizer import normalizar_texto  # noqa: E402
+from core.rule_engine import _config_orcamento, avaliar_regras, carregar_regras, obter_regras  # noqa: E402
+
+# Começos de padrões das regras sem o complemento: cada um força o '.*' a varrer até o fim
+FRAGMENTOS = [
+    "não permitido ", "proibida ", "carga ", "renuncia ", "direito ", "multa ", "meses ",
+    "aluguel ", "benfeitorias ", "indenização ", "prazo ", "anos ", "foro ", "comarca ",
+    "horário ", "das ", "às ", "seguro ", "vistoria ", "aviso prévio ", "dias ", "% ",
+]
+
+REGRA_CATASTROFICA = """
+  - id: fuzz_catastrofica
+    type: regex_match
+    pattern: '(x+x+)+y'
+    risk_score: 1
+    level: BAIXO
+    category: Fuzz
+"""
+
+
+def gerar_caso(aleatorio: random.Random, catastrofico: bool) -> str:
+    tipo = aleatorio.randrange(5 if catastrofico else 4)
+    if tipo == 0:   # linha única enorme só com fragmentos
+        return "".join(aleatorio.choice(FRAGMENTOS) for _ in range(aleatorio.randint(2000, 20000)))
+    if tipo == 1:   # muitas linhas curtas com fragmentos
+        return "\n".join(
+            " ".join(aleatorio.choice(FRAGMENTOS) for _ in range(aleatorio.randint(1, 12)))
+            for _ in range(aleatorio.randint(500, 5000))
+        )
+    if tipo == 2:   # um cabeçalho de cláusula por linha
+        return "\n".join(f"CLÁUSULA {i}ª - {aleatorio.choice(FRAGMENTOS)}" for i in range(aleatorio.randint(500, 3000)))
+    if tipo == 3:   # espaços, quebras e números em excesso
+        return "".join(aleatorio.choice([" ", "\n", "\t", "1", "12", " meses", " anos", "%"]) for _ in range(100000))
+    # texto que a regra catastrófica adora
+    return "x" * aleatorio.randint(30, 5000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--casos", type=int, default=100)
+    parser.add_argument("--semente", type=int, default=1)
+    args = parser.parse_args()
+
+    limite_regra, limite_documento = _config_orcamento()
+    if limite_documento is None:
+        print("REGRAS_ORCAMENTO_DOCUMENTO_MS=0: sem orçamento para conferir")
+        sys.exit(1)
+    print(f"Orçamento: {limite_regra} s por regra, {limite_documento} s por documento; "
+          f"módulo regex: {'sim' if regex_budget.REGEX_DISPONIVEL else 'não (prazo conferido entre buscas)'}")
+
+    # Sem o módulo regex uma única busca não pode ser interrompida: só o modo com janelas
+    # limitadas (pré-filtro + escopo por cláusula) é conferido, e sem a regra catastrófica
+    catastrofico = regex_budget.REGEX_DISPONIVEL
+    modos = ((True, True), (False, False)) if catastrofico else ((True, True),)
+    base = Path(obter_regras().caminho).read_text(encoding="utf-8")
+    with tempfile.NamedTemporaryFile("w", suffix=".yaml", encoding="utf-8", delete=False) as arquivo:
+        arquivo.write(base.rstrip() + "\n" + (REGRA_CATASTROFICA if catastrofico else ""))
+    conjunto = carregar_regras(arquivo.name)
+    Path(arquivo.name).unlink()
+
+    aleatorio = random.Random(args.semente)
+    pior, interrompidas, falhas = 0.0, 0, 0
+    for caso in range(args.casos):
+        normalizado = normalizar_texto(gerar_caso(aleatorio, catastrofico))
+        for prefiltro, escopo in modos:
+            inicio = time.perf_counter()
+            resultado = avaliar_regras(normalizado, conjunto, usar_prefiltro=prefiltro, escopo_clausula=escopo)
+            tempo = time.perf_counter() - inicio
+            pior = max(pior, tempo)
+            interrompidas += len(resultado["regras_interrompidas"])
+            # O orçamento já inclui segmentação, âncoras e montagem dos pontos: sem folga
+            if tempo > limite_documento:
+                falhas += 1
+                print(f"caso {caso} (prefiltro={prefiltro}): {tempo * 1000:.0f} ms, {len(normalizado.texto)} caracteres")
+
+    print(f"{args.casos} casos: pior tempo {pior * 1000:.0f} ms ({(limite_documento - pior) * 1000:.0f} ms abaixo do "
+          f"orçamento), {interrompidas} regras interrompidas")
+    if falhas:
+        print(f"ERRO: {falhas} avaliações passaram do orçamento")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
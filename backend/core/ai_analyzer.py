@@ -1,4 +1,6 @@
 import os
+from typing import Iterator
+
 import google.generativeai as genai
 from dotenv import load_dotenv
 
@@ -94,4 +96,20 @@ def analisar_contrato_com_ia(texto: str) -> str:
         import traceback
         erro_detalhado = traceback.format_exc()
         print(f"ERRO GEMINI: {erro_detalhado}")
-        return f"❌ **Erro na análise com Gemini:** {str(e)}"
\ No newline at end of file
+        return f"❌ **Erro na análise com Gemini:** {str(e)}"
+
+def analisar_contrato_com_ia_stream(texto: str) -> Iterator[str]:
+    """Mesma análise de `analisar_contrato_com_ia`, devolvida em trechos conforme o Gemini gera."""
+    if not configurar_api_gemini():
+        yield "❌ **Erro:** A chave da API do Gemini não foi configurada."
+        return
+    try:
+        model = genai.GenerativeModel("gemini-2.5-flash")
+        for parte in model.generate_content(PROMPT_IA.format(texto=texto), stream=True):
+            if parte.text:
+                yield parte.text
+    except Exception as e:
+        import traceback
+        erro_detalhado = traceback.format_exc()
+        print(f"ERRO GEMINI: {erro_detalhado}")
+        yield f"\n\n❌ **Erro na análise com Gemini:** {str(e)}"
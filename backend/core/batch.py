@@ -0,0 +1,272 @@
+# core/batch.py
+
+"""
+Análise em lote (POST /analisar/lote): vários arquivos no mesmo formulário
+ou um .zip com os contratos. Arquivos com o mesmo SHA-256 dentro do lote
+são analisados uma única vez. Um número fixo de tarefas do lote puxa os
+contratos da lista, então o lote nunca ocupa os pools (banco inclusive)
+com mais que esse número de análises; dentro delas, dois limites próprios
+— um para extração e regras, outro (menor) para a IA. O resultado sai como
+uma linha NDJSON assim que fica pronto, na ordem de conclusão; a última
+linha traz o resumo.
+"""
+
+import asyncio
+import io
+import json
+import logging
+import os
+import time
+import zipfile
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from core.pipeline import ErroAnalise, analisar_conteudo, extensoes_permitidas, limite_upload_mb
+from core.rule_rescore import reprocessador_regras
+from core.upload import ArquivoRecebido
+from core.workers import PoolSaturado, pool_cpu
+
+# Tentativas de um contrato do lote quando os pools estão cheios
+TENTATIVAS_POOL = 5
+
+
+def config_lote() -> Dict:
+    """Lê do ambiente: máximo de arquivos, tamanho total (bytes) e concorrência de CPU e de IA."""
+    valores = {}
+    for chave, variavel, padrao in (
+        ("max_arquivos", "LOTE_MAX_ARQUIVOS", 300),
+        ("max_mb", "LOTE_MAX_MB", 1024),
+        ("concorrencia", "LOTE_CONCORRENCIA", pool_cpu.workers),
+        ("concorrencia_ia", "LOTE_CONCORRENCIA_IA", 2),
+    ):
+        try:
+            valores[chave] = max(1, int(os.getenv(variavel, str(padrao))))
+        except ValueError:
+            valores[chave] = padrao
+    valores["max_bytes"] = valores.pop("max_mb") * 1024 * 1024
+    return valores
+
+
+class ItemLote:
+    """Um contrato do lote: arquivo recebido ou o erro que o impediu de entrar."""
+
+    __slots__ = ("indice", "nome", "arquivo", "erro")
+
+    def __init__(self, indice: int, nome: str, arquivo: Optional[ArquivoRecebido] = None,
+                 erro: Optional[ErroAnalise] = None):
+        self.indice = indice
+        self.nome = nome
+        self.arquivo = arquivo
+        self.erro = erro
+
+
+class LoteExcedido(ErroAnalise):
+    """O lote todo passou de um limite (arquivos ou bytes): recusa o envio, não só um contrato."""
+
+
+class _CotaLote:
+    """Quanto ainda cabe no lote enquanto os arquivos e .zip são expandidos."""
+
+    __slots__ = ("maximo_arquivos", "maximo_bytes", "arquivos", "bytes")
+
+    def __init__(self, maximo_arquivos: int, maximo_bytes: int):
+        self.maximo_arquivos = maximo_arquivos
+        self.maximo_bytes = maximo_bytes
+        self.arquivos = 0
+        self.bytes = 0
+
+    def reservar_arquivos(self, quantidade: int):
+        if self.arquivos + quantidade > self.maximo_arquivos:
+            raise LoteExcedido(400, f"Envie no máximo {self.maximo_arquivos} arquivos por vez.")
+        self.arquivos += quantidade
+
+    def reservar_bytes(self, quantidade: int):
+        if self.bytes + quantidade > self.maximo_bytes:
+            raise LoteExcedido(413, f"O lote descompactado excede o limite de {self.maximo_bytes // (1024 * 1024)}MB.")
+        self.bytes += quantidade
+
+
+def _extrair_membro(compactado: zipfile.ZipFile, info: zipfile.ZipInfo, limite_bytes: int, cota: _CotaLote) -> ArquivoRecebido:
+    """
+    Descompacta um membro para disco, parando no limite do arquivo ou do lote
+    (o tamanho declarado no .zip pode mentir).
+    """
+    arquivo = ArquivoRecebido(info.filename, 0)
+    try:
+        with compactado.open(info) as origem:
+            for bloco in iter(lambda: origem.read(1024 * 1024), b""):
+                if arquivo.tamanho + len(bloco) > limite_bytes:
+                    raise ErroAnalise(413, f"Arquivo excede o limite de {int(limite_upload_mb())}MB.")
+                cota.reservar_bytes(len(bloco))
+                arquivo.escrever(bloco)
+    except BaseException:
+        arquivo.descartar()
+        raise
+    arquivo.finalizar()
+    return arquivo
+
+
+def _eh_contrato(info: zipfile.ZipInfo) -> bool:
+    # Pastas e metadados de sistema (ex.: __MACOSX, ._arquivo) não são contratos
+    nome_base = os.path.basename(info.filename)
+    return not (info.is_dir() or not nome_base or nome_base.startswith(".") or info.filename.startswith("__MACOSX/"))
+
+
+def _membros_zip(arquivo: ArquivoRecebido, limite_bytes: int, cota: _CotaLote) -> List[ItemLote]:
+    """Contratos de um .zip; a contagem de membros é conferida com a cota antes de descompactar qualquer um."""
+    itens: List[ItemLote] = []
+    extensoes = extensoes_permitidas()
+    try:
+        with zipfile.ZipFile(arquivo.caminho if arquivo.em_disco() else io.BytesIO(arquivo.ler())) as compactado:
+            membros = [info for info in compactado.infolist() if _eh_contrato(info)]
+            cota.reservar_arquivos(len(membros))
+            for info in membros:
+                if os.path.basename(info.filename).split(".")[-1].lower() not in extensoes:
+                    itens.append(ItemLote(0, info.filename, erro=ErroAnalise(400, "Formato de arquivo não suportado. Use PDF ou DOCX.")))
+                elif info.file_size > limite_bytes:
+                    itens.append(ItemLote(0, info.filename, erro=ErroAnalise(413, f"Arquivo excede o limite de {int(limite_upload_mb())}MB.")))
+                else:
+                    try:
+                        itens.append(ItemLote(0, info.filename, _extrair_membro(compactado, info, limite_bytes, cota)))
+                    except LoteExcedido:
+                        raise
+                    except ErroAnalise as e:
+                        itens.append(ItemLote(0, info.filename, erro=e))
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, NotImplementedError, RuntimeError):
+        # RuntimeError: membro protegido por senha; NotImplementedError: compressão não suportada
+        descartar_itens(itens)
+        return [ItemLote(0, arquivo.nome, erro=ErroAnalise(400, "Arquivo .zip inválido ou não suportado."))]
+    except BaseException:
+        descartar_itens(itens)
+        raise
+    return itens
+
+
+def expandir_arquivos(arquivos: List[ArquivoRecebido], maximo_arquivos: int, maximo_bytes: int) -> List[ItemLote]:
+    """
+    Lista de contratos do lote: os arquivos enviados e o conteúdo dos .zip
+    (descartados depois de abertos). O total de contratos e de bytes já
+    descompactados fica dentro de `maximo_arquivos` e `maximo_bytes`, o que
+    barra .zip que se expandem muito além do enviado. Roda fora do event loop.
+    """
+    limite_bytes = int(limite_upload_mb() * 1024 * 1024)
+    cota = _CotaLote(maximo_arquivos, maximo_bytes)
+    itens: List[ItemLote] = []
+    try:
+        for arquivo in arquivos:
+            if arquivo.nome.lower().endswith(".zip"):
+                itens.extend(_membros_zip(arquivo, limite_bytes, cota))
+                arquivo.descartar()
+            else:
+                cota.reservar_arquivos(1)
+                cota.reservar_bytes(arquivo.tamanho)
+                itens.append(ItemLote(0, arquivo.nome, arquivo))
+    except BaseException:
+        descartar_itens(itens)
+        for arquivo in arquivos:
+            arquivo.descartar()
+        raise
+    if not itens:
+        raise ErroAnalise(400, "Nenhum contrato encontrado no envio.")
+    for indice, item in enumerate(itens):
+        item.indice = indice
+    return itens
+
+
+def descartar_itens(itens: List[ItemLote]):
+    for item in itens:
+        if item.arquivo is not None:
+            item.arquivo.descartar()
+
+
+def _linha(dados: Dict) -> str:
+    return json.dumps(dados, ensure_ascii=False) + "\n"
+
+
+def _linha_erro(item: ItemLote, hash_arquivo: Optional[str], status: int, detalhe: str) -> Dict:
+    return {"indice": item.indice, "nomeArquivo": item.nome, "sha256": hash_arquivo, "status": status, "erro": detalhe}
+
+
+async def _analisar_item(item: ItemLote, force_ai: bool, limites: Dict[str, asyncio.Semaphore]) -> Dict:
+    """Resultado (linha NDJSON, sem o índice das duplicatas) de um contrato do lote."""
+    arquivo = item.arquivo
+    for tentativa in range(TENTATIVAS_POOL):
+        try:
+            resultado = await analisar_conteudo(
+                arquivo.fonte(), item.nome, force_ai, hash_arquivo=arquivo.hash, limites=limites,
+            )
+            return {"indice": item.indice, "nomeArquivo": item.nome, "sha256": arquivo.hash, "status": 200, "resultado": resultado}
+        except ErroAnalise as e:
+            return _linha_erro(item, arquivo.hash, e.status, e.detalhe)
+        except PoolSaturado as e:
+            # Pools cheios (ex.: tráfego interativo): espera e tenta de novo
+            if tentativa == TENTATIVAS_POOL - 1:
+                return _linha_erro(item, arquivo.hash, e.status, e.mensagem)
+            await asyncio.sleep(e.retry_after)
+        except Exception:
+            logging.exception("Erro inesperado no lote (%s)", item.nome)
+            return _linha_erro(item, arquivo.hash, 500, "Erro interno do servidor.")
+
+
+async def _consumir_itens(pendentes: Iterator[ItemLote], concluidos: asyncio.Queue, force_ai: bool,
+                         limites: Dict[str, asyncio.Semaphore]):
+    """Uma das tarefas do lote: analisa os contratos de `pendentes` (compartilhado) um de cada vez."""
+    for item in pendentes:
+        await concluidos.put((item, await _analisar_item(item, force_ai, limites)))
+
+
+def _linha_duplicata(linha: Dict, duplicata: ItemLote, original: ItemLote) -> Dict:
+    copia = {**linha, "indice": duplicata.indice, "nomeArquivo": duplicata.nome, "duplicataDe": original.indice}
+    if "resultado" in linha:
+        copia["resultado"] = {**linha["resultado"], "nomeArquivo": duplicata.nome}
+    return copia
+
+
+async def analisar_lote(itens: List[ItemLote], force_ai: bool = False) -> AsyncIterator[str]:
+    """Gera as linhas NDJSON do lote: uma por contrato, na ordem de conclusão, e o resumo no fim."""
+    config = config_lote()
+    limites = {
+        "cpu": asyncio.Semaphore(config["concorrencia"]),
+        "ia": asyncio.Semaphore(config["concorrencia_ia"]),
+    }
+    inicio = time.perf_counter()
+    contagem = {"total": len(itens), "analisados": 0, "duplicados": 0, "erros": 0}
+
+    # Deduplicação por SHA-256: só o primeiro arquivo de cada hash é analisado
+    originais: Dict[str, ItemLote] = {}
+    duplicatas: Dict[int, List[ItemLote]] = {}
+    tarefas: List[asyncio.Task] = []
+    reprocessador_regras.inicio_requisicao()
+    try:
+        for item in itens:
+            if item.erro is not None:
+                contagem["erros"] += 1
+                yield _linha(_linha_erro(item, None, item.erro.status, item.erro.detalhe))
+                continue
+            original = originais.get(item.arquivo.hash)
+            if original is not None:
+                duplicatas.setdefault(original.indice, []).append(item)
+                continue
+            originais[item.arquivo.hash] = item
+
+        # Tarefas suficientes para ocupar as vagas de CPU e de IA ao mesmo tempo, e não mais
+        concluidos: asyncio.Queue = asyncio.Queue()
+        pendentes = iter(list(originais.values()))
+        for _ in range(min(len(originais), config["concorrencia"] + config["concorrencia_ia"])):
+            tarefas.append(asyncio.create_task(_consumir_itens(pendentes, concluidos, force_ai, limites)))
+
+        for _ in range(len(originais)):
+            item, linha = await concluidos.get()
+            contagem["analisados" if linha["status"] == 200 else "erros"] += 1
+            item.arquivo.descartar()
+            yield _linha(linha)
+            for duplicata in duplicatas.get(item.indice, []):
+                contagem["duplicados"] += 1
+                yield _linha(_linha_duplicata(linha, duplicata, item))
+        contagem["tempo_s"] = round(time.perf_counter() - inicio, 3)
+        yield _linha({"resumo": contagem})
+    finally:
+        # Cliente desconectou no meio: cancela o que falta e apaga os temporários
+        for tarefa in tarefas:
+            tarefa.cancel()
+        descartar_itens(itens)
+        reprocessador_regras.fim_requisicao()
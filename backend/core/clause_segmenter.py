@@ -0,0 +1,127 @@
+# core/clause_segmenter.py
+
+"""
+Segmentação do contrato em cláusulas, parágrafos (§) e itens, sobre o texto
+normalizado. As regras rodam dentro de cada segmento, e cada ponto de atenção
+informa a cláusula em que foi encontrado.
+"""
+
+import re
+from typing import List, Optional
+
+from core.normalizer import TextoNormalizado
+
+# "CLÁUSULA 3ª -", "CLÁUSULA DÉCIMA SEGUNDA:", "Cláusula 10." (após normalização)
+_CLAUSULA = re.compile(r"clausula\s+(?:(\d{1,3})\s*[ao]?|((?:[a-z]+\s*){1,3}?))\s*(?:[-–—:.]|$)")
+# "§ 1º", "§2o", "Parágrafo Único -", "Parágrafo Primeiro:"
+_PARAGRAFO = re.compile(r"§\s*(\d{1,2})|paragrafo\s+([a-z]+)\s*[-–—:.]")
+# "a) ", "iv) ", "2.1 ", "2.1.3. "
+_ITEM = re.compile(r"([a-z]|[ivx]{1,4})\)\s|(\d{1,2}(?:\.\d{1,2})+)\.?\s")
+# Linhas que podem abrir um segmento (evita testar as três regex em toda linha)
+# ("\n" literal no início deixa a busca bem mais rápida que "^" com MULTILINE)
+_CANDIDATA = re.compile(r"\n ?(?:clausula|§|paragrafo|[a-z]\)|[ivx]{1,4}\)|\d{1,2}\.\d)")
+
+_UNIDADES = {
+    "unica": 1, "unico": 1,
+    "primeira": 1, "segunda": 2, "terceira": 3, "quarta": 4, "quinta": 5,
+    "sexta": 6, "setima": 7, "oitava": 8, "nona": 9,
+    "primeiro": 1, "segundo": 2, "terceiro": 3, "quarto": 4, "quinto": 5,
+    "sexto": 6, "setimo": 7, "oitavo": 8, "nono": 9,
+}
+_DEZENAS = {
+    "decima": 10, "vigesima": 20, "trigesima": 30, "quadragesima": 40, "quinquagesima": 50,
+    "decimo": 10, "vigesimo": 20, "trigesimo": 30, "quadragesimo": 40, "quinquagesimo": 50,
+}
+
+TAMANHO_MAXIMO_TITULO = 120
+
+
+class Segmento:
+    """Trecho [inicio, fim) do texto normalizado pertencente a uma cláusula/parágrafo/item."""
+
+    __slots__ = ("id", "inicio", "fim", "titulo")
+
+    def __init__(self, id: str, inicio: int, fim: int, titulo: str):
+        self.id = id
+        self.inicio = inicio
+        self.fim = fim
+        self.titulo = titulo
+
+    def __repr__(self) -> str:
+        return f"Segmento({self.id!r}, {self.inicio}, {self.fim})"
+
+
+def _ordinal(palavras: str) -> Optional[int]:
+    """'decima segunda' -> 12; None se não for um ordinal por extenso."""
+    total = 0
+    for palavra in palavras.split():
+        if palavra in _DEZENAS:
+            total += _DEZENAS[palavra]
+        elif palavra in _UNIDADES:
+            total += _UNIDADES[palavra]
+        else:
+            return None
+    return total or None
+
+
+def _cabecalho(linha: str):
+    """(nivel, rotulo) se a linha abre cláusula (0), parágrafo (1) ou item (2); senão None."""
+    match = _CLAUSULA.match(linha)
+    if match:
+        if match.group(1):
+            return 0, str(int(match.group(1)))
+        numero = _ordinal(match.group(2).strip())
+        if numero is not None:
+            return 0, str(numero)
+        return None
+    match = _PARAGRAFO.match(linha)
+    if match:
+        if match.group(1):
+            return 1, f"§{int(match.group(1))}"
+        if match.group(2) == "unico":
+            return 1, "§unico"
+        numero = _ordinal(match.group(2))
+        if numero is not None:
+            return 1, f"§{numero}"
+        return None
+    match = _ITEM.match(linha)
+    if match:
+        return 2, match.group(1) or match.group(2)
+    return None
+
+
+def segmentar_clausulas(texto: TextoNormalizado) -> List[Segmento]:
+    """
+    Divide o texto normalizado em segmentos contíguos que cobrem o documento
+    inteiro. O id é hierárquico ("3", "3.§1", "3.§1.a"); o texto antes da
+    primeira cláusula fica no segmento "preambulo". O título é a linha de
+    abertura da cláusula no texto original.
+    """
+    conteudo = texto.texto
+    segmentos: List[Segmento] = []
+    niveis: List[str] = []          # rótulos ativos: [cláusula, parágrafo, item]
+    titulo_clausula = ""
+    inicio_atual, id_atual, titulo_atual = 0, "preambulo", ""
+
+    candidatas = [m.start() + 1 for m in _CANDIDATA.finditer(conteudo)]
+    for posicao in ([0] if conteudo else []) + candidatas:
+        fim_linha = conteudo.find("\n", posicao)
+        linha = conteudo[posicao:fim_linha if fim_linha != -1 else len(conteudo)]
+        cabecalho = _cabecalho(linha.lstrip())
+        if cabecalho is not None:
+            nivel, rotulo = cabecalho
+            if nivel == 0:
+                titulo_clausula = texto.trecho_original(posicao, posicao + len(linha)).strip()[:TAMANHO_MAXIMO_TITULO]
+                niveis = [rotulo]
+            else:
+                if not niveis:
+                    niveis = ["preambulo"]
+                niveis = niveis[:nivel] + [""] * (nivel - len(niveis)) + [rotulo]
+            if posicao > inicio_atual:
+                segmentos.append(Segmento(id_atual, inicio_atual, posicao, titulo_atual))
+            inicio_atual = posicao
+            id_atual = ".".join(r for r in niveis if r)
+            titulo_atual = titulo_clausula
+
+    segmentos.append(Segmento(id_atual, inicio_atual, len(conteudo), titulo_atual))
+    return segmentos
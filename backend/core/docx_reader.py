@@ -0,0 +1,108 @@
+# core/docx_reader.py
+
+"""
+Leitura leve de DOCX: percorre os XMLs do pacote com iterparse, sem montar
+o modelo de objetos do python-docx, e devolve os blocos de texto na ordem
+do documento (parágrafos e linhas de tabela), incluindo cabeçalhos e rodapés.
+"""
+
+import re
+import zipfile
+from typing import BinaryIO, Iterator, List, Union
+from xml.etree.ElementTree import iterparse
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+_PARAGRAFO = W + "p"
+_TEXTO = W + "t"
+_TABULACAO = W + "tab"
+_QUEBRAS = {W + "br", W + "cr"}
+_HIFEN = W + "noBreakHyphen"
+_CELULA = W + "tc"
+_LINHA = W + "tr"
+_CORPO = W + "body"
+
+SEPARADOR_CELULAS = " | "
+
+
+def _ordenar_partes(nomes: List[str], prefixo: str) -> List[str]:
+    """Ordena header1.xml, header2.xml, ... numericamente."""
+    padrao = re.compile(rf"^word/{prefixo}(\d*)\.xml$")
+    encontrados = [(int(m.group(1) or 0), nome) for nome in nomes if (m := padrao.match(nome))]
+    return [nome for _, nome in sorted(encontrados)]
+
+
+def _iterar_parte(xml: BinaryIO) -> Iterator[str]:
+    """
+    Emite o texto de cada parágrafo fora de tabela e de cada linha de tabela
+    (células separadas por SEPARADOR_CELULAS). Elementos já processados são
+    descartados para manter a memória limitada.
+    """
+    paragrafos: List[List[str]] = []   # pilha: caixas de texto podem aninhar parágrafos
+    celulas: List[List[str]] = []      # pilha de células abertas (tabelas aninhadas)
+    linhas: List[List[str]] = []       # pilha de linhas abertas
+    raiz = None
+
+    for evento, elem in iterparse(xml, events=("start", "end")):
+        tag = elem.tag
+
+        if evento == "start":
+            if raiz is None:
+                raiz = elem
+            if tag == _PARAGRAFO:
+                paragrafos.append([])
+            elif tag == _CELULA:
+                celulas.append([])
+            elif tag == _LINHA:
+                linhas.append([])
+            elif tag == _CORPO:
+                raiz = elem
+            continue
+
+        if tag == _TEXTO:
+            if paragrafos and elem.text:
+                paragrafos[-1].append(elem.text)
+        elif tag == _TABULACAO:
+            if paragrafos:
+                paragrafos[-1].append("\t")
+        elif tag in _QUEBRAS:
+            if paragrafos:
+                paragrafos[-1].append("\n")
+        elif tag == _HIFEN:
+            if paragrafos:
+                paragrafos[-1].append("-")
+        elif tag == _PARAGRAFO:
+            texto = "".join(paragrafos.pop())
+            if celulas:
+                celulas[-1].append(texto)
+            else:
+                # Parágrafos de caixas de texto (aninhados) também saem como bloco próprio
+                yield texto
+        elif tag == _CELULA:
+            texto_celula = " ".join(t for t in celulas.pop() if t)
+            if linhas:
+                linhas[-1].append(texto_celula)
+        elif tag == _LINHA:
+            texto_linha = SEPARADOR_CELULAS.join(linhas.pop())
+            if celulas:
+                # Tabela dentro de célula: a linha vira conteúdo da célula externa
+                celulas[-1].append(texto_linha)
+            else:
+                yield texto_linha
+
+        # Fora de parágrafos/tabelas abertos, tudo o que já foi lido pode ser liberado
+        if not paragrafos and not celulas and not linhas and raiz is not None:
+            raiz.clear()
+
+
+def iterar_blocos_docx(fonte: Union[str, BinaryIO]) -> Iterator[str]:
+    """
+    Gera os blocos de texto de um DOCX: cabeçalhos, corpo (parágrafos e
+    tabelas na ordem do documento) e rodapés.
+    """
+    with zipfile.ZipFile(fonte) as pacote:
+        nomes = pacote.namelist()
+        partes = _ordenar_partes(nomes, "header") + ["word/document.xml"] + _ordenar_partes(nomes, "footer")
+        for parte in partes:
+            with pacote.open(parte) as xml:
+                yield from _iterar_parte(xml)
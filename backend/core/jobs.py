@@ -0,0 +1,241 @@
+# core/jobs.py
+
+"""
+Análises assíncronas: POST /analisar/jobs grava o arquivo numa fila no
+próprio banco (tabela analise_jobs) e responde na hora; tarefas asyncio da
+API consomem a fila e rodam o mesmo pipeline do endpoint síncrono
+(core/pipeline.py), registrando cada etapa no job.
+
+A fila sobrevive a reinícios: jobs que ficaram 'executando' por mais de
+JOBS_TIMEOUT_S voltam para 'pendente'. Com vários processos da API, a
+reserva condicional no banco garante que cada job roda uma vez só.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Optional
+
+from core.pipeline import INTERVALO_KEEPALIVE_S, ErroAnalise, analisar_conteudo, evento_sse
+from core.rule_rescore import reprocessador_regras
+from core.workers import PoolSaturado, pool_banco
+from database.database import (
+    buscar_job,
+    contar_jobs_pendentes,
+    criar_job,
+    devolver_job,
+    finalizar_job,
+    recuperar_jobs_interrompidos,
+    registrar_evento_job,
+    remover_jobs_antigos,
+    reservar_job,
+)
+
+ESTADOS_FINAIS = ("concluido", "erro")
+# Tentativas de gravar o desfecho de um job quando o pool do banco está cheio
+TENTATIVAS_BANCO = 10
+
+
+def _config() -> Dict:
+    """Lê do ambiente: workers, fila máxima, intervalo de consulta (s), timeout (s), tentativas e retenção (h)."""
+    valores = {"habilitado": os.getenv("JOBS_HABILITADO", "true").lower() in {"1", "true", "yes"}}
+    for chave, variavel, padrao in (
+        ("workers", "JOBS_WORKERS", 2),
+        ("fila", "JOBS_FILA_MAXIMA", 100),
+        ("intervalo", "JOBS_INTERVALO_S", 2),
+        ("timeout", "JOBS_TIMEOUT_S", 900),
+        ("tentativas", "JOBS_MAX_TENTATIVAS", 3),
+        ("retencao", "JOBS_RETENCAO_H", 24),
+    ):
+        try:
+            valores[chave] = max(0, int(os.getenv(variavel, str(padrao))))
+        except ValueError:
+            valores[chave] = padrao
+    valores["workers"] = max(1, valores["workers"])
+    valores["intervalo"] = max(1, valores["intervalo"])
+    return valores
+
+
+def descrever_job(job) -> Dict:
+    """Representação pública de um job (GET /analisar/jobs/{id})."""
+    return {
+        "jobId": job.id,
+        "estado": job.estado,
+        "etapa": job.etapa,
+        "nomeArquivo": job.nome_arquivo,
+        "eventos": job.eventos or [],
+        "resultado": job.resultado,
+        "erro": job.erro,
+        "statusErro": job.status_erro,
+        "tentativas": job.tentativas,
+        "criadoEm": job.criado_em.isoformat() if job.criado_em else None,
+        "iniciadoEm": job.iniciado_em.isoformat() if job.iniciado_em else None,
+        "concluidoEm": job.concluido_em.isoformat() if job.concluido_em else None,
+    }
+
+
+class ExecutorJobs:
+    """Tarefas do event loop que consomem a fila de jobs e avisam quem acompanha o progresso."""
+
+    def __init__(self):
+        self._tarefas: List[asyncio.Task] = []
+        self._novo_job: Optional[asyncio.Event] = None
+        # job_id -> evento disparado a cada mudança (acorda os streams SSE)
+        self._mudancas: Dict[str, asyncio.Event] = {}
+
+    async def iniciar(self):
+        config = _config()
+        if not config["habilitado"] or self._tarefas:
+            return
+        self._novo_job = asyncio.Event()
+        await pool_banco.executar(recuperar_jobs_interrompidos, config["timeout"], config["tentativas"])
+        self._tarefas = [
+            asyncio.create_task(self._consumir(), name=f"jobs-analise-{indice}")
+            for indice in range(config["workers"])
+        ]
+        self._tarefas.append(asyncio.create_task(self._manutencao(), name="jobs-manutencao"))
+
+    async def encerrar(self):
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*self._tarefas, return_exceptions=True)
+        self._tarefas = []
+
+    async def enfileirar(self, nome_arquivo: str, conteudo: bytes, force_ai: bool) -> str:
+        """Grava o job na fila e acorda um worker; PoolSaturado (429) se a fila estiver cheia."""
+        config = _config()
+        if await pool_banco.executar(contar_jobs_pendentes) >= config["fila"]:
+            raise PoolSaturado("jobs", 429, "Fila de jobs cheia. Tente novamente em instantes.")
+        id_job = uuid.uuid4().hex
+        if not await pool_banco.executar(criar_job, id_job, nome_arquivo, force_ai, conteudo):
+            raise PoolSaturado("jobs", 503, "Não foi possível enfileirar o job.")
+        if self._novo_job is not None:
+            self._novo_job.set()
+        return id_job
+
+    def _avisar(self, id_job: str):
+        mudanca = self._mudancas.pop(id_job, None)
+        if mudanca is not None:
+            mudanca.set()
+
+    async def aguardar_mudanca(self, id_job: str, timeout: float):
+        """Espera a próxima mudança do job neste processo (ou o timeout, para reler o banco)."""
+        mudanca = self._mudancas.setdefault(id_job, asyncio.Event())
+        try:
+            await asyncio.wait_for(mudanca.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def eventos_sse(self, id_job: str) -> AsyncIterator[str]:
+        """
+        Stream SSE do job: um evento 'progresso' por etapa (inclusive as já
+        registradas) e, no fim, 'concluido' ou 'erro' com o job completo.
+        """
+        enviados = 0
+        ultimo_envio = time.monotonic()
+        while True:
+            try:
+                job = await pool_banco.executar(buscar_job, id_job)
+            except PoolSaturado as e:
+                await asyncio.sleep(e.retry_after)
+                continue
+            if job is None:
+                return
+            eventos = job.eventos or []
+            for evento in eventos[enviados:]:
+                yield evento_sse("progresso", evento)
+                ultimo_envio = time.monotonic()
+            enviados = len(eventos)
+            if job.estado in ESTADOS_FINAIS:
+                yield evento_sse(job.estado, descrever_job(job))
+                return
+            if time.monotonic() - ultimo_envio >= INTERVALO_KEEPALIVE_S:
+                yield ": keepalive\n\n"
+                ultimo_envio = time.monotonic()
+            # Acorda na mudança (mesmo processo) ou relê o banco depois de 1 s (outro processo)
+            await self.aguardar_mudanca(id_job, 1.0)
+
+    async def _consumir(self):
+        while True:
+            try:
+                job = await pool_banco.executar(reservar_job)
+            except PoolSaturado:
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._novo_job.wait(), _config()["intervalo"])
+                except asyncio.TimeoutError:
+                    pass
+                self._novo_job.clear()
+                continue
+            try:
+                await self._processar(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # O job fica em "executando" e volta à fila pela manutenção (JOBS_TIMEOUT_S)
+                logging.exception("Falha ao processar o job %s", job.id)
+
+    async def _gravar(self, funcao, *args):
+        """Grava no banco o desfecho do job, esperando vaga se o pool do banco estiver cheio."""
+        for tentativa in range(TENTATIVAS_BANCO):
+            try:
+                return await pool_banco.executar(funcao, *args)
+            except PoolSaturado as e:
+                if tentativa == TENTATIVAS_BANCO - 1:
+                    raise
+                await asyncio.sleep(e.retry_after)
+
+    async def _processar(self, job):
+        async def progresso(etapa: str, estado: str, **dados):
+            evento = {"etapa": etapa, "estado": estado, "em": time.time(), **dados}
+            await pool_banco.executar(registrar_evento_job, job.id, evento)
+            self._avisar(job.id)
+
+        # Jobs em andamento contam como tráfego ao vivo para o reprocessamento das regras
+        reprocessador_regras.inicio_requisicao()
+        try:
+            resultado = await analisar_conteudo(job.conteudo, job.nome_arquivo, job.force_ai, progresso)
+            await self._gravar(finalizar_job, job.id, "concluido", resultado)
+        except ErroAnalise as e:
+            await self._gravar(finalizar_job, job.id, "erro", None, e.detalhe, e.status)
+        except PoolSaturado as e:
+            # Pools cheios: o job volta para a fila e este worker espera antes de pegar outro
+            logging.warning("Job %s devolvido à fila: %s", job.id, e.mensagem)
+            await self._gravar(devolver_job, job.id)
+            await asyncio.sleep(e.retry_after)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logging.exception("Erro inesperado no job %s", job.id)
+            await self._gravar(
+                finalizar_job, job.id, "erro", None,
+                "Erro interno do servidor. Tente novamente mais tarde.", 500,
+            )
+        finally:
+            reprocessador_regras.fim_requisicao()
+            self._avisar(job.id)
+
+    async def _manutencao(self):
+        """Devolve à fila jobs travados e apaga os antigos, periodicamente."""
+        while True:
+            await asyncio.sleep(60)
+            config = _config()
+            try:
+                devolvidos = await pool_banco.executar(recuperar_jobs_interrompidos, config["timeout"], config["tentativas"])
+                if devolvidos:
+                    logging.warning("%s jobs interrompidos voltaram para a fila", devolvidos)
+                    self._novo_job.set()
+                await pool_banco.executar(remover_jobs_antigos, config["retencao"])
+            except PoolSaturado:
+                continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Sem a manutenção, jobs travados nunca voltariam à fila: registra e tenta no próximo ciclo
+                logging.exception("Falha na manutenção dos jobs")
+
+
+executor_jobs = ExecutorJobs()
@@ -0,0 +1,122 @@
+# core/normalizer.py
+
+"""
+Normalização única do texto do contrato, compartilhada pelas regras e pela
+geração de trechos de contexto: minúsculas, sem acentos e com espaços
+colapsados (quebras de linha são preservadas como um único "\\n").
+
+O mapa de offsets permite levar qualquer posição do texto normalizado de
+volta ao texto original (para exibir o trecho como está no documento).
+"""
+
+import re
+import unicodedata
+from bisect import bisect_right
+from typing import Dict, List, Tuple
+
+
+def _montar_tabela() -> Dict[int, str]:
+    """Tabela 1:1 (mesmo comprimento): letra acentuada/maiúscula -> base minúscula; espaços -> ' ' ou '\\n'."""
+    tabela = {}
+    for codigo in range(0x00C0, 0x0250):
+        caractere = chr(codigo)
+        minuscula = caractere.lower()
+        if len(minuscula) != 1:
+            continue
+        base = "".join(c for c in unicodedata.normalize("NFD", minuscula) if not unicodedata.combining(c))
+        if len(base) == 1 and base != caractere:
+            tabela[codigo] = base
+    # Indicadores ordinais comuns em contratos ("1º", "2ª")
+    tabela[ord("º")] = "o"
+    tabela[ord("ª")] = "a"
+    for espaco in "\t\v\x1f\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u202f\u205f\u3000":
+        tabela[ord(espaco)] = " "
+    for quebra in "\r\f\x1c\x1d\x1e\x85\u2028\u2029":
+        tabela[ord(quebra)] = "\n"
+    return tabela
+
+
+_TABELA = _montar_tabela()
+_ESPECIAIS_ASCII = [chr(codigo) for codigo in _TABELA if codigo < 128]
+# Trechos que mudam de comprimento: sequências de espaço/quebra e acentos combinantes soltos
+_COLAPSAR_ESPACOS = re.compile("[ \n][ \n]+")
+_COLAPSAR = re.compile("[ \n][ \n]+|[\u0300-\u036f]+")
+
+
+class TextoNormalizado:
+    """Texto normalizado + mapa de volta às posições do texto original."""
+
+    __slots__ = ("original", "texto", "_inicio_normalizado", "_inicio_original")
+
+    def __init__(self, original: str, texto: str, inicio_normalizado: List[int], inicio_original: List[int]):
+        self.original = original
+        self.texto = texto
+        # Segmentos em que normalizado e original andam juntos (1:1)
+        self._inicio_normalizado = inicio_normalizado
+        self._inicio_original = inicio_original
+
+    def __len__(self) -> int:
+        return len(self.texto)
+
+    def posicao_original(self, indice: int) -> int:
+        """Converte uma posição do texto normalizado na posição correspondente do original."""
+        if indice >= len(self.texto):
+            return len(self.original)
+        segmento = bisect_right(self._inicio_normalizado, indice) - 1
+        return self._inicio_original[segmento] + (indice - self._inicio_normalizado[segmento])
+
+    def intervalo_original(self, inicio: int, fim: int) -> Tuple[int, int]:
+        """Converte o intervalo [inicio, fim) do normalizado para o original."""
+        if fim <= inicio:
+            posicao = self.posicao_original(inicio)
+            return posicao, posicao
+        return self.posicao_original(inicio), self.posicao_original(fim - 1) + 1
+
+    def trecho_original(self, inicio: int, fim: int, margem: int = 0) -> str:
+        """Texto original correspondente a [inicio, fim) do normalizado, com `margem` caracteres extras de cada lado."""
+        inicio_original, fim_original = self.intervalo_original(inicio, fim)
+        return self.original[max(0, inicio_original - margem):fim_original + margem]
+
+
+def normalizar_texto(texto: str) -> TextoNormalizado:
+    """Normaliza o texto uma única vez por documento (minúsculas, sem acentos, espaços colapsados)."""
+    minusculo = texto.lower()
+    if len(minusculo) != len(texto):
+        # Raro: caracteres cuja minúscula tem outro comprimento (ex.: 'İ') ficam como estão
+        minusculo = "".join(c.lower() if len(c.lower()) == 1 else c for c in texto)
+
+    # Substitui só os caracteres presentes (str.replace é bem mais rápido que translate com dict)
+    if minusculo.isascii():
+        presentes = [c for c in _ESPECIAIS_ASCII if c in minusculo]
+        combinantes = False
+    else:
+        distintos = set(minusculo)
+        presentes = [c for c in distintos if ord(c) in _TABELA]
+        combinantes = any(0x0300 <= ord(c) <= 0x036F for c in distintos)
+    dobrado = minusculo
+    for caractere in presentes:
+        dobrado = dobrado.replace(caractere, _TABELA[ord(caractere)])
+
+    partes = []
+    inicio_normalizado = [0]
+    inicio_original = [0]
+    ultimo = 0
+    tamanho = 0
+    for trecho in (_COLAPSAR if combinantes else _COLAPSAR_ESPACOS).finditer(dobrado):
+        inicio, fim = trecho.span()
+        partes.append(dobrado[ultimo:inicio])
+        tamanho += inicio - ultimo
+        valor = trecho.group()
+        if valor[0] in " \n":
+            substituto = "\n" if "\n" in valor else " "
+        else:
+            substituto = ""
+        partes.append(substituto)
+        tamanho += len(substituto)
+        # O próximo caractere normalizado volta a andar junto com o original
+        inicio_normalizado.append(tamanho)
+        inicio_original.append(fim)
+        ultimo = fim
+    partes.append(dobrado[ultimo:])
+
+    return TextoNormalizado(texto, "".join(partes), inicio_normalizado, inicio_original)
@@ -0,0 +1,185 @@
+# core/ocr.py
+
+"""
+OCR local (Tesseract) para contratos escaneados.
+
+As páginas são renderizadas no processo da requisição e identificadas pelo
+SHA-256 da imagem; só as que ainda não estão no cache (ocr_paginas_cache)
+vão para o pool de processos, uma página por tarefa. Com OCR_WORKERS=1 (como
+nos processos do pool "cpu" da API, que não abrem pool próprio) o Tesseract
+roda no próprio processo, página a página.
+"""
+
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from database.database import buscar_ocr_pagina, salvar_ocr_pagina
+
+try:
+    import pytesseract
+    import pypdfium2 as pdfium
+    from PIL import Image
+    OCR_DISPONIVEL = True
+except ImportError:
+    OCR_DISPONIVEL = False
+
+_pool_ocr: Optional[ProcessPoolExecutor] = None
+_tesseract_ok: Optional[bool] = None
+
+
+def _config_ocr() -> Tuple[int, int, int, str]:
+    """Lê do ambiente workers, DPI, limite de páginas e idioma do OCR."""
+    try:
+        workers = int(os.getenv("OCR_WORKERS", "2"))
+    except ValueError:
+        workers = 2
+    try:
+        dpi = int(os.getenv("OCR_DPI", "300"))
+    except ValueError:
+        dpi = 300
+    try:
+        max_paginas = int(os.getenv("OCR_MAX_PAGINAS", "200"))
+    except ValueError:
+        max_paginas = 200
+    idioma = os.getenv("OCR_IDIOMA", "por")
+    return max(1, workers), dpi, max_paginas, idioma
+
+
+def ocr_disponivel() -> bool:
+    """True se o OCR está habilitado e o binário do Tesseract foi encontrado."""
+    global _tesseract_ok
+    if not OCR_DISPONIVEL or os.getenv("OCR_HABILITADO", "true").lower() not in {"1", "true", "yes"}:
+        return False
+    if _tesseract_ok is None:
+        try:
+            pytesseract.get_tesseract_version()
+            _tesseract_ok = True
+        except Exception:
+            _tesseract_ok = False
+    return _tesseract_ok
+
+
+def _obter_pool_ocr(workers: int) -> ProcessPoolExecutor:
+    global _pool_ocr
+    if _pool_ocr is None:
+        _pool_ocr = ProcessPoolExecutor(max_workers=workers)
+    return _pool_ocr
+
+
+def encerrar_pool_ocr() -> None:
+    """Finaliza o pool de OCR (usado no shutdown da API)."""
+    global _pool_ocr
+    if _pool_ocr is not None:
+        _pool_ocr.shutdown(wait=True)
+        _pool_ocr = None
+
+
+def _ocr_imagem(modo: str, tamanho: Tuple[int, int], pixels: bytes, idioma: str) -> str:
+    """Executa o Tesseract sobre uma página já renderizada — roda dentro de um worker."""
+    imagem = Image.frombytes(modo, tamanho, pixels)
+    return pytesseract.image_to_string(imagem, lang=idioma)
+
+
+def _abrir_documento(fonte_pdf: Union[str, bytes, BinaryIO]):
+    """Abre o PDF no pdfium a partir de caminho, bytes ou file-like."""
+    if isinstance(fonte_pdf, (bytearray, memoryview)):
+        fonte_pdf = bytes(fonte_pdf)
+    elif not isinstance(fonte_pdf, (str, bytes)):
+        fonte_pdf.seek(0)
+    return pdfium.PdfDocument(fonte_pdf)
+
+
+def _renderizar_paginas(fonte_pdf: Union[str, bytes, BinaryIO], dpi: int) -> Iterator[Tuple[str, Tuple[int, int], bytes]]:
+    """Renderiza cada página em tons de cinza, uma por vez."""
+    documento = _abrir_documento(fonte_pdf)
+    try:
+        for indice in range(len(documento)):
+            pagina = documento[indice]
+            try:
+                imagem = pagina.render(scale=dpi / 72, grayscale=True).to_pil()
+                yield imagem.mode, imagem.size, imagem.tobytes()
+            finally:
+                pagina.close()
+    finally:
+        documento.close()
+
+
+def _hash_imagem(modo: str, tamanho: Tuple[int, int], pixels: bytes) -> str:
+    sha = hashlib.sha256(f"{modo}:{tamanho[0]}x{tamanho[1]}:".encode())
+    sha.update(pixels)
+    return sha.hexdigest()
+
+
+def iterar_paginas_ocr(fonte_pdf: Union[str, bytes, BinaryIO]) -> Iterator[Tuple[int, str]]:
+    """
+    Gera (numero_pagina, texto) via OCR, na ordem das páginas. Páginas já
+    reconhecidas (mesma imagem) vêm do cache; páginas repetidas no mesmo
+    documento são enviadas ao Tesseract uma única vez.
+    """
+    workers, dpi, _, idioma = _config_ocr()
+    pool = _obter_pool_ocr(workers) if workers > 1 else None
+
+    pendentes: deque = deque()          # (numero, hash, Future | texto) na ordem das páginas
+    em_andamento: Dict[str, Future] = {}
+
+    def _resolver(item) -> Tuple[int, str]:
+        numero, hash_imagem, resultado = item
+        if isinstance(resultado, Future):
+            texto = resultado.result()
+            if em_andamento.pop(hash_imagem, None) is not None:
+                salvar_ocr_pagina(hash_imagem, idioma, texto)
+            return numero, texto
+        return numero, resultado
+
+    try:
+        for numero, (modo, tamanho, pixels) in enumerate(_renderizar_paginas(fonte_pdf, dpi), start=1):
+            hash_imagem = _hash_imagem(modo, tamanho, pixels)
+
+            if hash_imagem in em_andamento:
+                pendentes.append((numero, hash_imagem, em_andamento[hash_imagem]))
+            else:
+                texto_cache = buscar_ocr_pagina(hash_imagem, idioma)
+                if texto_cache is not None:
+                    pendentes.append((numero, hash_imagem, texto_cache))
+                elif pool is None:
+                    # Sem pool: a página repetida adiante já encontra o texto no cache
+                    texto = _ocr_imagem(modo, tamanho, pixels, idioma)
+                    salvar_ocr_pagina(hash_imagem, idioma, texto)
+                    pendentes.append((numero, hash_imagem, texto))
+                else:
+                    futuro = pool.submit(_ocr_imagem, modo, tamanho, pixels, idioma)
+                    em_andamento[hash_imagem] = futuro
+                    pendentes.append((numero, hash_imagem, futuro))
+
+            # Limita as imagens aguardando OCR (em memória) a ~2 por worker
+            while len(em_andamento) >= workers * 2 and pendentes:
+                yield _resolver(pendentes.popleft())
+
+        while pendentes:
+            yield _resolver(pendentes.popleft())
+    finally:
+        for futuro in em_andamento.values():
+            futuro.cancel()
+
+
+def extrair_paginas_ocr(fonte_pdf: Union[str, bytes, BinaryIO]) -> Tuple[List[str], str]:
+    """Extrai, via OCR, o texto de cada página de um PDF escaneado, no contrato (resultado, erro) do extrator."""
+    if not ocr_disponivel():
+        return [], "OCR indisponível no servidor (Tesseract não encontrado)."
+    try:
+        _, _, max_paginas, _ = _config_ocr()
+        documento = _abrir_documento(fonte_pdf)
+        total_paginas = len(documento)
+        documento.close()
+        if total_paginas > max_paginas:
+            return [], f"PDF escaneado com {total_paginas} páginas excede o limite de OCR ({max_paginas})."
+
+        paginas = [texto_pagina.strip() for _, texto_pagina in iterar_paginas_ocr(fonte_pdf)]
+        if not any(paginas):
+            return [], "Nenhum texto reconhecido pelo OCR."
+        return paginas, ""
+    except Exception as e:
+        return [], f"Erro ao executar OCR: {str(e)}"
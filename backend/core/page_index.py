@@ -0,0 +1,76 @@
+# core/page_index.py
+
+"""
+Índice posição -> página/linha do texto analisado, montado uma vez a partir
+das páginas extraídas (mesma junção de juntar_paginas). Cada ponto de
+atenção traz o intervalo de caracteres do trecho casado; a página e a linha
+saem de uma busca binária, sem procurar de novo no texto.
+"""
+
+import re
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Sequence
+
+_QUEBRA = re.compile("\n")
+
+# Caracteres de texto original mostrados de cada lado do trecho casado
+MARGEM_CONTEXTO = 150
+
+
+class IndicePaginas:
+    """Inícios de página e de linha (posições no texto de juntar_paginas)."""
+
+    __slots__ = ("_inicios_pagina", "_numeros_pagina", "_inicios_linha", "tamanho")
+
+    def __init__(self, paginas: Sequence[str]):
+        self._inicios_pagina: List[int] = []
+        self._numeros_pagina: List[int] = []
+        self._inicios_linha: List[int] = []
+        posicao = 0
+        for numero, texto_pagina in enumerate(paginas, start=1):
+            # Páginas vazias não entram no texto, mas a numeração segue a do documento
+            if not texto_pagina:
+                continue
+            self._inicios_pagina.append(posicao)
+            self._numeros_pagina.append(numero)
+            self._inicios_linha.append(posicao)
+            self._inicios_linha.extend(posicao + m.end() for m in _QUEBRA.finditer(texto_pagina))
+            posicao += len(texto_pagina) + 1
+        self.tamanho = posicao
+
+    def localizar(self, inicio: int, fim: int) -> Dict:
+        """Página (do documento) e linha (dentro da página, a partir de 1) do intervalo [inicio, fim)."""
+        if not self._inicios_pagina:
+            return {"inicio": inicio, "fim": fim}
+        indice_pagina = max(0, bisect_right(self._inicios_pagina, inicio) - 1)
+        linha = bisect_right(self._inicios_linha, inicio) - 1
+        primeira_linha = bisect_right(self._inicios_linha, self._inicios_pagina[indice_pagina]) - 1
+        return {
+            "pagina": self._numeros_pagina[indice_pagina],
+            "linha": linha - primeira_linha + 1,
+            "inicio": inicio,
+            "fim": fim,
+        }
+
+    def anotar(self, pontos: Iterable[Dict]):
+        """Completa a `localizacao` dos pontos de atenção com página e linha."""
+        for ponto in pontos:
+            localizacao = ponto.get("localizacao")
+            if localizacao and "pagina" not in localizacao:
+                ponto["localizacao"] = self.localizar(localizacao["inicio"], localizacao["fim"])
+
+
+def contexto(texto: str, inicio: int, fim: int, margem: int = MARGEM_CONTEXTO):
+    """
+    (trecho em volta de [inicio, fim), [início, fim) do trecho casado dentro dele).
+    O corte é feito em espaços e as quebras de linha viram espaço (mesmo comprimento).
+    """
+    comeco = max(0, inicio - margem)
+    if comeco > 0:
+        espaco = texto.find(" ", comeco, inicio)
+        comeco = espaco + 1 if espaco != -1 else comeco
+    final = min(len(texto), fim + margem)
+    if final < len(texto):
+        espaco = texto.rfind(" ", fim, final)
+        final = espaco if espaco != -1 else final
+    return texto[comeco:final].replace("\n", " "), [inicio - comeco, fim - comeco]
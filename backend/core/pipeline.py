@@ -0,0 +1,459 @@
+# core/pipeline.py
+
+"""
+Pipeline completo de uma análise (hash, extração, regras, IA e gravação),
+compartilhado pelo endpoint síncrono e pelos jobs assíncronos.
+
+Cada etapa roda no seu pool (core/workers.py). Quem chama pode passar
+`progresso`, uma corrotina chamada como progresso(etapa, estado, **dados)
+no início ("executando") e no fim ("concluida") de cada etapa, e `limites`,
+semáforos {"cpu": ..., "ia": ...} que restringem quantas análises dela ficam
+ao mesmo tempo na extração/regras e na IA (ex.: análise em lote).
+
+Análises simultâneas do mesmo arquivo são feitas uma vez só
+(core/single_flight.py): as demais requisições recebem o mesmo resultado.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Union
+
+from core.ai_analyzer import analisar_contrato_com_ia, analisar_contrato_com_ia_stream, configurar_api_gemini
+from core.extractor import (
+    MENSAGEM_SEM_TEXTO, SEPARADOR_PAGINAS, VERSAO_EXTRATOR, extrair_intervalo_pdf, extrair_paginas_adendo,
+    intervalos_extracao,
+)
+from core.rule_profile import perfil_regras
+from core.rule_engine import obter_regras
+from core.rule_rescore import reprocessador_regras, texto_necessario
+from core.single_flight import analises_em_andamento
+from core.workers import PoolSaturado, pool_banco, pool_cpu, pool_ia, preparar_analise, reavaliar_cache
+from database.database import (
+    atualizar_resultado_regras,
+    buscar_analise_por_hash,
+    buscar_texto_extraido,
+    salvar_analise_cache,
+    salvar_texto_extraido,
+)
+
+ETAPAS = ("hash", "extracao", "regras", "ia", "gravacao")
+
+# Sem eventos por esse tempo, os streams SSE mandam um comentário para manter a conexão aberta
+INTERVALO_KEEPALIVE_S = 15
+
+Progresso = Optional[Callable[..., Awaitable[None]]]
+Transmissao = Optional[Callable[[str, Dict], Awaitable[None]]]
+
+
+class ErroAnalise(Exception):
+    """Falha da análise atribuível ao arquivo enviado (vira a resposta HTTP `status`)."""
+
+    def __init__(self, status: int, detalhe: str):
+        super().__init__(detalhe)
+        self.status = status
+        self.detalhe = detalhe
+
+
+def evento_sse(evento: str, dados: Dict) -> str:
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
+
+def normalizar_sha256(valor: str) -> str:
+    """SHA-256 informado pelo cliente, em minúsculas; 400 se não tiver o formato."""
+    hash_arquivo = (valor or "").strip().lower()
+    if not re.fullmatch(r"[0-9a-f]{64}", hash_arquivo):
+        raise ErroAnalise(400, "SHA-256 inválido (esperados 64 caracteres hexadecimais).")
+    return hash_arquivo
+
+
+def etag_resposta(resposta: Dict) -> str:
+    """ETag de uma resposta JSON: muda sempre que o conteúdo muda (ex.: regras reavaliadas)."""
+    corpo = json.dumps(resposta, ensure_ascii=False, sort_keys=True, default=str)
+    return '"' + hashlib.sha256(corpo.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_confere(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidatos = {valor.strip().removeprefix("W/") for valor in if_none_match.split(",")}
+    return "*" in candidatos or etag in candidatos
+
+
+def extensoes_permitidas():
+    return {e.strip().lstrip('.').lower() for e in os.getenv('ALLOWED_EXTS', 'pdf,docx').split(',') if e.strip()}
+
+
+def limite_upload_mb() -> float:
+    """Limite de tamanho do upload (MB), configurável por env."""
+    try:
+        return float(os.getenv("MAX_UPLOAD_MB", "15"))
+    except ValueError:
+        return 15.0
+
+
+def validar_arquivo(nome_arquivo: Optional[str], tamanho: Optional[int] = None, extensoes=None):
+    """Confere nome, extensão e (se informado) tamanho do arquivo enviado."""
+    if not nome_arquivo:
+        raise ErroAnalise(400, "Arquivo enviado sem nome.")
+    if nome_arquivo.split('.')[-1].lower() not in (extensoes or extensoes_permitidas()):
+        raise ErroAnalise(400, "Formato de arquivo não suportado. Use PDF ou DOCX.")
+    max_mb = limite_upload_mb()
+    # Validação de tamanho (proteção simples de memória/abuso)
+    if tamanho is not None and tamanho > int(max_mb * 1024 * 1024):
+        raise ErroAnalise(413, f"Arquivo excede o limite de {int(max_mb)}MB.")
+
+
+async def resultado_regras_atual(cache_salvo) -> dict:
+    """
+    Resultado das regras do cache na versão atual das regras (reavalia só as
+    regras alteradas): o texto guardado é lido e o resultado gravado no pool
+    do banco; a reavaliação roda no pool de CPU.
+    """
+    resultado = cache_salvo.resultado_regras or {}
+    if resultado.get("versao_regras") == obter_regras().versao:
+        return resultado
+    try:
+        texto_extraido = None
+        if texto_necessario(resultado):
+            texto_extraido = await pool_banco.executar(buscar_texto_extraido, cache_salvo.hash_arquivo, VERSAO_EXTRATOR)
+        reavaliado = await pool_cpu.executar(reavaliar_cache, resultado, texto_extraido)
+    except PoolSaturado:
+        raise
+    except Exception:
+        logging.exception("Falha ao atualizar o resultado das regras em cache")
+        return resultado
+    if reavaliado["perfil"] is not None:
+        perfil_regras.mesclar(reavaliado["perfil"])
+    atualizado = reavaliado["analise_regras"]
+    if atualizado is None or atualizado.get("versao_regras") == resultado.get("versao_regras"):
+        return resultado
+    await pool_banco.executar(atualizar_resultado_regras, cache_salvo.id, atualizado, cache_salvo.versao_regras)
+    return atualizado
+
+
+def hash_arquivo_disco(caminho: str, tamanho_bloco: int = 1024 * 1024) -> str:
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+async def _avisar(progresso: Progresso, etapa: str, estado: str, **dados):
+    if progresso is not None:
+        await progresso(etapa, estado, **dados)
+
+
+async def _ia_em_stream(texto: str, transmissao: Callable[[str, Dict], Awaitable[None]]) -> str:
+    """
+    Roda a geração em streaming do Gemini no pool de IA e repassa cada trecho
+    a `transmissao` assim que chega; devolve o texto completo.
+    """
+    loop = asyncio.get_running_loop()
+    fila: asyncio.Queue = asyncio.Queue()
+    fim = object()
+
+    def produzir():
+        try:
+            for trecho in analisar_contrato_com_ia_stream(texto):
+                loop.call_soon_threadsafe(fila.put_nowait, trecho)
+        finally:
+            loop.call_soon_threadsafe(fila.put_nowait, fim)
+
+    tarefa = asyncio.ensure_future(pool_ia.executar(produzir))
+    partes = []
+    while True:
+        if tarefa.done():
+            # Pool cheio ou falha antes de começar: levanta aqui (o marcador de fim nunca chega)
+            tarefa.result()
+            trecho = await fila.get()
+        else:
+            leitura = asyncio.ensure_future(fila.get())
+            await asyncio.wait({leitura, tarefa}, return_when=asyncio.FIRST_COMPLETED)
+            if not leitura.done():
+                leitura.cancel()
+                continue
+            trecho = leitura.result()
+        if trecho is fim:
+            break
+        partes.append(trecho)
+        await transmissao("ia", {"texto": trecho})
+    await tarefa
+    return "".join(partes)
+
+
+def _vaga(limites: Optional[Dict[str, asyncio.Semaphore]], nome: str):
+    semaforo = (limites or {}).get(nome)
+    return semaforo if semaforo is not None else contextlib.nullcontext()
+
+
+async def analisar_conteudo(conteudo: Union[bytes, str], nome_arquivo: str, force_ai: bool = False,
+                            progresso: Progresso = None, hash_arquivo: Optional[str] = None,
+                            limites: Optional[Dict[str, asyncio.Semaphore]] = None,
+                            transmissao: Transmissao = None) -> Dict:
+    """
+    Executa a análise completa de um arquivo e devolve a resposta de /analisar.
+    `conteudo` são os bytes ou o caminho do arquivo em disco; `hash_arquivo`,
+    se já calculado durante o upload, evita reler o arquivo. Com `transmissao`,
+    chamada como transmissao(evento, dados), a resposta parcial das regras sai
+    como evento "regras" e a análise da IA em trechos ("ia", {"texto": ...})
+    conforme o Gemini gera; o cache é gravado só no fim.
+    """
+    await _avisar(progresso, "hash", "executando")
+    if hash_arquivo is None:
+        if isinstance(conteudo, str):
+            hash_arquivo = await asyncio.to_thread(hash_arquivo_disco, conteudo)
+        else:
+            hash_arquivo = hashlib.sha256(conteudo).hexdigest()
+    await _avisar(progresso, "hash", "concluida", hash=hash_arquivo)
+
+    cache_salvo = await pool_banco.executar(buscar_analise_por_hash, hash_arquivo)
+    if cache_salvo and not force_ai:
+        return await resposta_cache(cache_salvo, nome_arquivo)
+
+    async def cache_novo():
+        # Análise gravada por outro worker que processava o mesmo arquivo (com force_ai, só se mais nova)
+        atual = await pool_banco.executar(buscar_analise_por_hash, hash_arquivo)
+        if atual is None or (cache_salvo is not None and atual.data_analise == cache_salvo.data_analise):
+            return None
+        return await resposta_cache(atual, nome_arquivo)
+
+    # Requisições simultâneas do mesmo arquivo esperam a primeira (no processo e entre workers)
+    resposta = await analises_em_andamento.executar(
+        hash_arquivo,
+        lambda: _analisar_arquivo(conteudo, nome_arquivo, hash_arquivo, cache_salvo, force_ai, progresso, limites, transmissao),
+        cache_novo,
+    )
+    return {**resposta, "nomeArquivo": nome_arquivo}
+
+
+async def resposta_cache(cache_salvo, nome_arquivo: str) -> Dict:
+    """Resposta de /analisar para uma análise do cache (regras atualizadas se mudaram)."""
+    resultado_cache = await resultado_regras_atual(cache_salvo)
+    score_cache = resultado_cache.get("score", 0)
+    total_clausulas = resultado_cache.get(
+        "total_clausulas_problematicas",
+        len(resultado_cache.get("pontos_atencao", []) or []),
+    )
+    return {
+        "sucesso": True,
+        "nomeArquivo": nome_arquivo,
+        "textoExtraido": cache_salvo.resumo_texto or "",
+        "scoreRisco": score_cache,
+        "nivelRisco": resultado_cache.get("nivel_risco", "DESCONHECIDO"),
+        "pontosAtencao": resultado_cache.get("pontos_atencao", []),
+        "totalClausulasProblem": total_clausulas,
+        "analiseIA": cache_salvo.analise_ia or "API de IA não configurada.",
+        "cacheHit": True,
+    }
+
+
+async def _extrair_paginas(conteudo: Union[bytes, str]) -> List[str]:
+    """
+    Texto de cada página, extraído no pool "cpu". Os processos do pool não
+    abrem pool próprio, então um PDF grande com texto é dividido aqui em
+    intervalos de páginas, cada um uma tarefa do pool.
+    """
+    intervalos = None
+    if pool_cpu.processos and pool_cpu.workers > 1:
+        intervalos = await pool_cpu.executar(intervalos_extracao, conteudo, pool_cpu.workers)
+    if not intervalos:
+        paginas, erro_extracao = await pool_cpu.executar(extrair_paginas_adendo, conteudo)
+        if erro_extracao:
+            raise ErroAnalise(400, erro_extracao)
+        return paginas
+
+    # No máximo um intervalo por worker ao mesmo tempo: o documento não enche a fila do pool sozinho
+    vagas = asyncio.Semaphore(pool_cpu.workers)
+
+    async def extrair_intervalo(inicio: int, fim: int):
+        async with vagas:
+            return await pool_cpu.executar(extrair_intervalo_pdf, conteudo, inicio, fim)
+
+    # return_exceptions: nenhum intervalo fica rodando solto se outro for recusado pelo pool
+    partes = await asyncio.gather(
+        *(extrair_intervalo(inicio, fim) for inicio, fim in intervalos),
+        return_exceptions=True,
+    )
+    paginas = []
+    for parte in partes:
+        if isinstance(parte, BaseException):
+            raise parte
+        paginas_intervalo, erro_extracao = parte
+        if erro_extracao:
+            raise ErroAnalise(400, erro_extracao)
+        paginas.extend(paginas_intervalo)
+    if not any(texto_pagina.strip() for texto_pagina in paginas):
+        raise ErroAnalise(400, MENSAGEM_SEM_TEXTO)
+    return paginas
+
+
+async def _analisar_arquivo(conteudo: Union[bytes, str], nome_arquivo: str, hash_arquivo: str, cache_salvo,
+                            force_ai: bool, progresso: Progresso,
+                            limites: Optional[Dict[str, asyncio.Semaphore]], transmissao: Transmissao) -> Dict:
+    """Extração, regras, IA e gravação de um arquivo que não está no cache (ou force_ai)."""
+    async with _vaga(limites, "cpu"):
+        # --- Texto já extraído deste arquivo? Evita reabrir o PDF/DOCX (ex.: force_ai) ---
+        await _avisar(progresso, "extracao", "executando")
+        texto_cache = await pool_banco.executar(buscar_texto_extraido, hash_arquivo, VERSAO_EXTRATOR)
+        if texto_cache is not None:
+            paginas = texto_cache.split(SEPARADOR_PAGINAS)
+        else:
+            # --- Extrai direto dos bytes do upload (formato detectado pelo conteúdo) ---
+            paginas = await _extrair_paginas(conteudo)
+            await pool_banco.executar(salvar_texto_extraido, hash_arquivo, VERSAO_EXTRATOR, SEPARADOR_PAGINAS.join(paginas))
+        await _avisar(progresso, "extracao", "concluida", paginas=len(paginas), cache=texto_cache is not None)
+
+        # --- Remove cabeçalhos/rodapés repetidos e roda as regras (pool de processos) ---
+        await _avisar(progresso, "regras", "executando")
+        reutilizar_regras = bool(cache_salvo and force_ai and cache_salvo.resultado_regras)
+        preparado = await pool_cpu.executar(preparar_analise, paginas, not reutilizar_regras)
+        if preparado["perfil"] is not None:
+            perfil_regras.mesclar(preparado["perfil"])
+        texto_extraido = preparado["texto"]
+        limpeza = preparado["limpeza"]
+        logging.info(
+            "Limpeza de %s: %s -> %s caracteres (redução de %.1f%%)",
+            nome_arquivo,
+            limpeza["caracteres_originais"],
+            limpeza["caracteres_finais"],
+            limpeza["taxa_reducao"] * 100,
+        )
+
+        # --- Verificação de Mínimo de Texto ---
+        if not texto_extraido or len(texto_extraido.strip()) < 100:
+            raise ErroAnalise(400, "Texto extraído insuficiente. Verifique se o arquivo não é uma imagem escaneada.")
+
+    if reutilizar_regras:
+        # Reutiliza as regras do cache (atualizadas se as regras mudaram) para evitar recomputo
+        analise_regras = await resultado_regras_atual(cache_salvo)
+    else:
+        analise_regras = preparado["analise_regras"]
+    await _avisar(progresso, "regras", "concluida", score=analise_regras["score"], nivel_risco=analise_regras["nivel_risco"])
+
+    resumo_texto = texto_extraido[:500] + ("..." if len(texto_extraido) > 500 else "")
+
+    resposta = {
+        "sucesso": True,
+        "nomeArquivo": nome_arquivo,
+        "textoExtraido": resumo_texto,
+        "scoreRisco": analise_regras["score"],
+        "nivelRisco": analise_regras["nivel_risco"],
+        "pontosAtencao": analise_regras["pontos_atencao"],
+        "totalClausulasProblem": analise_regras["total_clausulas_problematicas"],
+        "regrasInterrompidas": analise_regras.get("regras_interrompidas", []),
+        "analiseIA": None,
+        "limpezaTexto": limpeza,
+    }
+    if transmissao is not None:
+        # Modo streaming: o resultado das regras sai antes da IA
+        await transmissao("regras", {chave: valor for chave, valor in resposta.items() if chave != "analiseIA"})
+
+    analise_ia_texto = "API de IA não configurada."
+    guardar_cache = True
+    await _avisar(progresso, "ia", "executando")
+    if configurar_api_gemini():
+        try:
+            async with _vaga(limites, "ia"):
+                if transmissao is not None:
+                    analise_ia_texto = await _ia_em_stream(texto_extraido, transmissao)
+                else:
+                    analise_ia_texto = await pool_ia.executar(analisar_contrato_com_ia, texto_extraido)
+        except PoolSaturado as e:
+            # IA sobrecarregada não derruba a análise: responde só com as regras e não grava o cache
+            logging.warning("IA indisponível para %s: %s", nome_arquivo, e.mensagem)
+            analise_ia_texto = "Análise de IA indisponível no momento (serviço sobrecarregado). Tente novamente em instantes."
+            guardar_cache = False
+    await _avisar(progresso, "ia", "concluida")
+    resposta["analiseIA"] = analise_ia_texto
+
+    if guardar_cache:
+        await _avisar(progresso, "gravacao", "executando")
+        await pool_banco.executar(
+            salvar_analise_cache,
+            hash_arquivo=hash_arquivo,
+            nome_arquivo=nome_arquivo,
+            resumo_texto=resumo_texto,
+            resultado_regras=analise_regras,
+            analise_ia=analise_ia_texto,
+        )
+        await _avisar(progresso, "gravacao", "concluida")
+
+    return resposta
+
+
+# Análises em streaming em andamento (referência até terminarem, mesmo sem cliente)
+_analises_em_stream: Set[asyncio.Task] = set()
+
+
+async def analisar_em_stream(conteudo: Union[bytes, str], nome_arquivo: str, force_ai: bool = False,
+                             hash_arquivo: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Análise em modo streaming (POST /analisar/?stream=true). Espera o primeiro
+    resultado, levantando ErroAnalise/PoolSaturado como a análise normal, e
+    devolve o stream SSE: 'regras' (resposta sem a IA), 'ia' (um evento por
+    trecho do texto do Gemini) e 'concluido' com a resposta completa, ou
+    'erro'. A análise segue até o fim mesmo se o cliente desconectar, para
+    gravar o cache.
+    """
+    fila: asyncio.Queue = asyncio.Queue()
+
+    async def transmitir(evento: str, dados: Dict):
+        fila.put_nowait((evento, dados))
+
+    async def executar():
+        reprocessador_regras.inicio_requisicao()
+        try:
+            resposta = await analisar_conteudo(
+                conteudo, nome_arquivo, force_ai, hash_arquivo=hash_arquivo, transmissao=transmitir,
+            )
+            fila.put_nowait(("concluido", resposta))
+        except (ErroAnalise, PoolSaturado) as e:
+            fila.put_nowait(("erro", e))
+        except Exception:
+            logging.exception("Erro inesperado na análise em streaming de %s", nome_arquivo)
+            fila.put_nowait(("erro", ErroAnalise(500, "Erro interno do servidor. Tente novamente mais tarde.")))
+        finally:
+            reprocessador_regras.fim_requisicao()
+
+    tarefa = asyncio.create_task(executar())
+    _analises_em_stream.add(tarefa)
+    tarefa.add_done_callback(_analises_em_stream.discard)
+
+    primeiro = await fila.get()
+    if primeiro[0] == "erro":
+        raise primeiro[1]
+    return _eventos_stream(fila, primeiro)
+
+
+async def _eventos_stream(fila: asyncio.Queue, primeiro) -> AsyncIterator[str]:
+    enviou_regras = enviou_ia = False
+    evento, dados = primeiro
+    while True:
+        if evento == "regras":
+            enviou_regras = True
+        elif evento == "ia":
+            enviou_ia = True
+        elif evento == "concluido":
+            # Cache, resultado de outra requisição igual ou IA indisponível: sai de uma vez o que faltou
+            if not enviou_regras:
+                yield evento_sse("regras", {chave: valor for chave, valor in dados.items() if chave != "analiseIA"})
+            if not enviou_ia and dados.get("analiseIA"):
+                yield evento_sse("ia", {"texto": dados["analiseIA"]})
+        elif evento == "erro":
+            detalhe = dados.detalhe if isinstance(dados, ErroAnalise) else dados.mensagem
+            dados = {"status": dados.status, "detail": detalhe}
+        yield evento_sse(evento, dados)
+        if evento in ("concluido", "erro"):
+            return
+        while True:
+            try:
+                evento, dados = await asyncio.wait_for(fila.get(), INTERVALO_KEEPALIVE_S)
+                break
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
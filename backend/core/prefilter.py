@@ -0,0 +1,302 @@
+# core/prefilter.py
+
+"""
+Pré-filtro das regras por palavras-âncora.
+
+De cada padrão extraímos, pela própria estrutura da regex, um conjunto de
+literais obrigatórios ("âncoras": todo match contém ao menos um deles). Uma
+única varredura do texto (Aho-Corasick via pyahocorasick; sem ele, uma busca
+str.find por âncora) indica em que linhas cada âncora aparece, e o padrão
+completo só roda nessas linhas e nas vizinhas.
+
+Como os padrões usam '.' (que não atravessa '\\n'), um match ocupa no máximo
+duas linhas consecutivas; a janela [linha anterior, linha seguinte] em torno
+de cada âncora contém, portanto, todos os matches possíveis. Com escopo por
+cláusula (core/clause_segmenter.py) a janela é limitada em caracteres e não
+sai da cláusula da âncora.
+"""
+
+import re
+from bisect import bisect_right
+from typing import Dict, FrozenSet, Iterable, List, Optional, Pattern, Set, Tuple
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+from core.clause_segmenter import Segmento
+from core.regex_budget import Orcamento
+
+try:
+    import ahocorasick
+    AHOCORASICK_DISPONIVEL = True
+except ImportError:
+    AHOCORASICK_DISPONIVEL = False
+
+# Âncoras mais curtas que isso aparecem em quase toda linha e não filtram nada
+TAMANHO_MINIMO_ANCORA = 3
+
+# Janelas por cláusula unidas não passam desse múltiplo da janela
+TAMANHO_MAXIMO_JANELA = 4
+
+
+def _literais_sequencia(itens) -> Optional[Set[str]]:
+    """
+    Melhor conjunto de literais obrigatórios de uma sequência de nós da regex
+    (o de menor literal mais longo), ou None se não houver nenhum.
+    """
+    candidatos: List[Set[str]] = []
+    trecho: List[str] = []
+
+    def _fechar_trecho():
+        if trecho:
+            candidatos.append({"".join(trecho)})
+            trecho.clear()
+
+    for operacao, argumento in itens:
+        if operacao is sre_constants.LITERAL:
+            trecho.append(chr(argumento))
+            continue
+        _fechar_trecho()
+        if operacao is sre_constants.SUBPATTERN:
+            encontrados = _literais_sequencia(argumento[-1])
+        elif operacao is sre_constants.BRANCH:
+            encontrados = set()
+            for alternativa in argumento[1]:
+                literais = _literais_sequencia(alternativa)
+                if literais is None:
+                    encontrados = None
+                    break
+                encontrados |= literais
+        elif operacao in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and argumento[0] >= 1:
+            encontrados = _literais_sequencia(argumento[2])
+        else:
+            encontrados = None
+        if encontrados:
+            candidatos.append(encontrados)
+    _fechar_trecho()
+
+    candidatos = [c for c in candidatos if min(map(len, c)) >= TAMANHO_MINIMO_ANCORA]
+    if not candidatos:
+        return None
+    return max(candidatos, key=lambda c: (min(map(len, c)), -len(c)))
+
+
+_SEM_LIMITE = 1 << 20
+_ESPACOS = set(" \t\n\r\f\v")
+
+
+def _conjunto_so_espacos(itens) -> bool:
+    return all(
+        (operacao is sre_constants.CATEGORY and argumento is sre_constants.CATEGORY_SPACE)
+        or (operacao is sre_constants.LITERAL and chr(argumento) in _ESPACOS)
+        for operacao, argumento in itens
+    )
+
+
+def _conjunto_aceita_quebra(itens) -> bool:
+    for operacao, argumento in itens:
+        if operacao is sre_constants.NEGATE:
+            return True
+        if operacao is sre_constants.LITERAL and argumento == 10:
+            return True
+        if operacao is sre_constants.RANGE and argumento[0] <= 10 <= argumento[1]:
+            return True
+        if operacao is sre_constants.CATEGORY and argumento in (
+            sre_constants.CATEGORY_SPACE, sre_constants.CATEGORY_NOT_WORD, sre_constants.CATEGORY_NOT_DIGIT,
+        ):
+            return True
+    return False
+
+
+def _quebras_possiveis(itens) -> int:
+    """
+    Quantas quebras de linha um match pode atravessar. No texto normalizado
+    espaços consecutivos viram um só caractere, então '\\s*' atravessa no máximo uma.
+    """
+    total = 0
+    for operacao, argumento in itens:
+        if operacao is sre_constants.LITERAL:
+            total += argumento == 10
+        elif operacao is sre_constants.NOT_LITERAL:
+            total += argumento != 10
+        elif operacao is sre_constants.IN:
+            total += _conjunto_aceita_quebra(argumento)
+        elif operacao is sre_constants.SUBPATTERN:
+            total += _quebras_possiveis(argumento[-1])
+        elif operacao is sre_constants.BRANCH:
+            total += max(_quebras_possiveis(alternativa) for alternativa in argumento[1])
+        elif operacao in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            _, maximo, corpo = argumento
+            quebras = _quebras_possiveis(corpo)
+            if quebras and maximo != 1:
+                so_espacos = len(corpo) == 1 and corpo[0][0] is sre_constants.IN and _conjunto_so_espacos(corpo[0][1])
+                quebras = quebras if so_espacos else _SEM_LIMITE
+            total += quebras
+        elif operacao in (sre_constants.ANY, sre_constants.AT):
+            continue
+        else:
+            # Lookarounds, referências a grupos etc.: sem garantia
+            return _SEM_LIMITE
+    return total
+
+
+def extrair_ancoras(padrao: Pattern, limitar_quebras: bool = True) -> Optional[FrozenSet[str]]:
+    """
+    Literais dos quais ao menos um aparece em todo match do padrão; None se não der para garantir.
+    Com `limitar_quebras`, exige também que o match caiba na janela de linhas (anterior/seguinte);
+    sem ele, as âncoras servem às janelas por cláusula, limitadas em caracteres.
+    """
+    if padrao.flags & (re.IGNORECASE | re.DOTALL | re.VERBOSE):
+        return None
+    try:
+        arvore = list(sre_parse.parse(padrao.pattern, padrao.flags))
+    except Exception:
+        return None
+    # A janela cobre a linha anterior e a seguinte: o match pode atravessar no máximo uma quebra
+    if limitar_quebras and _quebras_possiveis(arvore) > 1:
+        return None
+    literais = _literais_sequencia(arvore)
+    return frozenset(literais) if literais else None
+
+
+class BuscadorAncoras:
+    """Autômato com todas as âncoras de um conjunto de regras (montado uma vez, na carga das regras)."""
+
+    def __init__(self, ancoras: Iterable[str]):
+        self.ancoras = sorted(set(ancoras))
+        self._automato = None
+        if self.ancoras and AHOCORASICK_DISPONIVEL:
+            self._automato = ahocorasick.Automaton()
+            for ancora in self.ancoras:
+                self._automato.add_word(ancora, ancora)
+            self._automato.make_automaton()
+
+    def ocorrencias(self, texto: str) -> Dict[str, List[int]]:
+        """Posições (início) de cada âncora no texto, inclusive ocorrências sobrepostas."""
+        posicoes: Dict[str, List[int]] = {}
+        if self._automato is not None:
+            for fim, ancora in self._automato.iter(texto):
+                posicoes.setdefault(ancora, []).append(fim - len(ancora) + 1)
+            return posicoes
+        # Sem pyahocorasick: uma busca por âncora (str.find roda em C e ainda é mais
+        # rápida que uma regex com todas as âncoras em alternância)
+        for ancora in self.ancoras:
+            inicio = texto.find(ancora)
+            while inicio != -1:
+                posicoes.setdefault(ancora, []).append(inicio)
+                inicio = texto.find(ancora, inicio + 1)
+        return posicoes
+
+
+class TextoIndexado:
+    """
+    Texto normalizado de um documento com as posições de cada âncora; faz as
+    buscas dos padrões apenas nas janelas em torno das âncoras.
+
+    Sem segmentos, a janela vai da linha anterior à seguinte de cada âncora
+    (mesmo resultado que buscar no texto inteiro). Com segmentos (cláusulas),
+    a janela fica limitada a `janela` caracteres de cada lado da âncora e não
+    sai da cláusula: o custo cresce linearmente com o tamanho do documento.
+    Todas as buscas passam pelo `orcamento` (core/regex_budget.py).
+    """
+
+    def __init__(self, texto: str, buscador: Optional[BuscadorAncoras],
+                 segmentos: Optional[List[Segmento]] = None, janela: int = 0,
+                 orcamento: Optional[Orcamento] = None):
+        self.texto = texto
+        self.orcamento = orcamento or Orcamento()
+        self.segmentos = segmentos or None
+        self._inicios_segmento = [segmento.inicio for segmento in segmentos] if segmentos else []
+        self._janela = janela
+        self._janelas: Dict[FrozenSet[str], List[Tuple[int, int]]] = {}
+        self._ativo = buscador is not None
+        self._posicoes = buscador.ocorrencias(texto) if buscador is not None else {}
+        self._inicios_linha: List[int] = []
+        if self.segmentos is None and self._ativo:
+            self._inicios_linha = [0] + [m.end() for m in re.finditer("\n", texto)]
+
+    def segmento_em(self, posicao: int) -> Optional[Segmento]:
+        """Segmento (cláusula) que contém a posição do texto normalizado."""
+        if not self.segmentos:
+            return None
+        return self.segmentos[max(0, bisect_right(self._inicios_segmento, posicao) - 1)]
+
+    def janelas(self, ancoras: FrozenSet[str]) -> List[Tuple[int, int]]:
+        """Intervalos [inicio, fim) onde o padrão pode casar, ordenados pelo início."""
+        if ancoras not in self._janelas:
+            if self.segmentos:
+                self._janelas[ancoras] = self._janelas_clausula(ancoras)
+            else:
+                self._janelas[ancoras] = self._janelas_linha(ancoras)
+        return self._janelas[ancoras]
+
+    def _janelas_clausula(self, ancoras: FrozenSet[str]) -> List[Tuple[int, int]]:
+        candidatos = set()
+        for ancora in ancoras:
+            for posicao in self._posicoes.get(ancora, ()):
+                indice = max(0, bisect_right(self._inicios_segmento, posicao) - 1)
+                segmento = self.segmentos[indice]
+                candidatos.add((
+                    max(segmento.inicio, posicao - self._janela),
+                    min(segmento.fim, posicao + len(ancora) + self._janela),
+                    indice,
+                ))
+        # Janelas sobrepostas da mesma cláusula viram uma só busca, sem passar de
+        # TAMANHO_MAXIMO_JANELA janelas (uma busca nunca percorre um trecho ilimitado)
+        limite = self._janela * TAMANHO_MAXIMO_JANELA
+        intervalos: List[Tuple[int, int, int]] = []
+        for inicio, fim, indice in sorted(candidatos):
+            if (intervalos and intervalos[-1][2] == indice and intervalos[-1][1] >= inicio
+                    and fim - intervalos[-1][0] <= limite):
+                intervalos[-1] = (intervalos[-1][0], max(intervalos[-1][1], fim), indice)
+            else:
+                intervalos.append((inicio, fim, indice))
+        return [(inicio, fim) for inicio, fim, _ in intervalos]
+
+    def _janelas_linha(self, ancoras: FrozenSet[str]) -> List[Tuple[int, int]]:
+        ultima_linha = len(self._inicios_linha) - 1
+        linhas = set()
+        for ancora in ancoras:
+            for posicao in self._posicoes.get(ancora, ()):
+                linha = bisect_right(self._inicios_linha, posicao) - 1
+                linhas.update((max(0, linha - 1), linha, min(ultima_linha, linha + 1)))
+
+        intervalos: List[Tuple[int, int]] = []
+        for linha in sorted(linhas):
+            inicio = self._inicios_linha[linha]
+            fim = self._inicios_linha[linha + 1] if linha < ultima_linha else len(self.texto)
+            if intervalos and intervalos[-1][1] >= inicio:
+                intervalos[-1] = (intervalos[-1][0], fim)
+            else:
+                intervalos.append((inicio, fim))
+        return intervalos
+
+    def buscar(self, padrao: Pattern, ancoras: Optional[FrozenSet[str]],
+               ancoras_janela: Optional[FrozenSet[str]] = None) -> Optional["re.Match"]:
+        """
+        Primeiro match do padrão (o mais à esquerda), procurando só nas janelas das âncoras
+        (`ancoras_janela` no escopo por cláusula, onde a janela não depende das linhas).
+        """
+        if self.segmentos:
+            ancoras = ancoras_janela or ancoras
+        if not self._ativo or not ancoras:
+            if not self.segmentos:
+                return self.orcamento.buscar(padrao, self.texto)
+            for segmento in self.segmentos:
+                match = self.orcamento.buscar(padrao, self.texto, segmento.inicio, segmento.fim)
+                if match:
+                    return match
+            return None
+
+        melhor = None
+        for inicio, fim in self.janelas(ancoras):
+            # Janelas podem se sobrepor: para quando nenhuma outra pode ter match mais à esquerda
+            if melhor is not None and inicio >= melhor.start():
+                break
+            match = self.orcamento.buscar(padrao, self.texto, inicio, fim)
+            if match and (melhor is None or match.start() < melhor.start()):
+                melhor = match
+        return melhor
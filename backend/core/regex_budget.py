@@ -0,0 +1,99 @@
+# core/regex_budget.py
+
+"""
+Orçamento de tempo para as buscas das regras.
+
+Com o módulo `regex` instalado, os padrões também são compilados com ele e
+cada busca recebe `timeout` = tempo que resta do orçamento: um padrão com
+backtracking catastrófico é interrompido no meio da busca. Sem ele, o prazo
+é conferido antes de cada busca (entre janelas/cláusulas), o que limita o
+estrago ao tamanho de uma janela.
+
+O prazo do documento conta desde a entrada na avaliação (antes da
+segmentação e da varredura de âncoras). As buscas param em
+FRACAO_BUSCAS dele; o resto fica para montar os pontos de atenção (trecho
+original, contexto) dentro do mesmo prazo.
+"""
+
+import re
+import time
+from typing import Optional, Pattern
+
+try:
+    import regex
+    REGEX_DISPONIVEL = True
+except ImportError:
+    REGEX_DISPONIVEL = False
+
+# Parte do orçamento do documento disponível para as buscas
+FRACAO_BUSCAS = 0.85
+
+
+class OrcamentoExcedido(Exception):
+    """A regra (ou o documento) passou do tempo permitido."""
+
+    def __init__(self, motivo: str):
+        super().__init__(motivo)
+        self.motivo = motivo  # "regra" ou "documento"
+
+
+def compilar_execucao(padrao: Pattern):
+    """Versão do padrão usada nas buscas: `regex` (com timeout) se disponível, senão o próprio `re`."""
+    if not REGEX_DISPONIVEL:
+        return padrao
+    try:
+        return regex.compile(padrao.pattern, padrao.flags)
+    except (regex.error, ValueError):
+        return padrao
+
+
+class Orcamento:
+    """Prazos de uma avaliação: um por documento e um por regra (segundos; None = sem limite)."""
+
+    __slots__ = ("limite_regra", "limite_documento", "_prazo_documento", "_prazo_final", "_prazo_regra")
+
+    def __init__(self, limite_regra: Optional[float] = None, limite_documento: Optional[float] = None):
+        self.limite_regra = limite_regra
+        self.limite_documento = limite_documento
+        agora = time.perf_counter()
+        # Buscas até _prazo_documento; montagem dos pontos até _prazo_final
+        self._prazo_documento = agora + limite_documento * FRACAO_BUSCAS if limite_documento else None
+        self._prazo_final = agora + limite_documento if limite_documento else None
+        self._prazo_regra = None
+
+    def iniciar_regra(self):
+        self._prazo_regra = time.perf_counter() + self.limite_regra if self.limite_regra else None
+
+    def documento_esgotado(self) -> bool:
+        """Acabou o tempo das buscas."""
+        return self._prazo_documento is not None and time.perf_counter() >= self._prazo_documento
+
+    def prazo_final_esgotado(self) -> bool:
+        """Acabou o tempo do documento inteiro (buscas e montagem dos pontos)."""
+        return self._prazo_final is not None and time.perf_counter() >= self._prazo_final
+
+    def _restante(self) -> Optional[float]:
+        """Segundos até o prazo mais próximo; levanta OrcamentoExcedido se já passou."""
+        if self._prazo_documento is None and self._prazo_regra is None:
+            return None
+        agora = time.perf_counter()
+        restante, motivo = None, ""
+        if self._prazo_regra is not None:
+            restante, motivo = self._prazo_regra - agora, "regra"
+        if self._prazo_documento is not None and (restante is None or self._prazo_documento - agora < restante):
+            restante, motivo = self._prazo_documento - agora, "documento"
+        if restante <= 0:
+            raise OrcamentoExcedido(motivo)
+        return restante
+
+    def buscar(self, padrao, texto: str, inicio: int = 0, fim: Optional[int] = None):
+        """padrao.search dentro do orçamento. Levanta OrcamentoExcedido."""
+        fim = len(texto) if fim is None else fim
+        restante = self._restante()
+        if restante is None or not REGEX_DISPONIVEL or isinstance(padrao, re.Pattern):
+            return padrao.search(texto, inicio, fim)
+        try:
+            return padrao.search(texto, inicio, fim, timeout=restante)
+        except TimeoutError:
+            self._restante()
+            raise OrcamentoExcedido("regra")
@@ -0,0 +1,537 @@
+# core/rule_engine.py
+
+"""
+Motor de regras declarativo: lê rules/risk_rules.yaml uma única vez,
+pré-compila todos os padrões e avalia as regras como dados.
+
+A versão das regras é o SHA-256 do arquivo; quando o arquivo muda em disco
+(mtime), o conjunto é recarregado na próxima análise, sem reiniciar a API.
+
+Cada regra e cada documento têm um orçamento de tempo (core/regex_budget.py);
+regras que estouram são informadas em `regras_interrompidas` em vez de travar
+a análise.
+"""
+
+import hashlib
+import json
+import logging
+import operator
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Pattern, Tuple, Union
+
+import yaml
+
+from core.clause_segmenter import segmentar_clausulas
+from core.normalizer import TextoNormalizado, normalizar_texto
+from core.page_index import contexto
+from core.prefilter import BuscadorAncoras, TextoIndexado, extrair_ancoras
+from core.regex_budget import Orcamento, OrcamentoExcedido, compilar_execucao
+from core.rule_profile import perfil_habilitado, perfil_regras
+
+CAMINHO_REGRAS_PADRAO = Path(__file__).resolve().parent.parent / "rules" / "risk_rules.yaml"
+
+TIPOS_REGRA = {"regex_match", "absence", "count"}
+
+_OPERADORES = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+# Campo do YAML -> campo do ponto de atenção devolvido (na ordem de exibição)
+_CAMPOS_PONTO = (
+    ("level", "tipo"),
+    ("category", "categoria"),
+    ("description", "descricao"),
+    ("rationale", "impacto"),
+    ("legal_basis", "artigo_legal"),
+    ("recommendation", "recomendacao"),
+)
+
+# Padrão compilado (módulo `regex` quando disponível) + âncoras do pré-filtro para as janelas
+# por linha e por cláusula (None: busca no texto/cláusula inteira)
+PadraoRegra = Tuple[Pattern, Optional[FrozenSet[str]], Optional[FrozenSet[str]]]
+
+_conjunto_atual = None
+_mtime_com_erro: Optional[int] = None
+_lock_recarga = threading.Lock()
+
+
+class Condicao:
+    """Comparação numérica sobre um grupo capturado (ex.: grupo 1 < 60, em meses)."""
+
+    __slots__ = ("grupo", "comparar", "valor", "grupo_fator", "fatores")
+
+    def __init__(self, dados: Dict, regra_id: str):
+        try:
+            self.grupo = int(dados["group"])
+            self.comparar = _OPERADORES[dados["op"]]
+            self.valor = float(dados["value"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Regra '{regra_id}': condição inválida {dados!r}")
+        multiplicar = dados.get("multiply_by") or {}
+        self.grupo_fator = int(multiplicar["group"]) if multiplicar else None
+        self.fatores = {str(k): float(v) for k, v in (multiplicar.get("values") or {}).items()}
+
+    def avaliar(self, match: "re.Match") -> bool:
+        numero = valor_numerico(match.group(self.grupo))
+        if not isinstance(numero, (int, float)):
+            return False
+        if self.grupo_fator is not None:
+            numero *= self.fatores.get(match.group(self.grupo_fator) or "", 1)
+        return self.comparar(numero, self.valor)
+
+
+class Regra:
+    """Uma regra do YAML, com os padrões já compilados."""
+
+    __slots__ = (
+        "id", "nome", "tipo", "peso", "padroes", "exige", "proibe", "condicoes",
+        "qualquer_condicao", "grupo_excluido", "itens", "min_itens", "campos", "digital",
+    )
+
+    def __init__(self, dados: Dict):
+        self.id = str(dados.get("id") or dados.get("name") or "").strip()
+        if not self.id:
+            raise ValueError("Regra sem 'id'.")
+        self.nome = dados.get("name", self.id)
+        self.tipo = dados.get("type", "regex_match")
+        if self.tipo not in TIPOS_REGRA:
+            raise ValueError(f"Regra '{self.id}': tipo desconhecido '{self.tipo}'.")
+        try:
+            self.peso = int(dados["risk_score"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Regra '{self.id}': 'risk_score' ausente ou inválido.")
+
+        padroes = dados.get("patterns") or ([dados["pattern"]] if dados.get("pattern") else [])
+        self.padroes = [_compilar(p, self.id) for p in padroes]
+        self.exige = [_compilar(p, self.id) for p in dados.get("requires") or []]
+        self.proibe = [_compilar(p, self.id) for p in dados.get("forbids") or []]
+        self.condicoes = [Condicao(c, self.id) for c in dados.get("conditions") or []]
+        self.qualquer_condicao = [Condicao(c, self.id) for c in dados.get("any_conditions") or []]
+
+        excluido = dados.get("group_not_matching")
+        self.grupo_excluido = (int(excluido["group"]), _compilar(excluido["pattern"], self.id)) if excluido else None
+
+        self.itens = [(item["label"], _compilar(item["pattern"], self.id)) for item in dados.get("items") or []]
+        self.min_itens = int(dados.get("min_items", 1))
+
+        if self.tipo == "count" and not self.itens:
+            raise ValueError(f"Regra '{self.id}': tipo 'count' exige 'items'.")
+        if self.tipo != "count" and not self.padroes:
+            raise ValueError(f"Regra '{self.id}': nenhum padrão definido.")
+
+        # Impressão digital de tudo que muda o ponto de atenção (o peso só muda o score)
+        definicao = {chave: valor for chave, valor in dados.items() if chave != "risk_score"}
+        self.digital = hashlib.sha256(
+            json.dumps(definicao, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+
+        self.campos = {}
+        for campo_yaml, campo_ponto in _CAMPOS_PONTO:
+            valor = dados.get(campo_yaml)
+            if campo_yaml == "description" and not valor:
+                valor = self.nome
+            if valor:
+                self.campos[campo_ponto] = str(valor)
+        for obrigatorio in ("tipo", "categoria"):
+            if obrigatorio not in self.campos:
+                raise ValueError(f"Regra '{self.id}': campo obrigatório ausente ({obrigatorio}).")
+
+    def ancoras(self) -> List[str]:
+        """Todas as âncoras usadas pelos padrões da regra."""
+        padroes = self.padroes + self.exige + self.proibe + [padrao for _, padrao in self.itens]
+        return [ancora for padrao in padroes for ancoras in padrao[1:] if ancoras for ancora in ancoras]
+
+    def verificar(self, documento: TextoIndexado) -> Optional[Tuple[Optional["re.Match"], List[str]]]:
+        """(match, itens encontrados) se a regra disparar, ou None. Não monta o ponto de atenção."""
+        if self.tipo == "count":
+            encontrados = [rotulo for rotulo, padrao in self.itens if documento.buscar(*padrao)]
+            if len(encontrados) < self.min_itens:
+                return None
+            return None, encontrados
+
+        if any(not documento.buscar(*padrao) for padrao in self.exige):
+            return None
+        match = None
+        for padrao in self.padroes:
+            match = documento.buscar(*padrao)
+            if match:
+                break
+
+        if self.tipo == "absence":
+            return None if match else (None, [])
+        if not match:
+            return None
+        if any(documento.buscar(*padrao) for padrao in self.proibe):
+            return None
+        if not all(condicao.avaliar(match) for condicao in self.condicoes):
+            return None
+        if self.qualquer_condicao and not any(condicao.avaliar(match) for condicao in self.qualquer_condicao):
+            return None
+        if self.grupo_excluido:
+            grupo, padrao = self.grupo_excluido
+            if documento.orcamento.buscar(padrao[0], match.group(grupo) or ""):
+                return None
+        return match, []
+
+    def _ponto(self, texto: TextoNormalizado, documento: TextoIndexado,
+               match: Optional["re.Match"], itens: List[str]) -> Dict:
+        ponto = dict(self.campos)
+        grupos, originais, numeros = [], [], []
+        if match:
+            for indice in range(match.re.groups + 1):
+                valor = match.group(indice) or ""
+                grupos.append(valor)
+                originais.append(texto.trecho_original(*match.span(indice)).lower() if valor else "")
+                numeros.append(valor_numerico(valor))
+        try:
+            ponto["descricao"] = ponto["descricao"].format(g=grupos, o=originais, n=numeros, items=", ".join(itens))
+        except (IndexError, KeyError, ValueError):
+            logging.warning("Regra '%s': descrição com campos inválidos", self.id)
+        if match:
+            # Posições no texto original: página/linha são completadas por core/page_index.py
+            inicio, fim = texto.intervalo_original(*match.span())
+            ponto["localizacao"] = {"inicio": inicio, "fim": fim}
+            ponto["contexto"], ponto["destaque"] = contexto(texto.original, inicio, fim)
+        segmento = documento.segmento_em(match.start()) if match else None
+        if segmento is not None:
+            ponto["clausula"] = segmento.id
+            if segmento.titulo:
+                ponto["clausula_titulo"] = segmento.titulo
+        ponto["regra"] = self.id
+        return ponto
+
+
+class ConjuntoRegras:
+    """Regras carregadas de um arquivo, com a versão e a tabela de classificação."""
+
+    __slots__ = ("regras", "niveis", "score_maximo", "versao", "caminho", "mtime", "carregado_em", "buscador", "digitais")
+
+    def __init__(self, regras: List[Regra], niveis: List[Tuple[int, str, str]], score_maximo: int,
+                 versao: str, caminho: str, mtime: Optional[int]):
+        self.regras = regras
+        self.niveis = niveis
+        self.score_maximo = score_maximo
+        self.versao = versao
+        self.caminho = caminho
+        self.mtime = mtime
+        self.carregado_em = time.time()
+        # Autômato com as âncoras de todas as regras, varrido uma vez por documento
+        self.buscador = BuscadorAncoras(ancora for regra in regras for ancora in regra.ancoras())
+        self.digitais = {regra.id: regra.digital for regra in regras}
+
+    def classificar(self, score: int) -> Tuple[str, str]:
+        """(nivel_risco, recomendacao_geral) para o score."""
+        for minimo, nivel, recomendacao in self.niveis:
+            if score >= minimo:
+                return nivel, recomendacao
+        return "BAIXO", ""
+
+    def resumo(self) -> Dict:
+        return {
+            "versao": self.versao,
+            "total_regras": len(self.regras),
+            "arquivo": self.caminho,
+            "carregado_em": self.carregado_em,
+        }
+
+
+def _compilar(padrao: str, regra_id: str) -> PadraoRegra:
+    try:
+        compilado = re.compile(padrao)
+        return (
+            compilar_execucao(compilado),
+            extrair_ancoras(compilado),
+            extrair_ancoras(compilado, limitar_quebras=False),
+        )
+    except (re.error, TypeError) as e:
+        raise ValueError(f"Regra '{regra_id}': padrão inválido {padrao!r} ({e})")
+
+
+def valor_numerico(valor: Optional[str]) -> Union[int, float, str]:
+    """Valor numérico do grupo (int quando possível); o próprio texto se não for número."""
+    if not valor:
+        return ""
+    try:
+        return int(valor)
+    except ValueError:
+        try:
+            return float(valor)
+        except ValueError:
+            return valor
+
+
+def _caminho_regras() -> str:
+    return os.getenv("REGRAS_ARQUIVO") or str(CAMINHO_REGRAS_PADRAO)
+
+
+def _mtime(caminho: str) -> Optional[int]:
+    try:
+        return os.stat(caminho).st_mtime_ns
+    except OSError:
+        return None
+
+
+def carregar_regras(caminho: Optional[str] = None) -> ConjuntoRegras:
+    """Lê, valida e compila o arquivo de regras. Levanta ValueError se ele for inválido."""
+    caminho = caminho or _caminho_regras()
+    mtime = _mtime(caminho)
+    with open(caminho, "rb") as arquivo:
+        conteudo = arquivo.read()
+    try:
+        dados = yaml.safe_load(conteudo) or {}
+    except yaml.YAMLError as e:
+        raise ValueError(f"YAML de regras inválido: {e}")
+
+    regras = [Regra(item) for item in dados.get("rules") or []]
+    ids = [regra.id for regra in regras]
+    duplicados = {i for i in ids if ids.count(i) > 1}
+    if duplicados:
+        raise ValueError(f"IDs de regra duplicados: {', '.join(sorted(duplicados))}")
+
+    niveis = sorted(
+        ((int(n["min_score"]), str(n["level"]), str(n.get("recommendation", ""))) for n in dados.get("levels") or []),
+        reverse=True,
+    )
+    score_maximo = int(dados.get("max_score", 100))
+    versao = hashlib.sha256(conteudo).hexdigest()
+    return ConjuntoRegras(regras, niveis, score_maximo, versao, caminho, mtime)
+
+
+def obter_regras() -> ConjuntoRegras:
+    """
+    Conjunto de regras em uso. Se o arquivo mudou desde a última carga, recarrega;
+    se a nova versão for inválida, mantém a anterior e registra o erro.
+    """
+    global _conjunto_atual, _mtime_com_erro
+    caminho = _caminho_regras()
+    mtime = _mtime(caminho)
+    atual = _conjunto_atual
+    if atual is not None and atual.caminho == caminho and mtime in (atual.mtime, _mtime_com_erro):
+        return atual
+
+    with _lock_recarga:
+        atual = _conjunto_atual
+        if atual is not None and atual.caminho == caminho and mtime in (atual.mtime, _mtime_com_erro):
+            return atual
+        try:
+            _conjunto_atual = carregar_regras(caminho)
+            _mtime_com_erro = None
+            logging.info("Regras carregadas: %s regras, versão %s", len(_conjunto_atual.regras), _conjunto_atual.versao[:12])
+        except (OSError, ValueError) as e:
+            if _conjunto_atual is None:
+                raise
+            _mtime_com_erro = mtime
+            logging.error("Falha ao recarregar regras (%s); mantendo versão %s", e, _conjunto_atual.versao[:12])
+        return _conjunto_atual
+
+
+def recarregar_regras() -> ConjuntoRegras:
+    """Força a recarga do arquivo de regras. Levanta ValueError/OSError se for inválido."""
+    global _conjunto_atual, _mtime_com_erro
+    with _lock_recarga:
+        _conjunto_atual = carregar_regras()
+        _mtime_com_erro = None
+    logging.info("Regras recarregadas: %s regras, versão %s", len(_conjunto_atual.regras), _conjunto_atual.versao[:12])
+    return _conjunto_atual
+
+
+def _config_busca() -> Tuple[bool, bool, int]:
+    """Lê do ambiente: pré-filtro por âncoras, escopo por cláusula e tamanho da janela (caracteres)."""
+    prefiltro = os.getenv("REGRAS_PREFILTRO", "true").lower() in {"1", "true", "yes"}
+    escopo_clausula = os.getenv("REGRAS_ESCOPO_CLAUSULA", "true").lower() in {"1", "true", "yes"}
+    try:
+        janela = int(os.getenv("REGRAS_JANELA_CARACTERES", "500"))
+    except ValueError:
+        janela = 500
+    return prefiltro, escopo_clausula, max(50, janela)
+
+
+def _config_orcamento() -> Tuple[Optional[float], Optional[float]]:
+    """Orçamentos (s) por regra e por documento; 0 desativa o limite."""
+    limites = []
+    for variavel, padrao in (("REGRAS_ORCAMENTO_REGRA_MS", 250), ("REGRAS_ORCAMENTO_DOCUMENTO_MS", 3000)):
+        try:
+            valor = float(os.getenv(variavel, str(padrao)))
+        except ValueError:
+            valor = float(padrao)
+        limites.append(valor / 1000 if valor > 0 else None)
+    return limites[0], limites[1]
+
+
+def preparar_documento(normalizado: TextoNormalizado, conjunto: ConjuntoRegras,
+                       usar_prefiltro: Optional[bool] = None,
+                       escopo_clausula: Optional[bool] = None,
+                       orcamento: Optional[Orcamento] = None) -> TextoIndexado:
+    """
+    Indexa o texto para as buscas das regras (âncoras, cláusulas e orçamento de tempo).
+    Sem `orcamento`, o prazo do documento começa aqui, antes da segmentação.
+    """
+    orcamento = orcamento or Orcamento(*_config_orcamento())
+    prefiltro_padrao, escopo_padrao, janela = _config_busca()
+    usar_prefiltro = prefiltro_padrao if usar_prefiltro is None else usar_prefiltro
+    escopo_clausula = escopo_padrao if escopo_clausula is None else escopo_clausula
+    segmentos = segmentar_clausulas(normalizado) if escopo_clausula else None
+    return TextoIndexado(
+        normalizado.texto, conjunto.buscador if usar_prefiltro else None, segmentos, janela, orcamento,
+    )
+
+
+def verificar_regras(documento: TextoIndexado, conjunto: ConjuntoRegras, regras: Optional[List[Regra]] = None):
+    """
+    Gera (regra, disparo, motivo) para cada regra (todas as do conjunto ou só `regras`), em ordem:
+    `disparo` é o retorno de Regra.verificar e `motivo` ("regra"/"documento") indica estouro do orçamento.
+    """
+    regras = conjunto.regras if regras is None else regras
+    if perfil_habilitado():
+        yield from _verificar_com_perfil(documento, regras)
+        return
+    orcamento = documento.orcamento
+    for regra in regras:
+        if orcamento.documento_esgotado():
+            yield regra, None, "documento"
+            continue
+        orcamento.iniciar_regra()
+        try:
+            disparo = regra.verificar(documento)
+        except OrcamentoExcedido as e:
+            logging.warning("Regra '%s' interrompida: orçamento de tempo (%s) excedido", regra.id, e.motivo)
+            yield regra, None, e.motivo
+            continue
+        yield regra, disparo, None
+
+
+def _verificar_com_perfil(documento: TextoIndexado, regras: List[Regra]):
+    """Mesmo que verificar_regras, medindo tempo, disparos e tamanho do trecho de cada regra."""
+    orcamento = documento.orcamento
+    perfil_regras.registrar_documento()
+    for regra in regras:
+        categoria = regra.campos["categoria"]
+        if orcamento.documento_esgotado():
+            perfil_regras.registrar(regra.id, categoria, 0.0, False, interrompida=True)
+            yield regra, None, "documento"
+            continue
+        orcamento.iniciar_regra()
+        inicio = time.perf_counter()
+        try:
+            disparo = regra.verificar(documento)
+        except OrcamentoExcedido as e:
+            perfil_regras.registrar(regra.id, categoria, time.perf_counter() - inicio, False, interrompida=True)
+            logging.warning("Regra '%s' interrompida: orçamento de tempo (%s) excedido", regra.id, e.motivo)
+            yield regra, None, e.motivo
+            continue
+        tempo = time.perf_counter() - inicio
+        match = disparo[0] if disparo else None
+        perfil_regras.registrar(regra.id, categoria, tempo, disparo is not None, match.end() - match.start() if match else 0)
+        yield regra, disparo, None
+
+
+def avaliar_regras(texto: Union[str, TextoNormalizado], conjunto: Optional[ConjuntoRegras] = None,
+                   usar_prefiltro: Optional[bool] = None, escopo_clausula: Optional[bool] = None) -> Dict:
+    """
+    Aplica todas as regras ao texto e calcula score, nível de risco e pontos de atenção.
+    Com escopo por cláusula, cada padrão só casa dentro de uma cláusula e perto de suas âncoras.
+    """
+    conjunto = conjunto or obter_regras()
+    pontos, interrompidas = _aplicar(texto, conjunto, None, usar_prefiltro, escopo_clausula)
+    return _montar_resultado(conjunto, pontos, interrompidas)
+
+
+def _aplicar(texto: Union[str, TextoNormalizado], conjunto: ConjuntoRegras, regras: Optional[List[Regra]],
+             usar_prefiltro: Optional[bool] = None,
+             escopo_clausula: Optional[bool] = None) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+    """
+    Pontos de atenção e interrupções por id de regra. O orçamento do documento
+    cobre tudo a partir daqui: normalização, segmentação, buscas e pontos.
+    """
+    orcamento = Orcamento(*_config_orcamento())
+    normalizado = texto if isinstance(texto, TextoNormalizado) else normalizar_texto(texto)
+    documento = preparar_documento(normalizado, conjunto, usar_prefiltro, escopo_clausula, orcamento)
+    disparos, interrompidas = [], {}
+    for regra, disparo, motivo in verificar_regras(documento, conjunto, regras):
+        if motivo is not None:
+            interrompidas[regra.id] = {"id": regra.id, "categoria": regra.campos["categoria"], "motivo": motivo}
+        elif disparo is not None:
+            disparos.append((regra, disparo))
+    pontos = {}
+    for regra, disparo in disparos:
+        if orcamento.prazo_final_esgotado():
+            logging.warning("Regra '%s' interrompida: orçamento de tempo (documento) excedido ao montar o ponto", regra.id)
+            interrompidas[regra.id] = {"id": regra.id, "categoria": regra.campos["categoria"], "motivo": "documento"}
+            continue
+        pontos[regra.id] = regra._ponto(normalizado, documento, *disparo)
+    return pontos, interrompidas
+
+
+def _montar_resultado(conjunto: ConjuntoRegras, pontos: Dict[str, Dict], interrompidas: Dict[str, Dict]) -> Dict:
+    """Score, nível e pontos de atenção (na ordem das regras) a partir dos pontos por regra."""
+    score = 0
+    pontos_atencao = []
+    regras_interrompidas = []
+    for regra in conjunto.regras:
+        if regra.id in pontos:
+            score += regra.peso
+            pontos_atencao.append(pontos[regra.id])
+        elif regra.id in interrompidas:
+            regras_interrompidas.append(interrompidas[regra.id])
+
+    nivel_risco, recomendacao_geral = conjunto.classificar(score)
+    return {
+        "score": min(score, conjunto.score_maximo),
+        "nivel_risco": nivel_risco,
+        "pontos_atencao": pontos_atencao,
+        "total_clausulas_problematicas": len(pontos_atencao),
+        "recomendacao_geral": recomendacao_geral,
+        "categorias_afetadas": list(set([p["categoria"] for p in pontos_atencao])),
+        "versao_regras": conjunto.versao,
+        "regras_interrompidas": regras_interrompidas,
+        "digitais_regras": conjunto.digitais,
+    }
+
+
+def regras_afetadas(anterior: Dict, conjunto: ConjuntoRegras) -> Optional[List[Regra]]:
+    """
+    Regras que precisam rodar de novo para atualizar um resultado salvo: as novas e as
+    alteradas (impressão digital diferente) e as que foram interrompidas. None se o
+    resultado não tiver as informações necessárias (resultado antigo): reavaliar tudo.
+    """
+    digitais = anterior.get("digitais_regras")
+    pontos = anterior.get("pontos_atencao") or []
+    if not isinstance(digitais, dict) or any("regra" not in ponto for ponto in pontos):
+        return None
+    interrompidas = {item.get("id") for item in anterior.get("regras_interrompidas") or []}
+    return [regra for regra in conjunto.regras if digitais.get(regra.id) != regra.digital or regra.id in interrompidas]
+
+
+def reavaliar_regras(anterior: Dict, texto: Optional[Union[str, TextoNormalizado]],
+                     conjunto: Optional[ConjuntoRegras] = None) -> Optional[Dict]:
+    """
+    Atualiza um resultado salvo para o conjunto atual rodando só as regras afetadas;
+    as demais mantêm o ponto de atenção anterior e o score é recalculado com os pesos atuais.
+    `texto` só é usado se alguma regra precisar rodar; None se ele for necessário e faltar.
+    """
+    conjunto = conjunto or obter_regras()
+    afetadas = regras_afetadas(anterior, conjunto)
+    if afetadas is None:
+        return avaliar_regras(texto, conjunto) if texto is not None else None
+
+    ids_afetados = {regra.id for regra in afetadas}
+    pontos = {ponto["regra"]: ponto for ponto in anterior.get("pontos_atencao") or [] if ponto["regra"] not in ids_afetados}
+    interrompidas = {
+        item["id"]: item for item in anterior.get("regras_interrompidas") or [] if item.get("id") not in ids_afetados
+    }
+    if afetadas:
+        if texto is None:
+            return None
+        novos_pontos, novas_interrompidas = _aplicar(texto, conjunto, afetadas)
+        pontos.update(novos_pontos)
+        interrompidas.update(novas_interrompidas)
+    return _montar_resultado(conjunto, pontos, interrompidas)
@@ -0,0 +1,186 @@
+# core/rule_matrix.py
+
+"""
+Avaliação das regras em lote: muitos contratos de uma vez, com o resultado
+em colunas (contratos x regras) em vez de um dict por contrato.
+
+As regex rodam uma única vez por contrato; depois disso score e nível de
+risco são somas ponderadas vetorizadas (NumPy) sobre a matriz de disparos,
+então recalcular a carteira inteira com outros pesos leva milissegundos.
+A matriz pode ser salva em disco (.npz) e recarregada para novos cenários
+de pesos sem reler os contratos. pandas é opcional (para_dataframe).
+"""
+
+import logging
+from typing import Iterable, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    import pandas as pd
+    PANDAS_DISPONIVEL = True
+except ImportError:
+    PANDAS_DISPONIVEL = False
+
+from core.normalizer import normalizar_texto
+from core.rule_engine import ConjuntoRegras, obter_regras, preparar_documento, valor_numerico, verificar_regras
+
+
+class MatrizRegras:
+    """
+    Resultado de um lote: `disparos` (bool) e `interrompidas` (bool) têm uma linha
+    por contrato e uma coluna por regra; `numeros` traz o primeiro valor numérico
+    capturado pela regra (ou a quantidade de itens, nas regras 'count'; NaN se nenhum).
+    """
+
+    __slots__ = (
+        "contratos", "regras", "pesos", "disparos", "numeros", "interrompidas",
+        "score_maximo", "niveis", "versao_regras",
+    )
+
+    def __init__(self, contratos: List[str], regras: List[str], pesos: np.ndarray, disparos: np.ndarray,
+                 numeros: np.ndarray, interrompidas: np.ndarray, score_maximo: int,
+                 niveis: List[Tuple[int, str]], versao_regras: str):
+        self.contratos = contratos
+        self.regras = regras
+        self.pesos = pesos
+        self.disparos = disparos
+        self.numeros = numeros
+        self.interrompidas = interrompidas
+        self.score_maximo = score_maximo
+        self.niveis = niveis
+        self.versao_regras = versao_regras
+
+    def vetor_pesos(self, pesos: Optional[Mapping[str, float]] = None) -> np.ndarray:
+        """Pesos na ordem das colunas; `pesos` substitui os do arquivo só para as regras informadas."""
+        if not pesos:
+            return self.pesos
+        desconhecidas = set(pesos) - set(self.regras)
+        if desconhecidas:
+            raise ValueError(f"Regras desconhecidas: {', '.join(sorted(desconhecidas))}")
+        vetor = self.pesos.copy()
+        for indice, regra_id in enumerate(self.regras):
+            if regra_id in pesos:
+                vetor[indice] = pesos[regra_id]
+        return vetor
+
+    def scores(self, pesos: Optional[Mapping[str, float]] = None) -> np.ndarray:
+        """Score de cada contrato (soma ponderada dos disparos, limitada ao score máximo)."""
+        return np.minimum(self.disparos @ self.vetor_pesos(pesos), self.score_maximo)
+
+    def niveis_risco(self, scores: np.ndarray) -> np.ndarray:
+        """Nível de risco de cada score, pela mesma tabela do arquivo de regras."""
+        if not self.niveis:
+            return np.full(len(scores), "BAIXO", dtype=object)
+        minimos = np.array([minimo for minimo, _ in reversed(self.niveis)], dtype=np.float64)
+        nomes = np.array(["BAIXO"] + [nivel for _, nivel in reversed(self.niveis)], dtype=object)
+        return nomes[np.searchsorted(minimos, scores, side="right")]
+
+    def reclassificar(self, pesos: Optional[Mapping[str, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(scores, níveis) de todos os contratos com outros pesos, sem rodar as regex de novo."""
+        scores = self.scores(pesos)
+        return scores, self.niveis_risco(scores)
+
+    def para_dataframe(self, pesos: Optional[Mapping[str, float]] = None):
+        """Tabela pandas: contrato, score, nivel_risco e uma coluna booleana por regra (+ '<id>__valor')."""
+        if not PANDAS_DISPONIVEL:
+            raise ImportError("pandas não está instalado.")
+        scores, niveis = self.reclassificar(pesos)
+        colunas = {"contrato": self.contratos, "score": scores, "nivel_risco": niveis}
+        for indice, regra_id in enumerate(self.regras):
+            colunas[regra_id] = self.disparos[:, indice]
+        for indice, regra_id in enumerate(self.regras):
+            if not np.isnan(self.numeros[:, indice]).all():
+                colunas[f"{regra_id}__valor"] = self.numeros[:, indice]
+        return pd.DataFrame(colunas)
+
+    def salvar(self, caminho: str):
+        """Grava a matriz num .npz (reaproveitável para novos cenários de pesos)."""
+        np.savez_compressed(
+            caminho,
+            contratos=np.array(self.contratos, dtype=str),
+            regras=np.array(self.regras, dtype=str),
+            pesos=self.pesos,
+            disparos=self.disparos,
+            numeros=self.numeros,
+            interrompidas=self.interrompidas,
+            score_maximo=np.array(self.score_maximo),
+            niveis_minimos=np.array([minimo for minimo, _ in self.niveis], dtype=np.int64),
+            niveis_nomes=np.array([nivel for _, nivel in self.niveis], dtype=str),
+            versao_regras=np.array(self.versao_regras),
+        )
+
+    @classmethod
+    def carregar(cls, caminho: str) -> "MatrizRegras":
+        with np.load(caminho, allow_pickle=False) as dados:
+            return cls(
+                contratos=dados["contratos"].tolist(),
+                regras=dados["regras"].tolist(),
+                pesos=dados["pesos"],
+                disparos=dados["disparos"],
+                numeros=dados["numeros"],
+                interrompidas=dados["interrompidas"],
+                score_maximo=int(dados["score_maximo"]),
+                niveis=list(zip(dados["niveis_minimos"].tolist(), dados["niveis_nomes"].tolist())),
+                versao_regras=str(dados["versao_regras"]),
+            )
+
+
+def _valor_numerico(disparo) -> float:
+    match, itens = disparo
+    if itens:
+        return float(len(itens))
+    if match is None:
+        return np.nan
+    for indice in range(1, match.re.groups + 1):
+        numero = valor_numerico(match.group(indice))
+        if isinstance(numero, (int, float)):
+            return float(numero)
+    return np.nan
+
+
+def avaliar_lote(textos: Union[Mapping[str, str], Iterable[Tuple[str, str]]],
+                 conjunto: Optional[ConjuntoRegras] = None,
+                 usar_prefiltro: Optional[bool] = None,
+                 escopo_clausula: Optional[bool] = None) -> MatrizRegras:
+    """
+    Avalia as regras em vários contratos. `textos` é um dict {id: texto} ou uma
+    sequência de pares (id, texto); a ordem das linhas segue a da entrada.
+    """
+    conjunto = conjunto or obter_regras()
+    pares = textos.items() if isinstance(textos, Mapping) else textos
+
+    contratos: List[str] = []
+    linhas_disparos, linhas_numeros, linhas_interrompidas = [], [], []
+    total_regras = len(conjunto.regras)
+    for contrato, texto in pares:
+        documento = preparar_documento(normalizar_texto(texto), conjunto, usar_prefiltro, escopo_clausula)
+        disparos = np.zeros(total_regras, dtype=bool)
+        numeros = np.full(total_regras, np.nan)
+        interrompidas = np.zeros(total_regras, dtype=bool)
+        for indice, (_, disparo, motivo) in enumerate(verificar_regras(documento, conjunto)):
+            if motivo is not None:
+                interrompidas[indice] = True
+            elif disparo is not None:
+                disparos[indice] = True
+                numeros[indice] = _valor_numerico(disparo)
+        contratos.append(str(contrato))
+        linhas_disparos.append(disparos)
+        linhas_numeros.append(numeros)
+        linhas_interrompidas.append(interrompidas)
+
+    if linhas_interrompidas and np.any(linhas_interrompidas):
+        logging.warning("Lote: %s avaliações de regra interrompidas por orçamento", int(np.sum(linhas_interrompidas)))
+
+    formato = (len(contratos), total_regras)
+    return MatrizRegras(
+        contratos=contratos,
+        regras=[regra.id for regra in conjunto.regras],
+        pesos=np.array([regra.peso for regra in conjunto.regras], dtype=np.float64),
+        disparos=np.array(linhas_disparos, dtype=bool).reshape(formato),
+        numeros=np.array(linhas_numeros, dtype=np.float64).reshape(formato),
+        interrompidas=np.array(linhas_interrompidas, dtype=bool).reshape(formato),
+        score_maximo=conjunto.score_maximo,
+        niveis=[(minimo, nivel) for minimo, nivel, _ in conjunto.niveis],
+        versao_regras=conjunto.versao,
+    )
@@ -0,0 +1,135 @@
+# core/rule_profile.py
+
+"""
+Perfil das regras de risco: tempo de avaliação, quantas vezes cada regra
+disparou e o tamanho dos trechos casados, somados entre requisições (por
+processo). Ligado por REGRAS_PERFIL; desligado, custa uma leitura de
+variável de ambiente por documento.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+def perfil_habilitado() -> bool:
+    return os.getenv("REGRAS_PERFIL", "false").lower() in {"1", "true", "yes"}
+
+
+class EstatisticaRegra:
+    """Totais de uma regra desde o último reset."""
+
+    __slots__ = ("categoria", "avaliacoes", "disparos", "interrupcoes", "tempo_total", "tempo_maximo", "soma_trechos")
+
+    def __init__(self, categoria: str):
+        self.categoria = categoria
+        self.avaliacoes = 0
+        self.disparos = 0
+        self.interrupcoes = 0
+        self.tempo_total = 0.0
+        self.tempo_maximo = 0.0
+        self.soma_trechos = 0
+
+    def como_dict(self, regra_id: str) -> Dict:
+        return {
+            "id": regra_id,
+            "categoria": self.categoria,
+            "avaliacoes": self.avaliacoes,
+            "disparos": self.disparos,
+            "taxa_disparo": round(self.disparos / self.avaliacoes, 4) if self.avaliacoes else 0.0,
+            "interrupcoes": self.interrupcoes,
+            "tempo_total_ms": round(self.tempo_total * 1000, 3),
+            "tempo_medio_ms": round(self.tempo_total * 1000 / self.avaliacoes, 4) if self.avaliacoes else 0.0,
+            "tempo_maximo_ms": round(self.tempo_maximo * 1000, 3),
+            "trecho_medio": round(self.soma_trechos / self.disparos, 1) if self.disparos else 0.0,
+        }
+
+
+class PerfilRegras:
+    """Estatísticas agregadas por regra (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._regras: Dict[str, EstatisticaRegra] = {}
+        self._documentos = 0
+        self._desde = time.time()
+
+    def registrar_documento(self):
+        with self._lock:
+            self._documentos += 1
+
+    def registrar(self, regra_id: str, categoria: str, tempo: float, disparou: bool,
+                  tamanho_trecho: int = 0, interrompida: bool = False):
+        with self._lock:
+            estatistica = self._regras.get(regra_id)
+            if estatistica is None:
+                estatistica = self._regras[regra_id] = EstatisticaRegra(categoria)
+            estatistica.avaliacoes += 1
+            estatistica.tempo_total += tempo
+            estatistica.tempo_maximo = max(estatistica.tempo_maximo, tempo)
+            if interrompida:
+                estatistica.interrupcoes += 1
+            elif disparou:
+                estatistica.disparos += 1
+                estatistica.soma_trechos += tamanho_trecho
+
+    def resumo(self, ids_regras: Optional[List[str]] = None) -> Dict:
+        """
+        Regras ordenadas pelo tempo total, totais por categoria e as regras que
+        nunca dispararam (entre `ids_regras`, se informado, inclusive as nunca avaliadas).
+        """
+        with self._lock:
+            regras = [estatistica.como_dict(regra_id) for regra_id, estatistica in self._regras.items()]
+            documentos, desde = self._documentos, self._desde
+        regras.sort(key=lambda r: r["tempo_total_ms"], reverse=True)
+
+        categorias: Dict[str, Dict] = {}
+        for regra in regras:
+            total = categorias.setdefault(regra["categoria"], {"categoria": regra["categoria"], "tempo_total_ms": 0.0, "disparos": 0})
+            total["tempo_total_ms"] = round(total["tempo_total_ms"] + regra["tempo_total_ms"], 3)
+            total["disparos"] += regra["disparos"]
+
+        disparadas = {regra["id"] for regra in regras if regra["disparos"]}
+        universo = ids_regras if ids_regras is not None else [regra["id"] for regra in regras]
+        return {
+            "habilitado": perfil_habilitado(),
+            "desde": desde,
+            "documentos": documentos,
+            "regras": regras,
+            "categorias": sorted(categorias.values(), key=lambda c: c["tempo_total_ms"], reverse=True),
+            "nunca_dispararam": [regra_id for regra_id in universo if regra_id not in disparadas],
+        }
+
+    def extrair(self) -> Dict:
+        """Retira os totais acumulados (usado nos processos do pool, que os devolvem à API)."""
+        with self._lock:
+            dados = {"documentos": self._documentos, "regras": self._regras}
+            self._regras = {}
+            self._documentos = 0
+        return dados
+
+    def mesclar(self, dados: Dict):
+        """Soma os totais retirados de outro processo (ver extrair)."""
+        with self._lock:
+            self._documentos += dados["documentos"]
+            for regra_id, outra in dados["regras"].items():
+                estatistica = self._regras.get(regra_id)
+                if estatistica is None:
+                    self._regras[regra_id] = outra
+                    continue
+                estatistica.avaliacoes += outra.avaliacoes
+                estatistica.disparos += outra.disparos
+                estatistica.interrupcoes += outra.interrupcoes
+                estatistica.tempo_total += outra.tempo_total
+                estatistica.tempo_maximo = max(estatistica.tempo_maximo, outra.tempo_maximo)
+                estatistica.soma_trechos += outra.soma_trechos
+
+    def zerar(self):
+        with self._lock:
+            self._regras.clear()
+            self._documentos = 0
+            self._desde = time.time()
+
+
+perfil_regras = PerfilRegras()
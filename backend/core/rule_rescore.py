@@ -0,0 +1,216 @@
+# core/rule_rescore.py
+
+"""
+Reprocessamento em segundo plano das análises em cache quando as regras mudam.
+
+Uma thread compara a versão das regras (SHA-256 do YAML) com a gravada em
+cada análise e, em lotes, reavalia só as regras alteradas/novas sobre o
+texto extraído já guardado (core/rule_engine.reavaliar_regras); mudanças só
+de peso nem precisam do texto. Entre lotes há uma pausa, e enquanto houver
+análises ao vivo em andamento a thread espera.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from core.extractor import SEPARADOR_PAGINAS, VERSAO_EXTRATOR, juntar_paginas
+from core.page_index import IndicePaginas
+from core.rule_engine import ConjuntoRegras, obter_regras, reavaliar_regras, regras_afetadas
+from core.text_cleaner import limpar_paginas
+from database.database import (
+    atualizar_resultado_regras,
+    buscar_analises_desatualizadas,
+    buscar_texto_extraido,
+    contar_analises_desatualizadas,
+)
+
+
+def _config() -> Dict:
+    """Lê do ambiente: habilitado, tamanho do lote, pausa entre lotes (s) e intervalo de verificação (s)."""
+    valores = {"habilitado": os.getenv("REGRAS_REPROCESSAR", "true").lower() in {"1", "true", "yes"}}
+    for chave, variavel, padrao in (
+        ("lote", "REGRAS_REPROCESSAR_LOTE", 50),
+        ("pausa", "REGRAS_REPROCESSAR_PAUSA_MS", 200),
+        ("intervalo", "REGRAS_REPROCESSAR_INTERVALO_S", 60),
+    ):
+        try:
+            valores[chave] = max(0, int(os.getenv(variavel, str(padrao))))
+        except ValueError:
+            valores[chave] = padrao
+    valores["lote"] = max(1, valores["lote"])
+    valores["pausa"] /= 1000
+    return valores
+
+
+def texto_necessario(resultado: Dict, conjunto: Optional[ConjuntoRegras] = None) -> bool:
+    """Se atualizar o resultado exige o texto guardado (não exige se já está atualizado ou só mudaram pesos)."""
+    conjunto = conjunto or obter_regras()
+    if resultado.get("versao_regras") == conjunto.versao:
+        return False
+    afetadas = regras_afetadas(resultado, conjunto)
+    return afetadas is None or bool(afetadas)
+
+
+def reavaliar_resultado(resultado: Dict, texto_extraido: Optional[str],
+                        conjunto: Optional[ConjuntoRegras] = None) -> Optional[Dict]:
+    """
+    Resultado das regras de uma análise em cache na versão atual das regras,
+    a partir do texto extraído guardado (o próprio resultado se já estiver
+    atualizado); None se o texto fizer falta. Só CPU, sem banco.
+    """
+    conjunto = conjunto or obter_regras()
+    if resultado.get("versao_regras") == conjunto.versao:
+        return resultado
+    texto, indice_paginas = None, None
+    if texto_extraido is not None:
+        # Limpo como na análise ao vivo
+        paginas_limpas, _ = limpar_paginas(texto_extraido.split(SEPARADOR_PAGINAS))
+        texto, indice_paginas = juntar_paginas(paginas_limpas), IndicePaginas(paginas_limpas)
+    novo = reavaliar_regras(resultado, texto, conjunto)
+    if novo is not None and indice_paginas is not None:
+        indice_paginas.anotar(novo["pontos_atencao"])
+    return novo
+
+
+def atualizar_resultado(resultado: Dict, hash_arquivo: str, conjunto: Optional[ConjuntoRegras] = None) -> Optional[Dict]:
+    """reavaliar_resultado lendo antes, se preciso, o texto guardado do arquivo."""
+    conjunto = conjunto or obter_regras()
+    texto_extraido = buscar_texto_extraido(hash_arquivo, VERSAO_EXTRATOR) if texto_necessario(resultado, conjunto) else None
+    return reavaliar_resultado(resultado, texto_extraido, conjunto)
+
+
+class ReprocessadorRegras:
+    """Thread única que mantém as análises em cache na versão atual das regras."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._ativas = 0
+        self._progresso: Dict = {"estado": "parado"}
+        # Versão já reprocessada por completo (análises sem texto no cache continuam pendentes)
+        self._versao_concluida: Optional[str] = None
+        self._forcar = False
+
+    # --- tráfego ao vivo: o reprocessamento cede a vez ---
+
+    def inicio_requisicao(self):
+        with self._lock:
+            self._ativas += 1
+
+    def fim_requisicao(self):
+        with self._lock:
+            self._ativas = max(0, self._ativas - 1)
+
+    def _aguardar_trafego(self, pausa: float):
+        while not self._parar.is_set():
+            with self._lock:
+                ocupado = self._ativas > 0
+            if not ocupado:
+                return
+            self._atualizar(estado="aguardando tráfego")
+            self._parar.wait(max(pausa, 0.05))
+
+    # --- ciclo de vida ---
+
+    def iniciar(self):
+        if not _config()["habilitado"] or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name="reprocessador-regras", daemon=True)
+        self._thread.start()
+
+    def encerrar(self, timeout: float = 5.0):
+        self._parar.set()
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._atualizar(estado="parado")
+
+    def disparar(self):
+        """Pede um ciclo imediato (ex.: logo após recarregar as regras)."""
+        self._forcar = True
+        self._acordar.set()
+
+    def progresso(self) -> Dict:
+        with self._lock:
+            return dict(self._progresso)
+
+    def _atualizar(self, **campos):
+        with self._lock:
+            self._progresso.update(campos, atualizado_em=time.time())
+
+    def _executar(self):
+        self._atualizar(estado="ocioso")
+        while not self._parar.is_set():
+            config = _config()
+            try:
+                if self._forcar or obter_regras().versao != self._versao_concluida:
+                    self._forcar = False
+                    self.reprocessar(config["lote"], config["pausa"])
+            except Exception:
+                logging.exception("Falha no reprocessamento das regras")
+                self._atualizar(estado="erro")
+            self._acordar.wait(config["intervalo"] or None)
+            self._acordar.clear()
+
+    def reprocessar(self, lote: int, pausa: float) -> Dict:
+        """Atualiza, em lotes, todas as análises geradas com outra versão das regras."""
+        try:
+            conjunto = obter_regras()
+        except (OSError, ValueError) as e:
+            logging.error("Reprocessamento: regras indisponíveis (%s)", e)
+            return self.progresso()
+        total = contar_analises_desatualizadas(conjunto.versao)
+        if not total:
+            self._versao_concluida = conjunto.versao
+            self._atualizar(estado="ocioso", versao_alvo=conjunto.versao, pendentes=0)
+            return self.progresso()
+
+        logging.info("Reprocessando %s análises para as regras %s", total, conjunto.versao[:12])
+        self._atualizar(
+            estado="executando", versao_alvo=conjunto.versao, total=total, processadas=0,
+            atualizadas=0, sem_texto=0, erros=0, pendentes=total, iniciado_em=time.time(),
+        )
+        contadores = {"processadas": 0, "atualizadas": 0, "sem_texto": 0, "erros": 0}
+        ultimo_id = 0
+        completo = False
+        while not self._parar.is_set():
+            self._aguardar_trafego(pausa)
+            self._atualizar(estado="executando")
+            if obter_regras().versao != conjunto.versao:
+                # As regras mudaram de novo: o próximo ciclo recomeça com a versão nova
+                self._acordar.set()
+                break
+            registros = buscar_analises_desatualizadas(conjunto.versao, ultimo_id, lote)
+            if not registros:
+                completo = True
+                break
+            for registro in registros:
+                ultimo_id = registro.id
+                contadores["processadas"] += 1
+                try:
+                    novo = atualizar_resultado(registro.resultado_regras or {}, registro.hash_arquivo, conjunto)
+                except Exception:
+                    logging.exception("Reprocessamento: falha na análise %s", registro.id)
+                    contadores["erros"] += 1
+                    continue
+                if novo is None:
+                    contadores["sem_texto"] += 1
+                elif atualizar_resultado_regras(registro.id, novo, registro.versao_regras):
+                    contadores["atualizadas"] += 1
+            self._atualizar(pendentes=max(0, total - contadores["processadas"]), **contadores)
+            self._parar.wait(pausa)
+
+        if completo:
+            self._versao_concluida = conjunto.versao
+        self._atualizar(estado="ocioso", concluido_em=time.time())
+        logging.info("Reprocessamento concluído: %s", contadores)
+        return self.progresso()
+
+
+reprocessador_regras = ReprocessadorRegras()
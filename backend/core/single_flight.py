@@ -0,0 +1,124 @@
+# core/single_flight.py
+
+"""
+Coalescência de análises simultâneas do mesmo arquivo (chave: SHA-256).
+
+No processo, a primeira requisição de um hash é a "líder" e as seguintes
+aguardam o resultado dela. Entre workers do uvicorn, a líder ainda precisa
+do lease do hash (tabela analise_leases): se outro worker já o tem, ela
+espera a análise aparecer no cache e devolve o que foi gravado; se o lease
+for liberado ou expirar sem resultado (ex.: IA indisponível, worker caiu),
+ela assume o trabalho. O lease é renovado enquanto a análise roda.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+from core.workers import pool_banco
+from database.database import adquirir_lease_analise, liberar_lease_analise, renovar_lease_analise
+
+
+def _config() -> Dict:
+    """Lê do ambiente: duração do lease (s) e intervalo de consulta de quem espera outro worker (ms)."""
+    valores = {}
+    for chave, variavel, padrao in (
+        ("lease", "ANALISE_LEASE_S", 120),
+        ("espera_ms", "ANALISE_LEASE_ESPERA_MS", 500),
+    ):
+        try:
+            valores[chave] = max(1, int(os.getenv(variavel, str(padrao))))
+        except ValueError:
+            valores[chave] = padrao
+    return valores
+
+
+class _LiderCancelada(Exception):
+    """A requisição líder foi cancelada: quem aguardava tenta de novo."""
+
+
+class AnalisesEmAndamento:
+    """Análises em andamento neste processo, por hash do arquivo."""
+
+    def __init__(self):
+        self._voos: Dict[str, asyncio.Future] = {}
+        self.dono = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    async def executar(self, hash_arquivo: str, trabalho: Callable[[], Awaitable[Dict]],
+                       cache_novo: Callable[[], Awaitable[Optional[Dict]]]) -> Dict:
+        """
+        Resultado de `trabalho()` para o hash, executado uma vez só entre as
+        requisições simultâneas. `cache_novo()` devolve a resposta gravada por
+        outro worker enquanto esta esperava (ou None se ainda não há).
+        """
+        while hash_arquivo in self._voos:
+            try:
+                # shield: desistir de esperar não cancela a análise da líder
+                return await asyncio.shield(self._voos[hash_arquivo])
+            except _LiderCancelada:
+                continue
+
+        voo = asyncio.get_running_loop().create_future()
+        self._voos[hash_arquivo] = voo
+        try:
+            resultado = await self._liderar(hash_arquivo, trabalho, cache_novo)
+        except asyncio.CancelledError:
+            voo.set_exception(_LiderCancelada())
+            raise
+        except BaseException as e:
+            voo.set_exception(e)
+            raise
+        else:
+            voo.set_result(resultado)
+            return resultado
+        finally:
+            del self._voos[hash_arquivo]
+            # Marca a exceção como lida quando ninguém estava esperando
+            voo.exception()
+
+    async def _liderar(self, hash_arquivo: str, trabalho: Callable[[], Awaitable[Dict]],
+                       cache_novo: Callable[[], Awaitable[Optional[Dict]]]) -> Dict:
+        config = _config()
+        esperou = False
+        while not await pool_banco.executar(adquirir_lease_analise, hash_arquivo, self.dono, config["lease"]):
+            # Outro worker está analisando o mesmo arquivo
+            esperou = True
+            await asyncio.sleep(config["espera_ms"] / 1000)
+            resultado = await cache_novo()
+            if resultado is not None:
+                return resultado
+
+        renovacao = None
+        try:
+            if esperou:
+                # O outro worker pode ter gravado e liberado o lease entre duas consultas
+                resultado = await cache_novo()
+                if resultado is not None:
+                    return resultado
+            renovacao = asyncio.create_task(self._renovar(hash_arquivo, config["lease"]))
+            return await trabalho()
+        finally:
+            if renovacao is not None:
+                renovacao.cancel()
+            try:
+                await pool_banco.executar(liberar_lease_analise, hash_arquivo, self.dono)
+            except Exception:
+                # Sem liberar, o lease só expira (ANALISE_LEASE_S)
+                logging.exception("Falha ao liberar o lease da análise %s", hash_arquivo)
+
+    async def _renovar(self, hash_arquivo: str, duracao: int):
+        while True:
+            await asyncio.sleep(max(1, duracao / 3))
+            try:
+                renovado = await pool_banco.executar(renovar_lease_analise, hash_arquivo, self.dono, duracao)
+            except Exception:
+                logging.exception("Falha ao renovar o lease da análise %s", hash_arquivo)
+                continue
+            if not renovado:
+                logging.warning("Lease da análise %s expirou durante o processamento", hash_arquivo)
+
+
+analises_em_andamento = AnalisesEmAndamento()
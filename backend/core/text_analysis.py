@@ -0,0 +1,175 @@
+# core/text_analysis.py
+
+"""
+Análise só de regras sobre texto já extraído (POST /analisar/texto e
+/analisar/texto/lote), para ferramentas que já têm o texto do contrato:
+sem upload, arquivo temporário nem extração. Por padrão também não há IA
+nem banco — o texto vai direto para o pool de CPU e volta o resultado
+das regras. Com `ia`, roda o Gemini; com `cache`, reaproveita e grava a
+análise em analises_cache pelo SHA-256 do texto (UTF-8), que também
+serve para GET /analises/{sha256}.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+from core.ai_analyzer import analisar_contrato_com_ia, configurar_api_gemini
+from core.pipeline import ErroAnalise, resposta_cache
+from core.rule_profile import perfil_regras
+from core.workers import PoolSaturado, analisar_textos, pool_banco, pool_cpu, pool_ia
+from database.database import buscar_analise_por_hash, salvar_analise_cache
+
+
+def config_texto() -> Dict:
+    """Lê do ambiente: tamanho máximo do texto (KB), de textos por lote e do corpo do lote (MB)."""
+    valores = {}
+    for chave, variavel, padrao in (
+        ("max_kb", "TEXTO_MAX_KB", 2048),
+        ("lote_max", "TEXTO_LOTE_MAX", 500),
+        ("lote_max_mb", "TEXTO_LOTE_MAX_MB", 50),
+    ):
+        try:
+            valores[chave] = max(1, int(os.getenv(variavel, str(padrao))))
+        except ValueError:
+            valores[chave] = padrao
+    return valores
+
+
+async def ler_corpo(request, limite_bytes: int) -> bytes:
+    """Corpo da requisição, recusado com 413 assim que passa de `limite_bytes`."""
+    try:
+        tamanho_anunciado = int(request.headers.get("content-length", "0"))
+    except ValueError:
+        tamanho_anunciado = 0
+    if tamanho_anunciado > limite_bytes:
+        raise ErroAnalise(413, f"Texto excede o limite de {limite_bytes // 1024}KB.")
+    corpo = bytearray()
+    async for bloco in request.stream():
+        corpo += bloco
+        if len(corpo) > limite_bytes:
+            raise ErroAnalise(413, f"Texto excede o limite de {limite_bytes // 1024}KB.")
+    return bytes(corpo)
+
+
+def interpretar_corpo(tipo_conteudo: str, corpo: bytes):
+    """JSON (objeto decodificado) ou text/plain (str); outros tipos: 415."""
+    tipo = (tipo_conteudo or "").split(";")[0].strip().lower()
+    try:
+        if tipo == "application/json":
+            return json.loads(corpo)
+        if tipo in ("text/plain", ""):
+            return corpo.decode("utf-8")
+    except (UnicodeDecodeError, ValueError):
+        raise ErroAnalise(400, "Corpo inválido (esperado JSON ou texto UTF-8).")
+    raise ErroAnalise(415, "Envie application/json ou text/plain.")
+
+
+def itens_lote(dados, maximo: int) -> List[Dict]:
+    """Itens de /analisar/texto/lote: {"textos": [...]} ou a lista direto; cada um é texto ou {"texto", "nomeArquivo"?}."""
+    textos = dados.get("textos") if isinstance(dados, dict) else dados
+    if not isinstance(textos, list) or not textos:
+        raise ErroAnalise(400, 'Envie {"textos": [...]} com ao menos um texto.')
+    if len(textos) > maximo:
+        raise ErroAnalise(400, f"Envie no máximo {maximo} textos por vez.")
+    itens = []
+    for item in textos:
+        if isinstance(item, str):
+            item = {"texto": item}
+        if not isinstance(item, dict) or not isinstance(item.get("texto"), str):
+            raise ErroAnalise(400, 'Cada item deve ser um texto ou {"texto": ..., "nomeArquivo": ...}.')
+        itens.append(item)
+    return itens
+
+
+def _resposta(nome_arquivo: str, hash_texto: str, resultado: Dict, analise_ia: Optional[str]) -> Dict:
+    analise_regras = resultado["analise_regras"]
+    return {
+        "sucesso": True,
+        "nomeArquivo": nome_arquivo,
+        "sha256": hash_texto,
+        "scoreRisco": analise_regras["score"],
+        "nivelRisco": analise_regras["nivel_risco"],
+        "pontosAtencao": analise_regras["pontos_atencao"],
+        "totalClausulasProblem": analise_regras["total_clausulas_problematicas"],
+        "regrasInterrompidas": analise_regras.get("regras_interrompidas", []),
+        "analiseIA": analise_ia,
+        "limpezaTexto": resultado["limpeza"],
+    }
+
+
+async def _avaliar(textos: List[str]) -> List[Dict]:
+    avaliado = await pool_cpu.executar(analisar_textos, textos)
+    if avaliado["perfil"] is not None:
+        perfil_regras.mesclar(avaliado["perfil"])
+    return avaliado["resultados"]
+
+
+async def analisar_texto(texto: str, nome_arquivo: str = "texto.txt", ia: bool = False, cache: bool = False) -> Dict:
+    """Resultado das regras (e, se pedido, da IA) para um texto; mesmo formato de /analisar."""
+    if not texto or not texto.strip():
+        raise ErroAnalise(400, "Texto vazio.")
+    hash_texto = hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+    if cache:
+        cache_salvo = await pool_banco.executar(buscar_analise_por_hash, hash_texto)
+        # Análise gravada sem IA não serve para quem pediu a IA
+        if cache_salvo is not None and (not ia or cache_salvo.analise_ia):
+            return {**await resposta_cache(cache_salvo, nome_arquivo), "sha256": hash_texto}
+
+    resultado = (await _avaliar([texto]))[0]
+    if resultado["analise_regras"] is None:
+        raise ErroAnalise(400, "Texto vazio.")
+
+    analise_ia = None
+    guardar_cache = cache
+    if ia:
+        analise_ia = "API de IA não configurada."
+        if configurar_api_gemini():
+            try:
+                analise_ia = await pool_ia.executar(analisar_contrato_com_ia, texto)
+            except PoolSaturado as e:
+                logging.warning("IA indisponível para %s: %s", nome_arquivo, e.mensagem)
+                analise_ia = "Análise de IA indisponível no momento (serviço sobrecarregado). Tente novamente em instantes."
+                guardar_cache = False
+
+    resposta = _resposta(nome_arquivo, hash_texto, resultado, analise_ia)
+    if guardar_cache:
+        await pool_banco.executar(
+            salvar_analise_cache,
+            hash_arquivo=hash_texto,
+            nome_arquivo=nome_arquivo,
+            resumo_texto=texto[:500] + ("..." if len(texto) > 500 else ""),
+            resultado_regras=resultado["analise_regras"],
+            analise_ia=analise_ia,
+        )
+    return resposta
+
+
+async def analisar_textos_lote(itens: List[Dict]) -> List[Dict]:
+    """
+    Regras para vários textos ({"texto", "nomeArquivo"?}), na ordem recebida.
+    Os textos vão para o pool em um bloco por worker, não um por tarefa;
+    texto vazio vira {"indice", "sucesso": False, "erro"} sem parar o lote.
+    """
+    validos = [(indice, item) for indice, item in enumerate(itens) if item["texto"].strip()]
+    partes = min(pool_cpu.workers, len(validos))
+    blocos = [validos[inicio::partes] for inicio in range(partes)]
+    resultados_blocos = await asyncio.gather(*(_avaliar([item["texto"] for _, item in bloco]) for bloco in blocos))
+    avaliados = {}
+    for bloco, resultados in zip(blocos, resultados_blocos):
+        for (indice, _), resultado in zip(bloco, resultados):
+            avaliados[indice] = resultado
+
+    respostas = []
+    for indice, item in enumerate(itens):
+        resultado = avaliados.get(indice)
+        if resultado is None or resultado["analise_regras"] is None:
+            respostas.append({"indice": indice, "sucesso": False, "erro": "Texto vazio."})
+            continue
+        hash_texto = hashlib.sha256(item["texto"].encode("utf-8")).hexdigest()
+        respostas.append({"indice": indice, **_resposta(item.get("nomeArquivo") or f"texto_{indice}.txt", hash_texto, resultado, None)})
+    return respostas
@@ -0,0 +1,158 @@
+# core/text_cleaner.py
+
+"""
+Limpeza do texto extraído antes das regras e da IA: remove cabeçalhos e
+rodapés que se repetem nas páginas (timbre, numeração, linha de rubricas,
+carimbos) — nunca títulos de cláusula ou parágrafo — e reúne palavras hifenizadas na quebra de linha.
+
+O hífen no fim da linha pode ser só da translineação ("benefi-\ncios") ou
+de uma palavra composta ("guarda-\nchuva"). Sem dicionário, a decisão usa
+o próprio documento e, na falta dele, listas curtas:
+1. a forma com hífen aparece em outro ponto do documento: mantém o hífen;
+2. a forma junta aparece em outro ponto: junta;
+3. a primeira parte é um prefixo/elemento que pede hífen (bem, sub, vice,
+   pós, guarda...) ou a segunda é "feira": mantém o hífen;
+4. senão, junta (o caso mais comum).
+Falha em compostos raros fora das listas e em cortes que coincidem com um
+prefixo da lista (ex.: "sub-\nsidiária" sem outra ocorrência no texto).
+"""
+
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# Linhas que são só numeração de página: "3", "- 3 -", "Página 3 de 10", "fls. 3", "3/10"
+_NUMERACAO_PAGINA = re.compile(
+    r"^[\s\-–—]*(?:p[áa]g(?:ina)?\.?|fls?\.?|folha)?\s*\d+\s*(?:(?:de|/)\s*\d+)?[\s\-–—]*$",
+    re.IGNORECASE,
+)
+# Títulos de cláusula/parágrafo nunca são cabeçalho: "CLÁUSULA 5ª" e "CLÁUSULA 6ª" no topo
+# de páginas diferentes teriam a mesma chave ("clausula #a") e seriam apagados
+_TITULO_CLAUSULA = re.compile(r"\s*(?:cl[áa]usula\b|§|par[áa]grafo\b)", re.IGNORECASE)
+# Palavra cortada no fim da linha ("-\n") e continuada em minúscula na linha seguinte
+_FIM_PALAVRA = re.compile(r"\w+$")
+_INICIO_PALAVRA = re.compile(r"[a-zà-ÿ]\w*")
+# Primeiras partes de compostos com hífen comuns em contratos (a lista decide só sem outra pista no texto)
+_PREFIXOS_COMPOSTOS = frozenset({
+    "bem", "sub", "vice", "pós", "pré", "pró", "recém", "além", "aquém", "guarda", "meio",
+})
+_SEGUNDAS_COMPOSTAS = frozenset({"feira", "feiras"})
+_DIGITOS = re.compile(r"\d+")
+_ESPACOS = re.compile(r"\s+")
+
+
+def _config_limpeza() -> Tuple[int, float, int]:
+    """Lê do ambiente: mínimo de páginas, fração de páginas e tamanho da margem (linhas)."""
+    try:
+        min_paginas = int(os.getenv("LIMPEZA_MIN_PAGINAS", "3"))
+    except ValueError:
+        min_paginas = 3
+    try:
+        fracao = float(os.getenv("LIMPEZA_FRACAO_PAGINAS", "0.5"))
+    except ValueError:
+        fracao = 0.5
+    try:
+        margem = int(os.getenv("LIMPEZA_LINHAS_MARGEM", "4"))
+    except ValueError:
+        margem = 4
+    return max(2, min_paginas), fracao, max(1, margem)
+
+
+def _chave_linha(linha: str) -> str:
+    """Forma canônica da linha: ignora caixa, espaços e números (ex.: 'Página 3 de 10')."""
+    return _ESPACOS.sub(" ", _DIGITOS.sub("#", linha.strip().lower()))
+
+
+def _linhas_margem(linhas: List[str], margem: int) -> List[int]:
+    """Índices das primeiras e últimas linhas não vazias da página (zona de cabeçalho/rodapé)."""
+    nao_vazias = [i for i, linha in enumerate(linhas) if linha.strip()]
+    return sorted(set(nao_vazias[:margem] + nao_vazias[-margem:]))
+
+
+def _continua_palavra(documento: str, indice: int) -> bool:
+    return 0 <= indice < len(documento) and (documento[indice].isalnum() or documento[indice] in "_-")
+
+
+def _no_documento(forma: str, documento: str, consultas: Dict[str, bool]) -> bool:
+    """Se `forma` (minúscula) aparece como palavra inteira no documento (minúsculo)."""
+    if forma not in consultas:
+        inicio = documento.find(forma)
+        while inicio != -1 and (_continua_palavra(documento, inicio - 1) or _continua_palavra(documento, inicio + len(forma))):
+            inicio = documento.find(forma, inicio + 1)
+        consultas[forma] = inicio != -1
+    return consultas[forma]
+
+
+def _manter_hifen(primeira: str, segunda: str, documento: str, consultas: Dict[str, bool]) -> bool:
+    if _no_documento(f"{primeira}-{segunda}".lower(), documento, consultas):
+        return True
+    if _no_documento((primeira + segunda).lower(), documento, consultas):
+        return False
+    return primeira.lower() in _PREFIXOS_COMPOSTOS or segunda.lower() in _SEGUNDAS_COMPOSTAS
+
+
+def _desfazer_hifenizacoes(pagina: str, documento: str, consultas: Dict[str, bool]) -> str:
+    """Reúne as palavras cortadas no fim da linha (o hífen fica só nos compostos)."""
+    partes = []
+    copiado = 0
+    quebra = pagina.find("-\n")
+    while quebra != -1:
+        # Busca a palavra só perto da quebra: um regex sobre a página inteira custa mais que a limpeza toda
+        primeira = _FIM_PALAVRA.search(pagina, max(copiado, quebra - 60), quebra)
+        segunda = _INICIO_PALAVRA.match(pagina, quebra + 2)
+        if primeira and segunda:
+            partes.append(pagina[copiado:quebra])
+            if _manter_hifen(primeira.group(), segunda.group(), documento, consultas):
+                partes.append("-")
+            copiado = quebra + 2
+        quebra = pagina.find("-\n", quebra + 2)
+    partes.append(pagina[copiado:])
+    return "".join(partes)
+
+
+def limpar_paginas(paginas: List[str]) -> Tuple[List[str], Dict]:
+    """
+    Remove linhas repetidas nas margens de várias páginas e a numeração de
+    página, e desfaz hifenizações. Devolve as páginas limpas (mesma
+    quantidade e ordem) e estatísticas da redução.
+    """
+    min_paginas, fracao, margem = _config_limpeza()
+    linhas_por_pagina = [pagina.split("\n") for pagina in paginas]
+    margens = [_linhas_margem(linhas, margem) for linhas in linhas_por_pagina]
+
+    # Em quantas páginas cada linha de margem aparece
+    repetidas = set()
+    paginas_com_texto = sum(1 for pagina in paginas if pagina.strip())
+    if paginas_com_texto >= min_paginas:
+        ocorrencias = Counter()
+        for linhas, indices in zip(linhas_por_pagina, margens):
+            ocorrencias.update({_chave_linha(linhas[i]) for i in indices if not _TITULO_CLAUSULA.match(linhas[i])})
+        limite = max(2, math.ceil(fracao * paginas_com_texto))
+        repetidas = {chave for chave, total in ocorrencias.items() if total >= limite and chave}
+
+    # Texto todo, para decidir as hifenizações pelas outras ocorrências da palavra
+    documento = "\n".join(paginas).lower() if any("-\n" in pagina for pagina in paginas) else ""
+    consultas: Dict[str, bool] = {}
+    paginas_limpas = []
+    linhas_removidas = 0
+    for linhas, indices in zip(linhas_por_pagina, margens):
+        remover = {
+            i for i in indices
+            if not _TITULO_CLAUSULA.match(linhas[i])
+            and (_chave_linha(linhas[i]) in repetidas or _NUMERACAO_PAGINA.match(linhas[i]))
+        }
+        linhas_removidas += len(remover)
+        pagina = "\n".join(linha for i, linha in enumerate(linhas) if i not in remover)
+        paginas_limpas.append(_desfazer_hifenizacoes(pagina, documento, consultas) if documento else pagina)
+
+    caracteres_originais = sum(len(pagina) for pagina in paginas)
+    caracteres_finais = sum(len(pagina) for pagina in paginas_limpas)
+    estatisticas = {
+        "caracteres_originais": caracteres_originais,
+        "caracteres_finais": caracteres_finais,
+        "linhas_removidas": linhas_removidas,
+        "taxa_reducao": round(1 - caracteres_finais / caracteres_originais, 4) if caracteres_originais else 0.0,
+    }
+    return paginas_limpas, estatisticas
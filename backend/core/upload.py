@@ -0,0 +1,257 @@
+# core/upload.py
+
+"""
+Recebimento do upload em streaming. O corpo multipart é lido em blocos
+direto do ASGI: o SHA-256 do arquivo é atualizado a cada bloco e o
+conteúdo vai para um buffer em memória limitado (UPLOAD_MEMORIA_KB) que,
+cheio, transborda para um arquivo temporário em disco. Passou de
+MAX_UPLOAD_MB (ou o Content-Length já anuncia mais que isso), a leitura
+para e a requisição é recusada com 413, sem esperar o resto do arquivo.
+Extensão inválida também é recusada assim que chegam os cabeçalhos da parte.
+
+O pico de memória por requisição fica no tamanho do buffer, qualquer que
+seja o tamanho do arquivo; quem precisa do conteúdo usa `fonte()`, que
+devolve bytes (arquivo pequeno) ou o caminho do temporário.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+
+from core.pipeline import ErroAnalise, limite_upload_mb, normalizar_sha256, validar_arquivo
+
+# Folga para cabeçalhos e delimitadores do multipart ao comparar o Content-Length
+FOLGA_MULTIPART = 64 * 1024
+
+
+def _config_memoria() -> int:
+    """Bytes do upload mantidos em memória antes de transbordar para disco (UPLOAD_MEMORIA_KB)."""
+    try:
+        return max(0, int(os.getenv("UPLOAD_MEMORIA_KB", "1024"))) * 1024
+    except ValueError:
+        return 1024 * 1024
+
+
+class ArquivoRecebido:
+    """Arquivo de um upload: nome, tamanho, SHA-256 e conteúdo (memória ou temporário em disco)."""
+
+    __slots__ = ("nome", "tamanho", "_sha", "_buffer", "_arquivo", "caminho", "memoria_max")
+
+    def __init__(self, nome: str, memoria_max: int):
+        self.nome = nome
+        self.tamanho = 0
+        self._sha = hashlib.sha256()
+        self._buffer = bytearray()
+        self._arquivo = None
+        self.caminho: Optional[str] = None
+        self.memoria_max = memoria_max
+
+    @property
+    def hash(self) -> str:
+        return self._sha.hexdigest()
+
+    def escrever(self, dados: bytes):
+        """Acrescenta um bloco (chamado fora do event loop quando há escrita em disco)."""
+        self._sha.update(dados)
+        self.tamanho += len(dados)
+        if self._arquivo is None and len(self._buffer) + len(dados) <= self.memoria_max:
+            self._buffer += dados
+            return
+        if self._arquivo is None:
+            descritor, self.caminho = tempfile.mkstemp(prefix="upload-", suffix=os.path.splitext(self.nome)[1])
+            self._arquivo = os.fdopen(descritor, "wb")
+            self._arquivo.write(self._buffer)
+            self._buffer = bytearray()
+        self._arquivo.write(dados)
+
+    def finalizar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+
+    def em_disco(self) -> bool:
+        return self.caminho is not None
+
+    def fonte(self) -> Union[bytes, str]:
+        """Bytes do arquivo, se couberam no buffer, ou o caminho do temporário."""
+        return self.caminho if self.caminho is not None else bytes(self._buffer)
+
+    def ler(self) -> bytes:
+        """Conteúdo completo em memória (para quem precisa guardar o arquivo, ex.: jobs)."""
+        if self.caminho is None:
+            return bytes(self._buffer)
+        with open(self.caminho, "rb") as arquivo:
+            return arquivo.read()
+
+    def descartar(self):
+        self.finalizar()
+        self._buffer = bytearray()
+        if self.caminho is not None:
+            try:
+                os.remove(self.caminho)
+            except OSError:
+                pass
+            self.caminho = None
+
+
+class _LeitorMultipart:
+    """Callbacks do python-multipart: guarda as partes de arquivo do campo esperado."""
+
+    def __init__(self, campo: str, memoria_max: int, limite_bytes: int, maximo_arquivos: int = 1,
+                 limite_total: Optional[int] = None, extensoes: Optional[Set[str]] = None):
+        self.campo = campo
+        self.memoria_max = memoria_max
+        self.limite_bytes = limite_bytes
+        self.maximo_arquivos = maximo_arquivos
+        self.limite_total = limite_total
+        self.extensoes = extensoes
+        self.arquivos: List[ArquivoRecebido] = []
+        # Blocos ainda não gravados: (arquivo, dados)
+        self.pendentes: List[Tuple[ArquivoRecebido, bytes]] = []
+        self._cabecalho_nome = b""
+        self._cabecalho_valor = b""
+        self._disposicao = b""
+        self._parte_atual: Optional[ArquivoRecebido] = None
+        self._tamanho_parte = 0
+        self._tamanho_total = 0
+
+    def callbacks(self) -> Dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self):
+        self._disposicao = b""
+        self._parte_atual = None
+        self._tamanho_parte = 0
+
+    def on_header_field(self, dados: bytes, inicio: int, fim: int):
+        self._cabecalho_nome += dados[inicio:fim]
+
+    def on_header_value(self, dados: bytes, inicio: int, fim: int):
+        self._cabecalho_valor += dados[inicio:fim]
+
+    def on_header_end(self):
+        if self._cabecalho_nome.lower() == b"content-disposition":
+            self._disposicao = self._cabecalho_valor
+        self._cabecalho_nome = b""
+        self._cabecalho_valor = b""
+
+    def on_headers_finished(self):
+        _, opcoes = parse_options_header(self._disposicao)
+        nome_campo = opcoes.get(b"name", b"").decode("utf-8", "replace")
+        if nome_campo != self.campo or b"filename" not in opcoes:
+            return
+        if len(self.arquivos) >= self.maximo_arquivos:
+            if self.maximo_arquivos == 1:
+                # Envio simples: arquivos extras no mesmo campo são ignorados
+                return
+            raise ErroAnalise(400, f"Envie no máximo {self.maximo_arquivos} arquivos por vez.")
+        nome_arquivo = opcoes[b"filename"].decode("utf-8", "replace")
+        # Extensão errada é recusada antes de ler o conteúdo
+        validar_arquivo(nome_arquivo, extensoes=self.extensoes)
+        self._parte_atual = ArquivoRecebido(nome_arquivo, self.memoria_max)
+        self.arquivos.append(self._parte_atual)
+
+    def on_part_data(self, dados: bytes, inicio: int, fim: int):
+        self._tamanho_parte += fim - inicio
+        if self._parte_atual is None:
+            # Outros campos são ignorados, mas não podem servir para driblar o limite
+            if self._tamanho_parte > FOLGA_MULTIPART:
+                raise ErroAnalise(400, "Campo do formulário grande demais.")
+            return
+        if self._tamanho_parte > self.limite_bytes and not self._parte_atual.nome.lower().endswith(".zip"):
+            raise ErroAnalise(413, f"Arquivo excede o limite de {int(self.limite_bytes / 1024 / 1024)}MB.")
+        self._tamanho_total += fim - inicio
+        if self.limite_total is not None and self._tamanho_total > self.limite_total:
+            raise ErroAnalise(413, f"Envio excede o limite de {int(self.limite_total / 1024 / 1024)}MB.")
+        self.pendentes.append((self._parte_atual, dados[inicio:fim]))
+
+    def descartar(self):
+        for arquivo in self.arquivos:
+            arquivo.descartar()
+
+
+def _gravar(pendentes: List[Tuple[ArquivoRecebido, bytes]]):
+    for arquivo, dados in pendentes:
+        arquivo.escrever(dados)
+
+
+async def _ler_multipart(request: Request, leitor: _LeitorMultipart, limite_corpo: int):
+    """Alimenta o parser com o corpo da requisição, gravando os blocos de arquivo conforme chegam."""
+    tipo, parametros = parse_options_header(request.headers.get("content-type", ""))
+    if tipo != b"multipart/form-data" or b"boundary" not in parametros:
+        raise ErroAnalise(400, f"Envie o arquivo como multipart/form-data no campo '{leitor.campo}'.")
+    try:
+        tamanho_anunciado = int(request.headers.get("content-length", "0"))
+    except ValueError:
+        tamanho_anunciado = 0
+    if tamanho_anunciado > limite_corpo + FOLGA_MULTIPART * leitor.maximo_arquivos:
+        raise ErroAnalise(413, f"Envio excede o limite de {int(limite_corpo / 1024 / 1024)}MB.")
+
+    parser = MultipartParser(parametros[b"boundary"], leitor.callbacks())
+    try:
+        async for bloco in request.stream():
+            parser.write(bloco)
+            if not leitor.pendentes:
+                continue
+            pendentes, leitor.pendentes = leitor.pendentes, []
+            if any(arquivo.em_disco() or arquivo.tamanho + len(dados) > arquivo.memoria_max for arquivo, dados in pendentes):
+                # Escrita em disco fora do event loop
+                await asyncio.to_thread(_gravar, pendentes)
+            else:
+                _gravar(pendentes)
+        parser.finalize()
+    except MultipartParseError:
+        leitor.descartar()
+        raise ErroAnalise(400, "Corpo multipart inválido.")
+    except BaseException:
+        leitor.descartar()
+        raise
+    if not leitor.arquivos:
+        raise ErroAnalise(400, f"Nenhum arquivo enviado no campo '{leitor.campo}'.")
+    for arquivo in leitor.arquivos:
+        arquivo.finalizar()
+
+
+async def receber_upload(request: Request, campo: str = "file", hash_esperado: Optional[str] = None) -> ArquivoRecebido:
+    """
+    Lê o arquivo do campo `campo` de um corpo multipart/form-data, em streaming.
+    Levanta ErroAnalise (400/413) assim que o problema aparece; em caso de erro
+    o temporário é apagado. Com `hash_esperado` (SHA-256 calculado pelo cliente),
+    o arquivo recebido precisa ter esse hash. Quem recebe o arquivo deve chamar
+    `descartar()`.
+    """
+    if hash_esperado is not None:
+        # Formato inválido é recusado antes de ler o corpo
+        hash_esperado = normalizar_sha256(hash_esperado)
+    limite_bytes = int(limite_upload_mb() * 1024 * 1024)
+    leitor = _LeitorMultipart(campo, _config_memoria(), limite_bytes)
+    await _ler_multipart(request, leitor, limite_bytes)
+    arquivo = leitor.arquivos[0]
+    if hash_esperado is not None and arquivo.hash != hash_esperado:
+        arquivo.descartar()
+        raise ErroAnalise(400, "O SHA-256 do arquivo recebido não confere com o informado (envio corrompido?).")
+    return arquivo
+
+
+async def receber_uploads(request: Request, campo: str, maximo_arquivos: int, limite_total: int,
+                          extensoes: Set[str]) -> List[ArquivoRecebido]:
+    """
+    Vários arquivos no mesmo campo (envio em lote). Cada um respeita MAX_UPLOAD_MB
+    (um .zip, só o limite total) e a soma respeita `limite_total`; todos vão direto para disco.
+    """
+    limite_bytes = max(int(limite_upload_mb() * 1024 * 1024), 1)
+    leitor = _LeitorMultipart(campo, 0, limite_bytes, maximo_arquivos, limite_total, extensoes)
+    await _ler_multipart(request, leitor, limite_total)
+    return leitor.arquivos
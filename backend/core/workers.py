@@ -0,0 +1,241 @@
+# core/workers.py
+
+"""
+Pools que tiram do event loop o trabalho bloqueante das análises.
+
+- "cpu": processos pré-aquecidos (pdfplumber importado e regras compiladas na
+  subida) para extração, limpeza de texto e regras;
+- "banco": threads para as funções síncronas do SQLAlchemy;
+- "ia": threads para a chamada bloqueante ao Gemini.
+
+Cada pool tem seu limite de concorrência (workers) e de fila: com a fila
+cheia a tarefa é recusada na hora (429) e, com o pool fora do ar, 503 —
+sempre com Retry-After. Como os pools são separados, uma IA lenta ocupa só
+as vagas da IA e não segura as análises que dependem apenas das regras.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+# Importados aqui para que os processos do pool já nasçam com pdfplumber e as regras
+from core.extractor import extrair_clausulas_chave, juntar_paginas
+from core.normalizer import normalizar_texto
+from core.page_index import IndicePaginas
+from core.rule_engine import obter_regras
+from core.rule_profile import perfil_habilitado, perfil_regras
+from core.rule_rescore import reavaliar_resultado
+from core.text_cleaner import limpar_paginas
+
+# True dentro dos processos do pool "cpu"
+_em_processo_worker = False
+
+
+def _ler_inteiro(variavel: str, padrao: int) -> int:
+    try:
+        return max(0, int(os.getenv(variavel, str(padrao))))
+    except ValueError:
+        return padrao
+
+
+def _config_pools() -> Dict[str, Dict[str, int]]:
+    """Lê do ambiente workers e fila máxima de cada pool (POOL_<NOME>_WORKERS / POOL_<NOME>_FILA)."""
+    cpus = os.cpu_count() or 1
+    padroes = {"cpu": (cpus, 2 * cpus), "banco": (8, 64), "ia": (4, 8)}
+    return {
+        nome: {
+            "workers": _ler_inteiro(f"POOL_{nome.upper()}_WORKERS", workers),
+            "fila": _ler_inteiro(f"POOL_{nome.upper()}_FILA", fila),
+        }
+        for nome, (workers, fila) in padroes.items()
+    }
+
+
+class PoolSaturado(Exception):
+    """Tarefa recusada por um pool: fila cheia (429) ou pool indisponível (503)."""
+
+    def __init__(self, pool: str, status: int, mensagem: str):
+        super().__init__(mensagem)
+        self.pool = pool
+        self.status = status
+        self.mensagem = mensagem
+        self.retry_after = _ler_inteiro("POOL_RETRY_AFTER_S", 5)
+
+
+def _inicializar_processo():
+    """Roda uma vez em cada processo do pool "cpu"."""
+    global _em_processo_worker
+    _em_processo_worker = True
+    # Sem pool dentro de pool: PDFs grandes são divididos em tarefas deste pool
+    # (core/pipeline.py) e o OCR roda no próprio processo
+    os.environ["EXTRACAO_WORKERS"] = "1"
+    os.environ["OCR_WORKERS"] = "1"
+    # Conexões herdadas do processo pai não podem ser reutilizadas aqui
+    from database.database import engine
+    engine.dispose(close=False)
+    try:
+        obter_regras()
+    except (OSError, ValueError):
+        logging.exception("Worker: falha ao carregar as regras")
+
+
+class PoolLimitado:
+    """Executor com limite de tarefas em andamento (workers + fila), usado a partir do event loop."""
+
+    def __init__(self, nome: str, workers: int, fila: int, processos: bool = False):
+        self.nome = nome
+        # Pool "cpu" com 0 workers: as etapas rodam em threads do próprio processo
+        self.processos = processos and workers > 0
+        self.workers = max(1, workers)
+        self.fila = fila
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pendentes = 0
+        self._recusadas = 0
+
+    def iniciar(self):
+        """Cria o executor; no pool de processos, sobe todos os workers de uma vez (pré-aquecimento)."""
+        with self._lock:
+            if self._executor is not None:
+                return
+            if self.processos:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_inicializar_processo)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"pool-{self.nome}")
+        if self.processos:
+            for futuro in [self._executor.submit(os.getpid) for _ in range(self.workers)]:
+                futuro.result()
+
+    def encerrar(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _reservar(self) -> Executor:
+        with self._lock:
+            if self._pendentes >= self.workers + self.fila:
+                self._recusadas += 1
+                raise PoolSaturado(self.nome, 429, f"Fila do pool '{self.nome}' cheia. Tente novamente em instantes.")
+            self._pendentes += 1
+            return self._executor
+
+    def _liberar(self):
+        with self._lock:
+            self._pendentes -= 1
+
+    async def executar(self, funcao: Callable, *args, **kwargs):
+        """Roda `funcao` no pool sem bloquear o event loop; levanta PoolSaturado em vez de enfileirar sem limite."""
+        if self._executor is None:
+            self.iniciar()
+        executor = self._reservar()
+        try:
+            if executor is None:
+                raise PoolSaturado(self.nome, 503, f"Pool '{self.nome}' indisponível.")
+            try:
+                futuro = executor.submit(partial(funcao, *args, **kwargs))
+            except (RuntimeError, BrokenProcessPool):
+                raise PoolSaturado(self.nome, 503, f"Pool '{self.nome}' indisponível.")
+            return await asyncio.wrap_future(futuro)
+        except BrokenProcessPool:
+            # Um worker morreu (ex.: falta de memória): o pool é recriado na próxima tarefa
+            logging.error("Pool '%s' quebrado; será recriado", self.nome)
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            raise PoolSaturado(self.nome, 503, f"Pool '{self.nome}' indisponível.")
+        finally:
+            self._liberar()
+
+    def estado(self) -> Dict:
+        with self._lock:
+            pendentes = self._pendentes
+            return {
+                "pool": self.nome,
+                "processos": self.processos,
+                "ativo": self._executor is not None,
+                "workers": self.workers,
+                "fila_maxima": self.fila,
+                "em_execucao": min(pendentes, self.workers),
+                "na_fila": max(0, pendentes - self.workers),
+                "recusadas": self._recusadas,
+            }
+
+
+_config = _config_pools()
+pool_cpu = PoolLimitado("cpu", _config["cpu"]["workers"], _config["cpu"]["fila"], processos=True)
+pool_banco = PoolLimitado("banco", _config["banco"]["workers"], _config["banco"]["fila"])
+pool_ia = PoolLimitado("ia", _config["ia"]["workers"], _config["ia"]["fila"])
+POOLS = (pool_cpu, pool_banco, pool_ia)
+
+
+def iniciar_pools():
+    for pool in POOLS:
+        pool.iniciar()
+
+
+def encerrar_pools():
+    for pool in POOLS:
+        pool.encerrar()
+
+
+def estado_pools() -> List[Dict]:
+    return [pool.estado() for pool in POOLS]
+
+
+# ============================================
+# ETAPAS DE CPU (executadas no pool "cpu")
+# ============================================
+
+def preparar_analise(paginas: List[str], avaliar: bool = True) -> Dict:
+    """
+    Limpa as páginas, junta o texto e (se `avaliar`) roda as regras, com os
+    pontos já anotados com página e linha. Com o perfil ligado, devolve também
+    os totais do perfil acumulados neste processo.
+    """
+    preparado = _limpar_e_avaliar(paginas, avaliar)
+    preparado["perfil"] = _perfil_do_processo()
+    return preparado
+
+
+def analisar_textos(textos: List[str]) -> Dict:
+    """
+    Regras sobre textos já extraídos (POST /analisar/texto): cada texto é um
+    documento com as páginas separadas por '\f'. O texto não volta pelo pool,
+    só a limpeza e o resultado das regras de cada um.
+    """
+    resultados = []
+    for texto in textos:
+        preparado = _limpar_e_avaliar(texto.split("\f"), True)
+        resultados.append({"limpeza": preparado["limpeza"], "analise_regras": preparado["analise_regras"]})
+    return {"resultados": resultados, "perfil": _perfil_do_processo()}
+
+
+def reavaliar_cache(resultado: Dict, texto_extraido: Optional[str]) -> Dict:
+    """
+    Resultado das regras de uma análise em cache na versão atual das regras
+    (core/rule_rescore.reavaliar_resultado), com o texto guardado já lido do
+    banco por quem chamou.
+    """
+    return {"analise_regras": reavaliar_resultado(resultado, texto_extraido), "perfil": _perfil_do_processo()}
+
+
+def _limpar_e_avaliar(paginas: List[str], avaliar: bool) -> Dict:
+    paginas_limpas, limpeza = limpar_paginas(paginas)
+    texto = juntar_paginas(paginas_limpas)
+    analise_regras = None
+    if avaliar and texto.strip():
+        # Normalização única (minúsculas, sem acentos); a IA recebe o texto original
+        analise_regras = extrair_clausulas_chave(normalizar_texto(texto))
+        IndicePaginas(paginas_limpas).anotar(analise_regras["pontos_atencao"])
+    return {"texto": texto, "limpeza": limpeza, "analise_regras": analise_regras}
+
+
+def _perfil_do_processo() -> Optional[Dict]:
+    return perfil_regras.extrair() if _em_processo_worker and perfil_habilitado() else None
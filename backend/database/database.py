@@ -1,7 +1,11 @@
+import datetime
 import os
-from sqlalchemy import create_engine, desc
-from sqlalchemy.orm import sessionmaker
-from .models import Base, AnaliseContrato, AnaliseCache
+import zlib
+from typing import Dict, List, Optional
+from sqlalchemy import create_engine, desc, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import defer, sessionmaker
+from .models import Base, AnaliseContrato, AnaliseCache, AnaliseJob, AnaliseLease, TextoExtraidoCache, OcrPaginaCache
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./default.db")
 
@@ -57,28 +61,421 @@ def salvar_analise_cache(
     resultado_regras: dict,
     analise_ia: str,
 ):
-    """Guarda o resultado completo de uma análise para reutilização futura."""
+    """
+    Guarda o resultado completo de uma análise para reutilização futura. Se o hash
+    já tem registro (ex.: force_ai, ou outra requisição gravou primeiro), atualiza-o.
+    """
+    campos = {
+        "nome_arquivo": nome_arquivo,
+        "resumo_texto": resumo_texto,
+        "resultado_regras": resultado_regras,
+        "versao_regras": (resultado_regras or {}).get("versao_regras"),
+        "analise_ia": analise_ia,
+        "data_analise": _agora(),
+    }
     db = SessionLocal()
     try:
-        registro = AnaliseCache(
+        for _ in range(2):
+            registro = db.query(AnaliseCache).filter(AnaliseCache.hash_arquivo == hash_arquivo).first()
+            if registro is None:
+                registro = AnaliseCache(hash_arquivo=hash_arquivo, **campos)
+                db.add(registro)
+            else:
+                for campo, valor in campos.items():
+                    setattr(registro, campo, valor)
+            try:
+                db.commit()
+            except IntegrityError:
+                # Outro processo inseriu o mesmo hash entre a consulta e o insert: atualiza o dele
+                db.rollback()
+                continue
+            db.refresh(registro)
+            return registro
+        return None
+    except Exception as e:
+        print(f"Erro ao salvar cache: {e}")
+        db.rollback()
+        return None
+    finally:
+        db.close()
+
+
+def _filtro_desatualizadas(versao_regras: str):
+    return or_(AnaliseCache.versao_regras.is_(None), AnaliseCache.versao_regras != versao_regras)
+
+
+def contar_analises_desatualizadas(versao_regras: str) -> int:
+    """Quantas análises em cache foram geradas com outra versão das regras."""
+    db = SessionLocal()
+    try:
+        return db.query(AnaliseCache).filter(_filtro_desatualizadas(versao_regras)).count()
+    except Exception as e:
+        print(f"Erro ao contar análises desatualizadas: {e}")
+        return 0
+    finally:
+        db.close()
+
+
+def buscar_analises_desatualizadas(versao_regras: str, apos_id: int, limite: int) -> List[AnaliseCache]:
+    """Próximo lote (por id crescente, depois de `apos_id`) de análises com outra versão das regras."""
+    db = SessionLocal()
+    try:
+        return (
+            db.query(AnaliseCache)
+            .filter(_filtro_desatualizadas(versao_regras), AnaliseCache.id > apos_id)
+            .order_by(AnaliseCache.id)
+            .limit(limite)
+            .all()
+        )
+    except Exception as e:
+        print(f"Erro ao buscar análises desatualizadas: {e}")
+        return []
+    finally:
+        db.close()
+
+
+def atualizar_resultado_regras(id_analise: int, resultado_regras: dict, versao_anterior: Optional[str]) -> bool:
+    """
+    Grava o resultado reavaliado. Só atualiza se a linha ainda estiver na versão lida
+    (uma análise nova gravada no meio do caminho não é sobrescrita).
+    """
+    db = SessionLocal()
+    try:
+        consulta = db.query(AnaliseCache).filter(AnaliseCache.id == id_analise)
+        if versao_anterior is None:
+            consulta = consulta.filter(AnaliseCache.versao_regras.is_(None))
+        else:
+            consulta = consulta.filter(AnaliseCache.versao_regras == versao_anterior)
+        atualizadas = consulta.update(
+            {"resultado_regras": resultado_regras, "versao_regras": resultado_regras.get("versao_regras")},
+            synchronize_session=False,
+        )
+        db.commit()
+        return atualizadas > 0
+    except Exception as e:
+        print(f"Erro ao atualizar resultado das regras: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def buscar_texto_extraido(hash_arquivo: str, versao_extrator: str) -> Optional[str]:
+    """Retorna o texto já extraído de um arquivo (mesmo hash e versão do extrator)."""
+    db = SessionLocal()
+    try:
+        registro = (
+            db.query(TextoExtraidoCache)
+            .filter(
+                TextoExtraidoCache.hash_arquivo == hash_arquivo,
+                TextoExtraidoCache.versao_extrator == versao_extrator,
+            )
+            .first()
+        )
+        if registro is None:
+            return None
+        return zlib.decompress(registro.texto_comprimido).decode("utf-8")
+    except Exception as e:
+        print(f"Erro ao ler texto extraído do cache: {e}")
+        return None
+    finally:
+        db.close()
+
+
+def salvar_texto_extraido(hash_arquivo: str, versao_extrator: str, texto: str):
+    """Guarda o texto extraído (comprimido) para evitar nova extração do mesmo arquivo."""
+    db = SessionLocal()
+    try:
+        registro = TextoExtraidoCache(
             hash_arquivo=hash_arquivo,
-            nome_arquivo=nome_arquivo,
-            resumo_texto=resumo_texto,
-            resultado_regras=resultado_regras,
-            analise_ia=analise_ia,
+            versao_extrator=versao_extrator,
+            texto_comprimido=zlib.compress(texto.encode("utf-8"), 6),
+            tamanho_texto=len(texto),
         )
         db.add(registro)
         db.commit()
-        db.refresh(registro)
         return registro
     except Exception as e:
-        print(f"Erro ao salvar cache: {e}")
+        # Inclui a corrida em que outra requisição salvou o mesmo hash primeiro
+        print(f"Erro ao salvar texto extraído: {e}")
+        db.rollback()
+        return None
+    finally:
+        db.close()
+
+
+def buscar_ocr_pagina(hash_imagem: str, idioma: str) -> Optional[str]:
+    """Retorna o texto de OCR de uma página já reconhecida (mesma imagem e idioma)."""
+    db = SessionLocal()
+    try:
+        registro = (
+            db.query(OcrPaginaCache)
+            .filter(OcrPaginaCache.hash_imagem == hash_imagem, OcrPaginaCache.idioma == idioma)
+            .first()
+        )
+        return registro.texto if registro is not None else None
+    except Exception as e:
+        print(f"Erro ao ler OCR do cache: {e}")
+        return None
+    finally:
+        db.close()
+
+
+def salvar_ocr_pagina(hash_imagem: str, idioma: str, texto: str):
+    """Guarda o texto reconhecido de uma página para reaproveitar em novos uploads."""
+    db = SessionLocal()
+    try:
+        registro = OcrPaginaCache(hash_imagem=hash_imagem, idioma=idioma, texto=texto)
+        db.add(registro)
+        db.commit()
+        return registro
+    except Exception as e:
+        print(f"Erro ao salvar OCR no cache: {e}")
         db.rollback()
         return None
     finally:
         db.close()
 
 
+def _agora() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def criar_job(id_job: str, nome_arquivo: str, force_ai: bool, conteudo: bytes) -> bool:
+    """Enfileira um job de análise (estado 'pendente')."""
+    db = SessionLocal()
+    try:
+        db.add(AnaliseJob(
+            id=id_job, estado="pendente", eventos=[], nome_arquivo=nome_arquivo,
+            force_ai=force_ai, conteudo=conteudo, tentativas=0,
+        ))
+        db.commit()
+        return True
+    except Exception as e:
+        print(f"Erro ao criar job: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def buscar_job(id_job: str) -> Optional[AnaliseJob]:
+    """Estado de um job (sem carregar o arquivo enviado)."""
+    db = SessionLocal()
+    try:
+        return db.query(AnaliseJob).options(defer(AnaliseJob.conteudo)).filter(AnaliseJob.id == id_job).first()
+    finally:
+        db.close()
+
+
+def contar_jobs_pendentes() -> int:
+    db = SessionLocal()
+    try:
+        return db.query(AnaliseJob).filter(AnaliseJob.estado == "pendente").count()
+    finally:
+        db.close()
+
+
+def reservar_job() -> Optional[AnaliseJob]:
+    """
+    Passa o job pendente mais antigo para 'executando' e o devolve (com o arquivo).
+    A troca de estado é condicional, então dois workers nunca pegam o mesmo job.
+    """
+    db = SessionLocal()
+    try:
+        for _ in range(5):
+            candidato = (
+                db.query(AnaliseJob.id)
+                .filter(AnaliseJob.estado == "pendente")
+                .order_by(AnaliseJob.criado_em)
+                .first()
+            )
+            if candidato is None:
+                return None
+            reservados = (
+                db.query(AnaliseJob)
+                .filter(AnaliseJob.id == candidato.id, AnaliseJob.estado == "pendente")
+                .update(
+                    {"estado": "executando", "iniciado_em": _agora(), "tentativas": AnaliseJob.tentativas + 1},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            if reservados:
+                return db.query(AnaliseJob).filter(AnaliseJob.id == candidato.id).first()
+        return None
+    except Exception as e:
+        print(f"Erro ao reservar job: {e}")
+        db.rollback()
+        return None
+    finally:
+        db.close()
+
+
+def registrar_evento_job(id_job: str, evento: Dict):
+    """Acrescenta um evento de progresso ao job e atualiza a etapa corrente."""
+    db = SessionLocal()
+    try:
+        job = db.get(AnaliseJob, id_job)
+        if job is None:
+            return
+        job.eventos = list(job.eventos or []) + [evento]
+        job.etapa = evento.get("etapa")
+        db.commit()
+    except Exception as e:
+        print(f"Erro ao registrar progresso do job: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def finalizar_job(id_job: str, estado: str, resultado: Optional[dict] = None,
+                  erro: Optional[str] = None, status_erro: Optional[int] = None):
+    """Grava o desfecho do job ('concluido' ou 'erro') e descarta o arquivo enviado."""
+    db = SessionLocal()
+    try:
+        db.query(AnaliseJob).filter(AnaliseJob.id == id_job).update(
+            {
+                "estado": estado, "resultado": resultado, "erro": erro, "status_erro": status_erro,
+                "conteudo": None, "concluido_em": _agora(),
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+    except Exception as e:
+        print(f"Erro ao finalizar job: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def devolver_job(id_job: str):
+    """Devolve à fila um job que não pôde rodar agora (ex.: pools cheios)."""
+    db = SessionLocal()
+    try:
+        db.query(AnaliseJob).filter(AnaliseJob.id == id_job, AnaliseJob.estado == "executando").update(
+            {"estado": "pendente", "iniciado_em": None}, synchronize_session=False
+        )
+        db.commit()
+    except Exception as e:
+        print(f"Erro ao devolver job: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def recuperar_jobs_interrompidos(limite_segundos: int, max_tentativas: int) -> int:
+    """
+    Jobs 'executando' há mais de `limite_segundos` (processo reiniciado no meio)
+    voltam para a fila; os que já esgotaram as tentativas terminam em erro.
+    """
+    db = SessionLocal()
+    try:
+        corte = _agora() - datetime.timedelta(seconds=limite_segundos)
+        travados = db.query(AnaliseJob).filter(AnaliseJob.estado == "executando", AnaliseJob.iniciado_em < corte)
+        travados.filter(AnaliseJob.tentativas >= max_tentativas).update(
+            {
+                "estado": "erro", "erro": "Job interrompido repetidas vezes.", "status_erro": 500,
+                "conteudo": None, "concluido_em": _agora(),
+            },
+            synchronize_session=False,
+        )
+        devolvidos = travados.update({"estado": "pendente", "iniciado_em": None}, synchronize_session=False)
+        db.commit()
+        return devolvidos
+    except Exception as e:
+        print(f"Erro ao recuperar jobs interrompidos: {e}")
+        db.rollback()
+        return 0
+    finally:
+        db.close()
+
+
+def remover_jobs_antigos(horas: int) -> int:
+    """Apaga jobs terminados há mais de `horas` horas."""
+    db = SessionLocal()
+    try:
+        corte = _agora() - datetime.timedelta(hours=horas)
+        removidos = (
+            db.query(AnaliseJob)
+            .filter(AnaliseJob.estado.in_(("concluido", "erro")), AnaliseJob.concluido_em < corte)
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return removidos
+    except Exception as e:
+        print(f"Erro ao remover jobs antigos: {e}")
+        db.rollback()
+        return 0
+    finally:
+        db.close()
+
+
+def adquirir_lease_analise(hash_arquivo: str, dono: str, duracao_segundos: int) -> bool:
+    """
+    Tenta assumir a análise do hash entre os workers: cria o lease ou toma um
+    expirado. Sem acesso ao banco, devolve True (quem chama analisa por conta própria).
+    """
+    db = SessionLocal()
+    try:
+        expira_em = _agora() + datetime.timedelta(seconds=duracao_segundos)
+        db.add(AnaliseLease(hash_arquivo=hash_arquivo, dono=dono, expira_em=expira_em))
+        try:
+            db.commit()
+            return True
+        except IntegrityError:
+            db.rollback()
+        tomados = (
+            db.query(AnaliseLease)
+            .filter(
+                AnaliseLease.hash_arquivo == hash_arquivo,
+                or_(AnaliseLease.expira_em < _agora(), AnaliseLease.dono == dono),
+            )
+            .update({"dono": dono, "expira_em": expira_em}, synchronize_session=False)
+        )
+        db.commit()
+        return bool(tomados)
+    except Exception as e:
+        print(f"Erro ao adquirir lease da análise: {e}")
+        db.rollback()
+        return True
+    finally:
+        db.close()
+
+
+def renovar_lease_analise(hash_arquivo: str, dono: str, duracao_segundos: int) -> bool:
+    """Adia a expiração do lease; False se ele já não é de `dono`."""
+    db = SessionLocal()
+    try:
+        renovados = (
+            db.query(AnaliseLease)
+            .filter(AnaliseLease.hash_arquivo == hash_arquivo, AnaliseLease.dono == dono)
+            .update({"expira_em": _agora() + datetime.timedelta(seconds=duracao_segundos)}, synchronize_session=False)
+        )
+        db.commit()
+        return bool(renovados)
+    except Exception as e:
+        print(f"Erro ao renovar lease da análise: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def liberar_lease_analise(hash_arquivo: str, dono: str):
+    db = SessionLocal()
+    try:
+        db.query(AnaliseLease).filter(
+            AnaliseLease.hash_arquivo == hash_arquivo, AnaliseLease.dono == dono
+        ).delete(synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        print(f"Erro ao liberar lease da análise: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
 def buscar_todas_analises():
     """Busca todas as análises salvas na base de dados, da mais recente para a mais antiga."""
     db = SessionLocal()
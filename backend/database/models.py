@@ -1,4 +1,4 @@
-﻿from sqlalchemy import Column, Integer, String, JSON, DateTime, UniqueConstraint
+﻿from sqlalchemy import Boolean, Column, Integer, String, JSON, DateTime, LargeBinary, UniqueConstraint
 from sqlalchemy.orm import declarative_base
 import datetime
 
@@ -37,6 +37,65 @@ class AnaliseCache(Base):
     nome_arquivo = Column(String, nullable=False)
     resumo_texto = Column(String)
     resultado_regras = Column(JSON)
+    # SHA-256 do arquivo de regras que gerou resultado_regras (NULL: anterior ao versionamento)
+    versao_regras = Column(String, index=True)
     analise_ia = Column(String)
     data_analise = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
 
+
+class TextoExtraidoCache(Base):
+    __tablename__ = "textos_extraidos_cache"
+    __table_args__ = (
+        UniqueConstraint("hash_arquivo", "versao_extrator", name="uq_texto_hash_versao"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    hash_arquivo = Column(String, nullable=False, index=True)
+    versao_extrator = Column(String, nullable=False)
+    texto_comprimido = Column(LargeBinary, nullable=False)
+    tamanho_texto = Column(Integer)
+    data_extracao = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
+
+
+class OcrPaginaCache(Base):
+    __tablename__ = "ocr_paginas_cache"
+    __table_args__ = (UniqueConstraint("hash_imagem", "idioma", name="uq_ocr_hash_idioma"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    hash_imagem = Column(String, nullable=False, index=True)
+    idioma = Column(String, nullable=False)
+    texto = Column(String)
+    data_ocr = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
+
+
+class AnaliseLease(Base):
+    """Análise de um arquivo em andamento em algum worker (coalescência entre processos)."""
+
+    __tablename__ = "analise_leases"
+
+    hash_arquivo = Column(String, primary_key=True)
+    # Processo que está analisando; renova expira_em enquanto trabalha
+    dono = Column(String, nullable=False)
+    expira_em = Column(DateTime, nullable=False)
+
+
+class AnaliseJob(Base):
+    __tablename__ = "analise_jobs"
+
+    id = Column(String, primary_key=True)
+    # pendente -> executando -> concluido | erro
+    estado = Column(String, nullable=False, index=True, default="pendente")
+    etapa = Column(String)
+    # Progresso por etapa: [{"etapa", "estado", "em", ...}]
+    eventos = Column(JSON)
+    nome_arquivo = Column(String, nullable=False)
+    force_ai = Column(Boolean, nullable=False, default=False)
+    # Arquivo enviado; apagado quando o job termina
+    conteudo = Column(LargeBinary)
+    resultado = Column(JSON)
+    erro = Column(String)
+    status_erro = Column(Integer)
+    tentativas = Column(Integer, nullable=False, default=0)
+    criado_em = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc), index=True)
+    iniciado_em = Column(DateTime)
+    concluido_em = Column(DateTime)
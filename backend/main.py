@@ -1,28 +1,49 @@
 ﻿# backend/main.py
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Header, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-import tempfile
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+import asyncio
 import os
 import sys
 from pathlib import Path
-import hashlib
+import hmac
 import logging
+from typing import Optional
 
 # Garante que os módulos no diretório 'core' e 'database' sejam encontrados
 sys.path.append(str(Path(__file__).parent))
 
 # --- Importações Corrigidas e Simplificadas ---
 # Carregamos apenas o necessário para o endpoint único
-# 'extrair_texto_adendo' é a função que lê PDF e DOCX
-from core.extractor import extrair_texto_adendo, extrair_clausulas_chave
-from core.ai_analyzer import analisar_contrato_com_ia, configurar_api_gemini
+# 'extrair_paginas_adendo' é a função que lê PDF e DOCX (página a página)
+from core.batch import analisar_lote, config_lote, expandir_arquivos
+from core.extractor import aquecer_pool_extracao, encerrar_pool_extracao
+from core.jobs import descrever_job, executor_jobs
+from core.ocr import encerrar_pool_ocr
+from core.pipeline import (
+    ErroAnalise,
+    analisar_conteudo,
+    analisar_em_stream,
+    etag_confere,
+    etag_resposta,
+    extensoes_permitidas,
+    normalizar_sha256,
+    resposta_cache,
+)
+from core.rule_engine import obter_regras, recarregar_regras
+from core.rule_profile import perfil_regras
+from core.rule_rescore import reprocessador_regras
+from core.text_analysis import analisar_texto, analisar_textos_lote, config_texto, interpretar_corpo, itens_lote, ler_corpo
+from core.upload import receber_upload, receber_uploads
+from core.workers import PoolSaturado, encerrar_pools, estado_pools, iniciar_pools, pool_banco, pool_cpu
 
 # Funções e modelos do banco de dados
 from database.database import (
     engine,
     buscar_analise_por_hash,
-    salvar_analise_cache,
+    buscar_job,
+    contar_analises_desatualizadas,
 )
 from database import models
 
@@ -48,120 +69,365 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.on_event("startup")
+def iniciar_pools_trabalho():
+    """Pré-aquece os pools de trabalho (processos da CPU já com pdfplumber e as regras carregadas)."""
+    iniciar_pools()
+    if not pool_cpu.processos:
+        # Sem processos dedicados, a extração paralela de PDFs grandes usa o pool do extrator
+        aquecer_pool_extracao()
+
+
+@app.on_event("startup")
+def carregar_regras_risco():
+    """Carrega e compila as regras de risco na subida (erros no YAML aparecem logo)."""
+    obter_regras()
+
+
+@app.on_event("startup")
+def iniciar_reprocessamento_regras():
+    """Thread que atualiza as análises em cache quando as regras mudam (REGRAS_REPROCESSAR)."""
+    reprocessador_regras.iniciar()
+
+
+@app.on_event("startup")
+async def iniciar_jobs_analise():
+    """Tarefas que consomem a fila de jobs de análise (JOBS_HABILITADO)."""
+    await executor_jobs.iniciar()
+
+
+@app.on_event("shutdown")
+async def finalizar_jobs_analise():
+    await executor_jobs.encerrar()
+
+
+@app.on_event("shutdown")
+def finalizar_pool_extracao():
+    reprocessador_regras.encerrar()
+    encerrar_pools()
+    encerrar_pool_extracao()
+    encerrar_pool_ocr()
+
+
+@app.middleware("http")
+async def contar_analises_ao_vivo(request: Request, call_next):
+    """Enquanto houver análises em andamento, o reprocessamento em segundo plano espera."""
+    # Jobs e lotes contam por conta própria (o POST do job só enfileira e a resposta do lote
+    # é um stream que continua depois que call_next retorna)
+    caminho = request.url.path
+    if not caminho.startswith("/analisar") or caminho.startswith(("/analisar/jobs", "/analisar/lote")):
+        return await call_next(request)
+    reprocessador_regras.inicio_requisicao()
+    try:
+        return await call_next(request)
+    finally:
+        reprocessador_regras.fim_requisicao()
+
+
+@app.exception_handler(PoolSaturado)
+async def pool_saturado_handler(request: Request, exc: PoolSaturado):
+    """Fila cheia (429) ou pool indisponível (503): o cliente deve tentar de novo mais tarde."""
+    return JSONResponse(
+        status_code=exc.status,
+        content={"detail": exc.mensagem},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(ErroAnalise)
+async def erro_analise_handler(request: Request, exc: ErroAnalise):
+    return JSONResponse(status_code=exc.status, content={"detail": exc.detalhe})
+
 # =======================================================
 # ENDPOINT ÚNICO: ANÁLISE DE CONTRATO (Qualquer Formato)
 # =======================================================
 
-@app.post("/analisar/", tags=["Análise de Contratos"])
+# O corpo é lido em streaming (core/upload.py), então o arquivo não é um parâmetro
+# do FastAPI; o schema abaixo só documenta o formulário no OpenAPI
+CORPO_UPLOAD = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+DESCRICAO_SHA256 = "SHA-256 do arquivo calculado pelo cliente; o upload é recusado (400) se não conferir."
+
+
+@app.post("/analisar/", tags=["Análise de Contratos"], openapi_extra=CORPO_UPLOAD)
 async def analisar_arquivo_endpoint(
-    file: UploadFile = File(...),
+    request: Request,
     force_ai: bool = Query(False, description="Força reprocessamento da IA mesmo quando houver cache."),
+    stream: bool = Query(False, description="Responde em SSE: regras primeiro, depois a análise da IA em trechos."),
+    sha256: Optional[str] = Query(None, description=DESCRICAO_SHA256),
 ):
     """Recebe um arquivo (PDF ou DOCX) e executa a análise completa."""
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="Arquivo enviado sem nome.")
-        
-    # --- Validação de formatos suportados ---
-    allowed_exts = {e.strip().lstrip('.').lower() for e in os.getenv('ALLOWED_EXTS', 'pdf,docx').split(',') if e.strip()}
-    extensao = file.filename.split('.')[-1].lower()
-    if extensao not in allowed_exts:
-        raise HTTPException(status_code=400, detail="Formato de arquivo não suportado. Use PDF ou DOCX.")
-
-    # Limite de tamanho do upload (MB), configurável por env
+    arquivo = None
     try:
-        max_mb = float(os.getenv("MAX_UPLOAD_MB", "15"))
-    except ValueError:
-        max_mb = 15.0
-    max_bytes = int(max_mb * 1024 * 1024)
-    
-    caminho_temporario = None
-    try:
-        # Usa a extensão correta para o arquivo temporário
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{extensao}") as tmp:
-            conteudo = await file.read()
-
-            # Validação de tamanho (proteção simples de memória/abuso)
-            if len(conteudo) > max_bytes:
-                raise HTTPException(status_code=413, detail=f"Arquivo excede o limite de {int(max_mb)}MB.")
-            hash_arquivo = hashlib.sha256(conteudo).hexdigest()
-
-            cache_salvo = buscar_analise_por_hash(hash_arquivo)
-            if cache_salvo and not force_ai:
-                resultado_cache = cache_salvo.resultado_regras or {}
-                score_cache = resultado_cache.get("score", 0)
-                total_clausulas = resultado_cache.get(
-                    "total_clausulas_problematicas",
-                    len(resultado_cache.get("pontos_atencao", []) or []),
-                )
-                return {
-                    "sucesso": True,
-                    "nomeArquivo": file.filename,
-                    "textoExtraido": cache_salvo.resumo_texto or "",
-                    "scoreRisco": score_cache,
-                    "nivelRisco": resultado_cache.get("nivel_risco", "DESCONHECIDO"),
-                    "pontosAtencao": resultado_cache.get("pontos_atencao", []),
-                    "totalClausulasProblem": total_clausulas,
-                    "analiseIA": cache_salvo.analise_ia or "API de IA não configurada.",
-                    "cacheHit": True,
-                }
-
-            tmp.write(conteudo)
-            caminho_temporario = tmp.name
-        
-        # --- Usa a função de extração que lê PDF e DOCX ---
-        texto_extraido, erro_extracao = extrair_texto_adendo(caminho_temporario)
-        
-        if erro_extracao:
-            raise HTTPException(status_code=400, detail=erro_extracao)
-        
-        # --- Verificação de Mínimo de Texto ---
-        if not texto_extraido or len(texto_extraido.strip()) < 100:
-            raise HTTPException(status_code=400, detail="Texto extraído insuficiente. Verifique se o arquivo não é uma imagem escaneada.")
-        
-        # O resto da lógica de análise
-        analise_regras = None
-        if cache_salvo and force_ai and (cache_salvo.resultado_regras):
-            # Reutiliza as regras do cache para evitar recomputo desnecessário
-            analise_regras = cache_salvo.resultado_regras
-        else:
-            analise_regras = extrair_clausulas_chave(texto_extraido)
-        
-        analise_ia_texto = "API de IA não configurada."
-        if configurar_api_gemini():
-            analise_ia_texto = analisar_contrato_com_ia(texto_extraido)
-        
-        resumo_texto = texto_extraido[:500] + ("..." if len(texto_extraido) > 500 else "")
-
-        resposta = {
-            "sucesso": True,
-            "nomeArquivo": file.filename,
-            "textoExtraido": resumo_texto,
-            "scoreRisco": analise_regras["score"],
-            "nivelRisco": analise_regras["nivel_risco"],
-            "pontosAtencao": analise_regras["pontos_atencao"],
-            "totalClausulasProblem": analise_regras["total_clausulas_problematicas"],
-            "analiseIA": analise_ia_texto
-        }
-
-        salvar_analise_cache(
-            hash_arquivo=hash_arquivo,
-            nome_arquivo=file.filename,
-            resumo_texto=resumo_texto,
-            resultado_regras=analise_regras,
-            analise_ia=analise_ia_texto,
-        )
-
-        return resposta
-        
-    except HTTPException:
+        arquivo = await receber_upload(request, hash_esperado=sha256)
+        if stream:
+            # O primeiro evento só sai depois da extração, então o arquivo já pode ser descartado no finally
+            eventos = await analisar_em_stream(arquivo.fonte(), arquivo.nome, force_ai, hash_arquivo=arquivo.hash)
+            return StreamingResponse(
+                eventos,
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+        return await analisar_conteudo(arquivo.fonte(), arquivo.nome, force_ai, hash_arquivo=arquivo.hash)
+    except (HTTPException, ErroAnalise, PoolSaturado):
         raise
     except Exception as e:
         logging.exception("Erro inesperado no endpoint /analisar")
         # Evitar revelar detalhes internos ao cliente
         raise HTTPException(status_code=500, detail="Erro interno do servidor. Tente novamente mais tarde.")
     finally:
-        if caminho_temporario and os.path.exists(caminho_temporario):
-            os.unlink(caminho_temporario)
+        if arquivo is not None:
+            arquivo.descartar()
+
+# =======================================================
+# TEXTO JÁ EXTRAÍDO: SÓ REGRAS (SEM UPLOAD)
+# =======================================================
+
+CORPO_TEXTO = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {
+                    "type": "object",
+                    "required": ["texto"],
+                    "properties": {"texto": {"type": "string"}, "nomeArquivo": {"type": "string"}},
+                }
+            },
+            "text/plain": {"schema": {"type": "string"}},
+        },
+    }
+}
+
+CORPO_TEXTO_LOTE = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {
+                    "type": "object",
+                    "required": ["textos"],
+                    "properties": {"textos": {"type": "array", "items": CORPO_TEXTO["requestBody"]["content"]["application/json"]["schema"]}},
+                }
+            }
+        },
+    }
+}
+
+
+@app.post("/analisar/texto", tags=["Análise de Contratos"], openapi_extra=CORPO_TEXTO)
+async def analisar_texto_endpoint(
+    request: Request,
+    ia: bool = Query(False, description="Também roda a análise da IA (lenta)."),
+    cache: bool = Query(False, description="Reaproveita e grava a análise no cache, pelo SHA-256 do texto."),
+    nome: str = Query("texto.txt", description="Nome devolvido em nomeArquivo quando o corpo é text/plain."),
+):
+    """Regras sobre o texto do contrato (JSON {"texto", "nomeArquivo"} ou text/plain), sem upload nem extração."""
+    corpo = await ler_corpo(request, config_texto()["max_kb"] * 1024)
+    dados = interpretar_corpo(request.headers.get("content-type"), corpo)
+    if isinstance(dados, dict):
+        texto, nome = dados.get("texto"), dados.get("nomeArquivo") or nome
+    else:
+        texto = dados
+    if not isinstance(texto, str):
+        raise HTTPException(status_code=400, detail='Envie {"texto": "..."} ou o texto como text/plain.')
+    return await analisar_texto(texto, nome, ia=ia, cache=cache)
+
+
+@app.post("/analisar/texto/lote", tags=["Análise de Contratos"], openapi_extra=CORPO_TEXTO_LOTE)
+async def analisar_textos_lote_endpoint(request: Request):
+    """Regras para vários textos de uma vez ({"textos": [...]}); resultados na ordem enviada, sem IA nem cache."""
+    config = config_texto()
+    corpo = await ler_corpo(request, config["lote_max_mb"] * 1024 * 1024)
+    itens = itens_lote(interpretar_corpo(request.headers.get("content-type"), corpo), config["lote_max"])
+    return {"resultados": await analisar_textos_lote(itens)}
+
+# =======================================================
+# CONSULTA POR HASH: EVITA REENVIAR ARQUIVOS JÁ ANALISADOS
+# =======================================================
+
+@app.api_route("/analises/{sha256}", methods=["GET", "HEAD"], tags=["Análise de Contratos"])
+async def analise_por_hash(sha256: str, request: Request):
+    """
+    Análise em cache do arquivo com este SHA-256, ou 404. O cliente calcula o
+    hash antes e só envia o arquivo quando não há resultado; com If-None-Match,
+    responde 304 se o resultado não mudou (ex.: regras não foram alteradas).
+    """
+    hash_arquivo = normalizar_sha256(sha256)
+    cache_salvo = await pool_banco.executar(buscar_analise_por_hash, hash_arquivo)
+    if cache_salvo is None:
+        raise HTTPException(status_code=404, detail="Nenhuma análise para este arquivo.")
+    resposta = await resposta_cache(cache_salvo, cache_salvo.nome_arquivo)
+    etag = etag_resposta(resposta)
+    cabecalhos = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_confere(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cabecalhos)
+    # HEAD recebe os mesmos cabeçalhos (inclusive Content-Length); o servidor não envia o corpo
+    return JSONResponse(content=resposta, headers=cabecalhos)
+
+# =======================================================
+# LOTE: VÁRIOS CONTRATOS, RESULTADOS EM NDJSON
+# =======================================================
+
+CORPO_LOTE = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["files"],
+                    "properties": {"files": {"type": "array", "items": {"type": "string", "format": "binary"}}},
+                }
+            }
+        },
+    }
+}
+
+
+@app.post("/analisar/lote", tags=["Análise de Contratos"], openapi_extra=CORPO_LOTE)
+async def analisar_lote_endpoint(
+    request: Request,
+    force_ai: bool = Query(False, description="Força reprocessamento da IA mesmo quando houver cache."),
+):
+    """
+    Vários arquivos (PDF, DOCX ou .zip com eles) no campo 'files'. Responde em
+    NDJSON: uma linha por contrato, assim que cada um termina, e o resumo no fim.
+    """
+    config = config_lote()
+    arquivos = await receber_uploads(
+        request, "files", config["max_arquivos"], config["max_bytes"], extensoes_permitidas() | {"zip"},
+    )
+    itens = await asyncio.to_thread(expandir_arquivos, arquivos, config["max_arquivos"], config["max_bytes"])
+    return StreamingResponse(
+        analisar_lote(itens, force_ai),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# =======================================================
+# JOBS: ANÁLISE ASSÍNCRONA COM PROGRESSO
+# =======================================================
+
+@app.post("/analisar/jobs", status_code=202, tags=["Análise de Contratos"], openapi_extra=CORPO_UPLOAD)
+async def criar_job_analise(
+    request: Request,
+    force_ai: bool = Query(False, description="Força reprocessamento da IA mesmo quando houver cache."),
+    sha256: Optional[str] = Query(None, description=DESCRICAO_SHA256),
+):
+    """Enfileira a análise e responde na hora com o id do job (acompanhe por status ou pelo stream de eventos)."""
+    arquivo = await receber_upload(request, hash_esperado=sha256)
+    try:
+        # O job guarda o arquivo no banco (a fila sobrevive a reinícios)
+        conteudo = await asyncio.to_thread(arquivo.ler)
+    finally:
+        arquivo.descartar()
+    id_job = await executor_jobs.enfileirar(arquivo.nome, conteudo, force_ai)
+    return {
+        "jobId": id_job,
+        "estado": "pendente",
+        "status": f"/analisar/jobs/{id_job}",
+        "eventos": f"/analisar/jobs/{id_job}/eventos",
+    }
+
+
+@app.get("/analisar/jobs/{job_id}", tags=["Análise de Contratos"])
+async def status_job_analise(job_id: str):
+    """Estado, etapa corrente, eventos de progresso e (quando concluído) o resultado do job."""
+    job = await pool_banco.executar(buscar_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    return descrever_job(job)
+
+
+@app.get("/analisar/jobs/{job_id}/eventos", tags=["Análise de Contratos"])
+async def eventos_job_analise(job_id: str):
+    """Stream SSE: 'progresso' a cada etapa (hash, extracao, regras, ia, gravacao) e 'concluido'/'erro' no fim."""
+    job = await pool_banco.executar(buscar_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    return StreamingResponse(
+        executor_jobs.eventos_sse(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# ============================================
+# ADMINISTRAÇÃO: REGRAS DE RISCO
+# ============================================
+
+def verificar_admin(x_admin_token: str = Header(None)):
+    """Exige o cabeçalho X-Admin-Token igual a ADMIN_TOKEN; sem ADMIN_TOKEN definido, os endpoints ficam desativados."""
+    token = os.getenv("ADMIN_TOKEN", "")
+    if not token:
+        raise HTTPException(status_code=403, detail="Endpoints administrativos desativados (defina ADMIN_TOKEN).")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, token):
+        raise HTTPException(status_code=401, detail="Token administrativo inválido.")
+
+
+@app.get("/admin/regras", tags=["Administração"], dependencies=[Depends(verificar_admin)])
+def status_regras():
+    """Versão (SHA-256 do YAML) e quantidade das regras em uso."""
+    return obter_regras().resumo()
+
+
+@app.post("/admin/regras/recarregar", tags=["Administração"], dependencies=[Depends(verificar_admin)])
+def recarregar_regras_endpoint():
+    """Relê rules/risk_rules.yaml sem reiniciar a API; se o arquivo for inválido, mantém as regras atuais."""
+    try:
+        resumo = recarregar_regras().resumo()
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Regras não recarregadas: {e}")
+    reprocessador_regras.disparar()
+    return resumo
+
+
+@app.get("/admin/regras/reprocessamento", tags=["Administração"], dependencies=[Depends(verificar_admin)])
+def progresso_reprocessamento():
+    """Progresso da atualização em segundo plano das análises em cache para a versão atual das regras."""
+    progresso = reprocessador_regras.progresso()
+    progresso["desatualizadas"] = contar_analises_desatualizadas(obter_regras().versao)
+    return progresso
+
+
+@app.post("/admin/regras/reprocessamento", tags=["Administração"], dependencies=[Depends(verificar_admin)])
+def disparar_reprocessamento():
+    """Inicia já um ciclo de reprocessamento (sem esperar o intervalo)."""
+    reprocessador_regras.disparar()
+    return reprocessador_regras.progresso()
+
+
+@app.get("/admin/regras/perfil", tags=["Administração"], dependencies=[Depends(verificar_admin)])
+def perfil_regras_endpoint():
+    """Tempo, disparos e tamanho médio do trecho por regra e por categoria (requer REGRAS_PERFIL=true)."""
+    return perfil_regras.resumo([regra.id for regra in obter_regras().regras])
+
+
+@app.delete("/admin/regras/perfil", tags=["Administração"], dependencies=[Depends(verificar_admin)])
+def zerar_perfil_regras():
+    """Zera as estatísticas acumuladas do perfil das regras."""
+    perfil_regras.zerar()
+    return {"sucesso": True}
+
+
+@app.get("/admin/pools", tags=["Administração"], dependencies=[Depends(verificar_admin)])
+def estado_pools_endpoint():
+    """Ocupação, fila e tarefas recusadas de cada pool de trabalho (cpu, banco, ia)."""
+    return estado_pools()
 
 # ============================================
 # ENDPOINT ROOT: VERIFICAÇÃO DE STATUS
@@ -174,6 +440,10 @@ def root():
         "versao": "1.5 (Simplificada)",
         "endpoints": {
             "analise_contrato": "/analisar/",
+            "analise_assincrona": "/analisar/jobs",
+            "analise_lote": "/analisar/lote",
+            "analise_por_hash": "/analises/{sha256}",
+            "analise_texto": "/analisar/texto",
             "docs": "/docs"
         }
     }
\ No newline at end of file
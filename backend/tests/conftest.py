@@ -0,0 +1,9 @@
+# tests/conftest.py
+
+"""Testes do backend (rodar a partir de backend/: python -m pytest -q tests)."""
+
+import sys
+from pathlib import Path
+
+# Os módulos são importados como "core.*", como na API
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,64 @@
+# tests/test_clause_segmenter.py
+
+from core.clause_segmenter import segmentar_clausulas
+from core.normalizer import normalizar_texto
+
+CONTRATO = (
+    "CONTRATO DE LOCAÇÃO COMERCIAL\n"
+    "Entre as partes abaixo qualificadas.\n"
+    "CLÁUSULA 1ª - DO PRAZO\n"
+    "O prazo é de 3 anos.\n"
+    "§ 1º Renovável por acordo.\n"
+    "a) por escrito;\n"
+    "b) com 90 dias de aviso.\n"
+    "CLÁUSULA SEGUNDA: DA MULTA\n"
+    "Multa de 10% sobre o débito.\n"
+    "Parágrafo Único - Sem juros.\n"
+    "CLÁUSULA DÉCIMA SEGUNDA - DO FORO\n"
+    "Fica eleito o foro da comarca de Campinas.\n"
+)
+
+
+def _segmentos():
+    normalizado = normalizar_texto(CONTRATO)
+    return normalizado, segmentar_clausulas(normalizado)
+
+
+def test_ids_hierarquicos():
+    _, segmentos = _segmentos()
+
+    assert [segmento.id for segmento in segmentos] == [
+        "preambulo", "1", "1.§1", "1.§1.a", "1.§1.b", "2", "2.§unico", "12",
+    ]
+
+
+def test_segmentos_cobrem_o_documento_sem_lacunas():
+    normalizado, segmentos = _segmentos()
+
+    assert segmentos[0].inicio == 0
+    assert segmentos[-1].fim == len(normalizado.texto)
+    for anterior, seguinte in zip(segmentos, segmentos[1:]):
+        assert anterior.fim == seguinte.inicio
+
+
+def test_limites_e_titulos():
+    normalizado, segmentos = _segmentos()
+    por_id = {segmento.id: segmento for segmento in segmentos}
+
+    def texto(id_segmento):
+        segmento = por_id[id_segmento]
+        return normalizado.texto[segmento.inicio:segmento.fim]
+
+    assert texto("preambulo") == "contrato de locacao comercial\nentre as partes abaixo qualificadas.\n"
+    assert texto("1") == "clausula 1a - do prazo\no prazo e de 3 anos.\n"
+    assert texto("1.§1.a") == "a) por escrito;\n"
+    assert texto("2.§unico") == "paragrafo unico - sem juros.\n"
+    # O título é a linha de abertura da cláusula no texto original, herdado pelos subsegmentos
+    assert por_id["1.§1.b"].titulo == "CLÁUSULA 1ª - DO PRAZO"
+    assert por_id["12"].titulo == "CLÁUSULA DÉCIMA SEGUNDA - DO FORO"
+
+
+def test_referencia_no_meio_da_frase_nao_abre_clausula():
+    normalizado = normalizar_texto("Preâmbulo.\nCLÁUSULA 3 - DO USO\nConforme a cláusula 8, o uso é comercial.\n")
+
+    assert [segmento.id for segmento in segmentar_clausulas(normalizado)] == ["preambulo", "3"]
@@ -0,0 +1,44 @@
+# tests/test_normalizer.py
+
+from core.normalizer import normalizar_texto
+
+
+def test_normaliza_caixa_acentos_e_espacos():
+    normalizado = normalizar_texto("CLÁUSULA 1ª  -\tDo   Prazo\r\n\nAção")
+
+    assert normalizado.texto == "clausula 1a - do prazo\nacao"
+
+
+def test_trecho_normalizado_volta_ao_original():
+    original = "Fica   eleito o FORO da\n\n  Comarca de São Paulo, conforme a LEI nº 8.245."
+    normalizado = normalizar_texto(original)
+
+    inicio = normalizado.texto.index("comarca de sao paulo")
+    fim = inicio + len("comarca de sao paulo")
+
+    assert normalizado.trecho_original(inicio, fim) == "Comarca de São Paulo"
+    assert normalizado.intervalo_original(inicio, fim) == (original.index("Comarca"), original.index(","))
+
+
+def test_offsets_com_acentos_combinantes():
+    # "e" + acento combinante (NFD) vira um caractere só no normalizado
+    original = "Multa de mora: ate\u0301 20% ao me\u0302s."
+    normalizado = normalizar_texto(original)
+
+    assert normalizado.texto == "multa de mora: ate 20% ao mes."
+    inicio = normalizado.texto.index("ate 20%")
+    assert normalizado.trecho_original(inicio, inicio + len("ate 20%")) == "ate\u0301 20%"
+    assert normalizado.trecho_original(inicio, inicio + len("ate 20% ao mes")) == "ate\u0301 20% ao me\u0302s"
+
+
+def test_toda_posicao_aponta_para_o_caractere_correspondente():
+    original = "Parágrafo   Único —  O LOCATÁRIO\t\tpagará\n\n\no IPTU."
+    normalizado = normalizar_texto(original)
+
+    for indice, caractere in enumerate(normalizado.texto):
+        correspondente = original[normalizado.posicao_original(indice)]
+        if caractere in " \n":
+            assert correspondente.isspace()
+        else:
+            assert normalizar_texto(correspondente).texto == caractere
+    assert normalizado.posicao_original(len(normalizado.texto)) == len(original)
@@ -0,0 +1,67 @@
+# tests/test_rule_engine.py
+
+import pytest
+
+from core.normalizer import normalizar_texto
+from core.rule_engine import avaliar_regras
+
+CLAUSULAS = [
+    "O prazo de locação é de 3 anos, contados da assinatura.",
+    "Fica estipulada multa rescisória de 12 meses de aluguel em caso de rescisão antecipada.",
+    "Em caso de atraso incidirá multa de mora de 20% e juros de 2% ao mês.",
+    "As benfeitorias realizadas ficarão sem indenização ao locatário.",
+    "Horário de funcionamento das 8 às 20 horas.",
+    "É proibida a sublocação total ou parcial do imóvel.",
+    "O locatário será responsável pelo pagamento do IPTU.",
+    "A carga elétrica disponível é de 30 kVA.",
+    "O locatário prestará caução de 6 aluguéis e apresentará fiador idôneo.",
+    "Fica eleito o foro da comarca de Campinas.",
+]
+CONTRATO = "CONTRATO DE LOCAÇÃO COMERCIAL\nEntre as partes abaixo qualificadas.\n" + "".join(
+    f"CLÁUSULA {numero}ª - {texto}\nAs partes declaram estar de acordo.\n"
+    for numero, texto in enumerate(CLAUSULAS, start=1)
+)
+
+
+@pytest.mark.parametrize("escopo_clausula", [False, True])
+def test_prefiltro_igual_a_varredura_completa(escopo_clausula):
+    normalizado = normalizar_texto(CONTRATO)
+
+    completo = avaliar_regras(normalizado, usar_prefiltro=False, escopo_clausula=escopo_clausula)
+    prefiltrado = avaliar_regras(normalizado, usar_prefiltro=True, escopo_clausula=escopo_clausula)
+
+    assert completo["pontos_atencao"]
+    assert prefiltrado == completo
+
+
+def test_texto_bruto_e_normalizado_dao_o_mesmo_resultado():
+    assert avaliar_regras(CONTRATO) == avaliar_regras(normalizar_texto(CONTRATO))
+
+
+def test_pontos_informam_a_clausula():
+    resultado = avaliar_regras(CONTRATO, escopo_clausula=True)
+    foro = [ponto for ponto in resultado["pontos_atencao"] if ponto["regra"] == "foro_distante"]
+
+    assert len(foro) == 1
+    assert foro[0]["clausula"] == "10"
+    assert foro[0]["clausula_titulo"] == "CLÁUSULA 10ª - Fica eleito o foro da comarca de Campinas."
+
+
+def test_localizacao_aponta_o_trecho_no_texto_original():
+    resultado = avaliar_regras(CONTRATO)
+    prazo = next(ponto for ponto in resultado["pontos_atencao"] if ponto["regra"] == "prazo_inferior_5_anos")
+    inicio, fim = prazo["localizacao"]["inicio"], prazo["localizacao"]["fim"]
+
+    assert CONTRATO[inicio:fim] == "prazo de locação é de 3 ano"
+
+
+@pytest.mark.parametrize("frase, dispara", [
+    ("Fica eleito o foro da comarca de Campinas.", True),
+    ("Fica eleito o foro da comarca de Manaus", True),
+    ("Fica eleito o foro da comarca de São Paulo, Estado de São Paulo.", False),
+    ("Fica eleito o foro da comarca do Rio de Janeiro/RJ.", False),
+])
+def test_foro_distante(frase, dispara):
+    regras = {ponto["regra"] for ponto in avaliar_regras(frase)["pontos_atencao"]}
+
+    assert ("foro_distante" in regras) is dispara
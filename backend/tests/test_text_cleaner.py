@@ -0,0 +1,71 @@
+# tests/test_text_cleaner.py
+
+import pytest
+
+from core.text_cleaner import limpar_paginas
+
+
+def _pagina(numero: int, corpo: str) -> str:
+    return "\n".join([
+        "IMOBILIÁRIA EXEMPLO LTDA - CNPJ 00.000.000/0001-00",
+        corpo,
+        "Rubrica do locador ______ Rubrica do locatário ______",
+        f"Página {numero} de 4",
+    ])
+
+
+def test_remove_cabecalho_rodape_e_numeracao():
+    corpos = [
+        "O prazo de locação é de 3 anos.",
+        "O aluguel mensal é de R$ 5.000,00.",
+        "O reajuste será anual pelo IGP-M.",
+        "Fica eleito o foro da comarca de Campinas.",
+    ]
+    paginas, estatisticas = limpar_paginas([_pagina(numero, corpo) for numero, corpo in enumerate(corpos, start=1)])
+
+    assert paginas == corpos
+    assert estatisticas["linhas_removidas"] == 12
+    assert 0 < estatisticas["taxa_reducao"] < 1
+
+
+def test_linha_de_margem_que_nao_se_repete_fica():
+    paginas = [
+        "Contrato de locação\nO prazo é de 5 anos.\nrodapé comum",
+        "Termo aditivo\nO aluguel foi reajustado.\nrodapé comum",
+        "Anexo I\nVistoria do imóvel.\nrodapé comum",
+    ]
+    limpas, _ = limpar_paginas(paginas)
+
+    assert limpas == [
+        "Contrato de locação\nO prazo é de 5 anos.",
+        "Termo aditivo\nO aluguel foi reajustado.",
+        "Anexo I\nVistoria do imóvel.",
+    ]
+
+
+def test_poucas_paginas_so_removem_numeracao():
+    limpas, estatisticas = limpar_paginas(["Timbre\nTexto um\n- 1 -", "Timbre\nTexto dois\n- 2 -"])
+
+    assert limpas == ["Timbre\nTexto um", "Timbre\nTexto dois"]
+    assert estatisticas["linhas_removidas"] == 2
+
+
+def test_hifenizacao_de_quebra_de_linha():
+    limpas, _ = limpar_paginas([
+        "O locatário terá direito aos benefi-\ncios previstos e usará o guarda-\nchuva coletivo.",
+    ])
+
+    assert limpas == ["O locatário terá direito aos beneficios previstos e usará o guarda-chuva coletivo."]
+
+
+@pytest.mark.parametrize("modelo", ["CLÁUSULA {}ª", "Cláusula {}", "§ {}º", "PARÁGRAFO {}º"])
+def test_titulos_de_clausula_no_topo_das_paginas_ficam(modelo):
+    # Mesma chave em todas as páginas (ex.: "clausula #a"), mas são títulos do contrato
+    titulos = [modelo.format(numero) for numero in range(5, 9)]
+    paginas = [
+        _pagina(numero, f"{titulo}\nTexto {chr(ord('A') + numero)} da cláusula.")
+        for numero, titulo in enumerate(titulos, start=1)
+    ]
+    limpas, _ = limpar_paginas(paginas)
+
+    assert [pagina.split("\n")[0] for pagina in limpas] == titulos
@@ -9,11 +9,55 @@ import FileUpload from './components/FileUpload';
 import AnalysisResult from './components/AnalysisResult';
 import './index.css';
 
+// Rótulos das etapas enviadas pelo stream de progresso do job
+const ROTULOS_ETAPAS = {
+  hash: 'Calculando hash...',
+  extracao: 'Extraindo texto...',
+  regras: 'Aplicando regras...',
+  ia: 'Consultando IA...',
+  gravacao: 'Salvando...',
+};
+
+// Acompanha o job pelo stream SSE; resolve com o job concluído ou rejeita com o erro
+function acompanharJob(baseUrl, caminhoEventos, onEtapa) {
+  return new Promise((resolve, reject) => {
+    const fonte = new EventSource(`${baseUrl}${caminhoEventos}`);
+    fonte.addEventListener('progresso', (e) => {
+      const evento = JSON.parse(e.data);
+      if (evento.estado === 'executando') onEtapa(evento.etapa);
+    });
+    fonte.addEventListener('concluido', (e) => {
+      fonte.close();
+      resolve(JSON.parse(e.data));
+    });
+    fonte.addEventListener('erro', (e) => {
+      fonte.close();
+      reject(new Error(JSON.parse(e.data).erro || 'Falha no processamento.'));
+    });
+    fonte.onerror = () => {
+      fonte.close();
+      reject(new Error('Conexão com o servidor perdida.'));
+    };
+  });
+}
+
+// SHA-256 do arquivo em hexadecimal (null se o navegador não tiver crypto.subtle, ex.: fora de HTTPS)
+async function calcularSha256(file) {
+  if (!window.crypto?.subtle) return null;
+  try {
+    const digest = await window.crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest)).map((b) => b.toString(16).padStart(2, '0')).join('');
+  } catch {
+    return null;
+  }
+}
+
 // --- Componente da Página do Analisador (Versão Simplificada) ---
 function Analisador() {
   const [arquivo, setArquivo] = useState(null);
   const [resultadoAnalise, setResultadoAnalise] = useState(null);
   const [estaCarregando, setEstaCarregando] = useState(false);
+  const [etapaAtual, setEtapaAtual] = useState(null);
   const [ultimoResultadoSemIA, setUltimoResultadoSemIA] = useState(null);
   const [retryCooldown, setRetryCooldown] = useState(0);
   const cooldownTimerRef = useRef(null);
@@ -76,8 +120,27 @@ function Analisador() {
     formData.append('file', arquivo); // Envia o arquivo como 'file'
 
     try {
-      // Chama o endpoint único /analisar/
-      const url = `${apiBaseUrl.replace(/\/$/, '')}/analisar/${opts.forceAi ? '?force_ai=true' : ''}`;
+      const baseUrl = apiBaseUrl.replace(/\/$/, '');
+
+      // Arquivo já analisado? Consulta pelo hash antes de enviar o arquivo inteiro
+      setEtapaAtual('hash');
+      const sha256 = await calcularSha256(arquivo);
+      if (sha256 && !opts.forceAi) {
+        const existente = await fetch(`${baseUrl}/analises/${sha256}`).catch(() => null);
+        if (existente?.ok) {
+          const data = { ...(await existente.json()), nomeArquivo: arquivo.name };
+          setResultadoAnalise(data);
+          const iaText = data.analiseIA || '';
+          if (typeof iaText === 'string' && /❌|erro|quota|429/i.test(iaText)) setUltimoResultadoSemIA(data);
+          return;
+        }
+      }
+
+      // Enfileira a análise como job e acompanha o progresso das etapas
+      const params = new URLSearchParams();
+      if (opts.forceAi) params.set('force_ai', 'true');
+      if (sha256) params.set('sha256', sha256);
+      const url = `${baseUrl}/analisar/jobs${params.toString() ? `?${params}` : ''}`;
       const response = await fetch(url, {
         method: 'POST',
         body: formData,
@@ -89,7 +152,9 @@ function Analisador() {
         throw new Error(`Falha na comunicação: ${detail}`);
       }
 
-      const data = await response.json();
+      const job = await response.json();
+      const concluido = await acompanharJob(baseUrl, job.eventos, setEtapaAtual);
+      const data = concluido.resultado;
       setResultadoAnalise(data);
       // Se IA indisponível, guardamos o resultado para retry
       const iaText = (data && data.analiseIA) || '';
@@ -100,6 +165,7 @@ function Analisador() {
       setResultadoAnalise({ erro: `Erro na Análise: ${error.message}` });
     } finally {
       setEstaCarregando(false); 
+      setEtapaAtual(null);
     }
   };
 
@@ -115,7 +181,7 @@ function Analisador() {
         <div className="file-info">
           <p>Arquivo pronto para análise: <strong>{arquivo.name}</strong></p>
           <button onClick={handleAnalisarClick} disabled={estaCarregando}>
-            {estaCarregando ? "Analisando..." : "Analisar Agora"}
+            {estaCarregando ? (ROTULOS_ETAPAS[etapaAtual] || "Analisando...") : "Analisar Agora"}
           </button>
         </div>
       )}
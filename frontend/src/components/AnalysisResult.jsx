@@ -12,12 +12,28 @@ const getRiskColor = (tipo) => {
   }
 };
 
+// Trecho do contrato em volta do ponto de atenção, com o texto casado destacado
+function ContextoPonto({ contexto, destaque }) {
+  const [inicio, fim] = Array.isArray(destaque) ? destaque : [0, 0];
+  return (
+    <p className="ponto-contexto">
+      …{contexto.slice(0, inicio)}<mark>{contexto.slice(inicio, fim)}</mark>{contexto.slice(fim)}…
+    </p>
+  );
+}
+
 // Um componente para exibir cada "ponto de atenção" de forma organizada
 function PontoAtencao({ ponto }) {
+  const localizacao = ponto.localizacao || {};
 
   return (
     <div className="ponto-atencao" style={{ borderLeft: `5px solid ${getRiskColor(ponto.tipo)}` }}>
       <h4><span style={{ color: getRiskColor(ponto.tipo) }}>{ponto.tipo}</span>: {ponto.categoria}</h4>
+      {ponto.clausula && ponto.clausula !== 'preambulo' && (
+        <small><strong>Cláusula {ponto.clausula}</strong>{ponto.clausula_titulo && ` — ${ponto.clausula_titulo}`}</small>
+      )}
+      {localizacao.pagina && <small> (página {localizacao.pagina}, linha {localizacao.linha})</small>}
+      {ponto.contexto && <ContextoPonto contexto={ponto.contexto} destaque={ponto.destaque} />}
       <p><strong>Descrição:</strong> {ponto.descricao}</p>
       <p><strong>Impacto Potencial:</strong> {ponto.impacto}</p>
       <p><strong>Recomendação:</strong> {ponto.recomendacao}</p>